@@ -3,6 +3,20 @@ import pandas as pd
 import plotly.express as px
 from datetime import datetime, timedelta
 
+from cartoes_kpis import cartoes_kpis
+from datasets_compartilhados import dataset_compartilhado, registro_datasets
+from estilos import aplicar_estilo
+from graficos import grafico_linha
+from metricas_desempenho import memoria_rss_mb
+from imagens_catalogo import PipelineImagens, disponivel as imagens_disponiveis, grade_catalogo, produtos_catalogo
+from repositorio_dados import RepositorioDados
+
+try:
+    from vitrinescv_responsive import DISPOSITIVO_PADRAO, detectar_dispositivo
+except ImportError:  # streamlit-js-eval é opcional (requirements_mobile.txt)
+    DISPOSITIVO_PADRAO = {"width": 1200, "pixel_ratio": 1}
+    detectar_dispositivo = None
+
 # Configuração da página
 st.set_page_config(
     page_title="VitrineSCV - Sistema de Controle de Vendas", 
@@ -11,28 +25,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# CSS personalizado
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        color: #1f77b4;
-        text-align: center;
-        padding: 1rem 0;
-        border-bottom: 2px solid #1f77b4;
-        margin-bottom: 2rem;
-    }
-    .metric-card {
-        background-color: #f8f9fa;
-        padding: 1rem;
-        border-radius: 10px;
-        border-left: 4px solid #1f77b4;
-    }
-    .sidebar .sidebar-content {
-        background-color: #f1f3f4;
-    }
-</style>
-""", unsafe_allow_html=True)
+# CSS personalizado (folha pré-compilada em estilos.py)
+aplicar_estilo('app')
 
 # Título principal
 st.markdown('<h1 class="main-header">🎯 VitrineSCV - Sistema Completo de Controle de Vendas</h1>', unsafe_allow_html=True)
@@ -46,8 +40,17 @@ pagina = st.sidebar.selectbox(
     ["📊 Dashboard", "👥 Clientes", "📦 Produtos", "🛒 Pedidos", "📈 Relatórios", "⚙️ Configurações"]
 )
 
-# Função para dados de exemplo
-@st.cache_data
+# Catálogo e miniaturas compartilhados entre as sessões do processo
+@st.cache_resource
+def obter_repositorio():
+    return RepositorioDados()
+
+@st.cache_resource
+def obter_pipeline_imagens():
+    return PipelineImagens()
+
+# Função para dados de exemplo (uma cópia por processo; as datas são relativas a hoje)
+@dataset_compartilhado(ttl=60 * 60)
 def gerar_dados_vendas():
     datas = [datetime.now() - timedelta(days=x) for x in range(30, 0, -1)]
     vendas = [45000 + (i * 1000) + (i % 7 * 2000) for i in range(30)]
@@ -57,40 +60,13 @@ def gerar_dados_vendas():
 if pagina == "📊 Dashboard":
     st.subheader("Dashboard de Vendas - Tempo Real")
 
-    # Métricas principais
-    col1, col2, col3, col4 = st.columns(4)
-
-    with col1:
-        st.metric(
-            label="💰 Vendas do Mês",
-            value="R$ 125.430,00",
-            delta="12,5%",
-            help="Vendas acumuladas no mês atual"
-        )
-
-    with col2:
-        st.metric(
-            label="📋 Pedidos",
-            value="347",
-            delta="8,2%",
-            help="Total de pedidos no período"
-        )
-
-    with col3:
-        st.metric(
-            label="👥 Clientes Ativos", 
-            value="89",
-            delta="15,3%",
-            help="Clientes com pedidos nos últimos 30 dias"
-        )
-
-    with col4:
-        st.metric(
-            label="📦 Produtos",
-            value="1.234",
-            delta="-2,1%",
-            help="Produtos em estoque"
-        )
+    # Métricas principais (fragmento atualizado sozinho, sem rerodar a página)
+    cartoes_kpis(obter_repositorio(), (
+        ("receita", "💰 Vendas do Mês"),
+        ("pedidos", "📋 Pedidos"),
+        ("clientes", "👥 Clientes Ativos"),
+        ("produtos", "📦 Produtos"),
+    ), colunas=4)
 
     st.markdown("---")
 
@@ -100,7 +76,7 @@ if pagina == "📊 Dashboard":
     with col_left:
         st.subheader("📈 Evolução das Vendas (Últimos 30 dias)")
         df_vendas = gerar_dados_vendas()
-        fig_vendas = px.line(
+        fig_vendas = grafico_linha(
             df_vendas, 
             x='Data', 
             y='Vendas',
@@ -144,11 +120,26 @@ elif pagina == "👥 Clientes":
 
 elif pagina == "📦 Produtos":
     st.subheader("📦 Catálogo de Produtos") 
-    st.info("🛍️ Módulo de produtos - Em desenvolvimento")
+
+    # Miniaturas no tamanho da tela do aparelho (iPad em dados móveis não recebe a foto original)
+    dispositivo = detectar_dispositivo() if detectar_dispositivo is not None else DISPOSITIVO_PADRAO
+    produtos = produtos_catalogo(obter_repositorio())
+    if produtos.empty:
+        st.info("🛍️ Nenhum produto cadastrado - importe os dados pelo Sistema de Controle de Vendas")
+    else:
+        if not imagens_disponiveis():
+            st.caption("Miniaturas indisponíveis: instale o pillow.")
+        categorias = ["Todas"] + sorted(produtos['categoria'].dropna().unique())
+        categoria = st.selectbox("Categoria:", categorias)
+        if categoria != "Todas":
+            produtos = produtos[produtos['categoria'] == categoria]
+        grade_catalogo(
+            produtos, obter_pipeline_imagens(), dispositivo['width'],
+            dispositivo.get('pixel_ratio', 1), chave=f"catalogo_{categoria}"
+        )
 
     with st.expander("🔍 Preview das Funcionalidades"):
         st.write("**Recursos planejados:**")
-        st.write("• Catálogo com imagens")
         st.write("• Controle de estoque")
         st.write("• Preços por representada")
         st.write("• Alertas de estoque baixo")
@@ -179,6 +170,33 @@ elif pagina == "⚙️ Configurações":
     st.subheader("⚙️ Configurações do Sistema")
     st.info("🔧 Módulo de configurações - Em desenvolvimento")
 
+    # Datasets mantidos uma vez por processo e lidos sem cópia pelas sessões
+    st.markdown("### 💾 Dados Compartilhados em Memória")
+    registro = registro_datasets()
+    estatisticas = registro.estatisticas()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Memória dos datasets", f"{registro.memoria_total_bytes() / 1024 ** 2:,.1f} MB")
+    with col2:
+        st.metric("Limite", f"{registro.limite_bytes / 1024 ** 2:,.0f} MB")
+    with col3:
+        rss = memoria_rss_mb()
+        st.metric("Memória do processo", f"{rss:,.0f} MB" if rss is not None else "-")
+    if estatisticas.empty:
+        st.caption("Nenhum dataset carregado neste processo.")
+    else:
+        st.dataframe(
+            estatisticas, hide_index=True, use_container_width=True,
+            column_config={
+                "memoria_mb": st.column_config.NumberColumn("Memória (MB)", format="%.2f"),
+                "taxa_acerto": st.column_config.ProgressColumn("Taxa de acerto", min_value=0, max_value=1),
+                "segundos_geracao": st.column_config.NumberColumn("Geração (s)", format="%.2f"),
+            }
+        )
+    if st.button("🗑️ Liberar datasets"):
+        registro.limpar()
+        st.rerun()
+
     with st.expander("🔍 Preview das Funcionalidades"):
         st.write("**Recursos planejados:**")
         st.write("• Configuração de representadas")
@@ -4,7 +4,33 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import numpy as np
+import os
+
+try:
+    from st_keyup import st_keyup
+except ImportError:  # streamlit-keyup é opcional: sem ele a busca roda ao pressionar Enter
+    st_keyup = None
+
+from busca_produtos import busca_produtos
+from cache_versionado import CacheVersionado
+from carrinho_proposta import CarrinhoProposta, catalogo_produtos, representada_dos_itens
+from colunas_derivadas import kpis_gerais
+from comissoes import comissoes_detalhadas, definir_regras, regras_comissao
+from dados_exemplo import gerar_dados_exemplo
+from drive_integration import CAMINHO_CREDENCIAIS, GoogleDriveManager
+from estilos import aplicar_estilo
+from exportacao import FORMATOS, ExportadorDados
+from graficos import grafico_barras, grafico_linha
+from imagens_catalogo import sincronizar_imagens
+from importacao_dados import importar_arquivo, pre_visualizar
+from indice_categorico import indice_clientes, indice_produtos
+from indice_datas import indice_vendas
+from metricas_desempenho import cronometrado, obter_metricas
+from propostas_pdf import GeradorPropostas, disponivel as pdf_disponivel, proposta_de_formulario
+from repositorio_dados import RepositorioDados
+from rollups_vendas import intervalo_datas, vendas_diarias, vendas_por_mes, vendas_por_status
+from sincronizacao_drive import SincronizadorPrecos
+from tabela_paginada import tabela_paginada
 
 # Configuração da página
 st.set_page_config(
@@ -14,26 +40,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# CSS customizado para melhorar a aparência
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        color: #1f77b4;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    .metric-card {
-        background-color: #f0f2f6;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border-left: 5px solid #1f77b4;
-    }
-    .status-ativo { color: #28a745; }
-    .status-pendente { color: #ffc107; }
-    .status-cancelado { color: #dc3545; }
-</style>
-""", unsafe_allow_html=True)
+# CSS customizado para melhorar a aparência (folha pré-compilada em estilos.py)
+aplicar_estilo('controle_vendas')
 
 # Título principal
 st.markdown("<h1 class='main-header'>💼 Sistema Completo de Controle de Vendas</h1>", unsafe_allow_html=True)
@@ -49,132 +57,262 @@ page = st.sidebar.selectbox("Selecione uma função:", [
     "📤 Upload de Dados"
 ])
 
-# Função para gerar dados de exemplo
-@st.cache_data
-def gerar_dados_exemplo():
-    # Dados de produtos/estoque
-    produtos = pd.DataFrame({
-        'codigo': [f'PROD{i:03d}' for i in range(1, 51)],
-        'nome': [f'Produto {i}' for i in range(1, 51)],
-        'categoria': np.random.choice(['Eletrônicos', 'Roupas', 'Casa', 'Esportes'], 50),
-        'preco': np.random.uniform(50, 500, 50).round(2),
-        'estoque': np.random.randint(0, 100, 50),
-        'estoque_minimo': np.random.randint(5, 20, 50)
-    })
-
-    # Dados de clientes/leads
-    clientes = pd.DataFrame({
-        'id': range(1, 26),
-        'nome': [f'Cliente {i}' for i in range(1, 26)],
-        'email': [f'cliente{i}@email.com' for i in range(1, 26)],
-        'telefone': [f'(11) 9999-{i:04d}' for i in range(1, 26)],
-        'status': np.random.choice(['Ativo', 'Prospect', 'Inativo'], 25),
-        'cidade': np.random.choice(['São Paulo', 'Rio de Janeiro', 'Belo Horizonte', 'Salvador'], 25)
-    })
-
-    # Dados de vendas
-    vendas = pd.DataFrame({
-        'id': range(1, 101),
-        'data': pd.date_range(start='2025-01-01', periods=100, freq='D')[:100],
-        'cliente_id': np.random.randint(1, 26, 100),
-        'produto_codigo': np.random.choice(produtos['codigo'], 100),
-        'quantidade': np.random.randint(1, 10, 100),
-        'valor_unitario': np.random.uniform(50, 500, 100).round(2),
-        'status': np.random.choice(['Finalizada', 'Pendente', 'Cancelada'], 100, p=[0.7, 0.2, 0.1])
-    })
-    vendas['valor_total'] = vendas['quantidade'] * vendas['valor_unitario']
-
-    return produtos, clientes, vendas
-
-# Carregar dados
-produtos, clientes, vendas = gerar_dados_exemplo()
+# Repositório persistente compartilhado entre sessões
+@st.cache_resource
+def obter_repositorio():
+    repositorio = RepositorioDados()
+    if repositorio.vazio():
+        # Banco novo: popula com os dados de exemplo (gerados só para a carga)
+        produtos, clientes, vendas = gerar_dados_exemplo()
+        repositorio.inserir('produtos', produtos)
+        repositorio.inserir('clientes', clientes)
+        repositorio.inserir('vendas', vendas)
+    return repositorio
+
+repositorio = obter_repositorio()
+
+@st.cache_resource
+def obter_exportador():
+    return ExportadorDados(obter_repositorio())
+
+# Google Drive compartilhado pelo processo (só com credenciais configuradas)
+@st.cache_resource
+def obter_drive():
+    if not os.path.exists(CAMINHO_CREDENCIAIS):
+        return None
+    return GoogleDriveManager()
+
+# Tabelas de preços do Drive importadas em segundo plano
+@st.cache_resource
+def obter_sincronizador():
+    drive = obter_drive()
+    if drive is None:
+        return None
+    return SincronizadorPrecos(drive, obter_repositorio()).iniciar()
+
+try:
+    drive = obter_drive()
+    sincronizador = obter_sincronizador()
+except Exception as e:
+    drive = sincronizador = None
+    st.sidebar.warning(f"☁️ Google Drive indisponível: {e}")
+
+def fragmento(nome, run_every=None):
+    """st.fragment que registra o tempo de cada execução (painel "Desempenho dos Dados")"""
+    def decorador(funcao):
+        return st.fragment(cronometrado(f"fragmento_{nome}")(funcao), run_every=run_every)
+    return decorador
+
+@fragmento("uploads_drive", run_every=2)
+def acompanhar_uploads():
+    """Progresso dos uploads para o Drive, atualizado sem rerodar a página"""
+    if drive.uploads_ativos() == 0:
+        st.rerun()
+    for upload in drive.status_uploads()[:5]:
+        fracao = upload['enviados'] / upload['tamanho'] if upload['tamanho'] else 1.0
+        st.progress(min(fracao, 1.0), text=f"{upload['nome']} ({upload['estado']})")
+
+# Representadas em que o representante está trabalhando: as páginas leem só as partições delas
+nomes_representadas = {r: r or "(sem representada)" for r in repositorio.representadas()}
+representadas_selecionadas = st.sidebar.multiselect(
+    "🏢 Representadas:", list(nomes_representadas), format_func=nomes_representadas.get,
+    help="Vazio = todas as representadas"
+)
+representadas = tuple(representadas_selecionadas) or None
+
+if drive is not None and drive.uploads_ativos():
+    with st.sidebar:
+        st.caption("☁️ Enviando para o Drive")
+        acompanhar_uploads()
+
+@fragmento("exportacao_andamento", run_every=1)
+def acompanhar_exportacao(tabela, formato):
+    """Acompanha a geração em segundo plano sem rerodar a página inteira"""
+    if obter_exportador().solicitar(tabela, formato).done():
+        st.rerun()
+    st.info("⏳ Gerando arquivo...")
+
+def botao_exportacao(tabela, rotulo, nome_arquivo, formato):
+    """Pede a exportação e oferece o download quando o arquivo fica pronto"""
+    chave = f"exportacao_{tabela}"
+    if st.button(rotulo):
+        st.session_state[chave] = formato
+    if st.session_state.get(chave) != formato:
+        return
+
+    futuro = obter_exportador().solicitar(tabela, formato)
+    if not futuro.done():
+        acompanhar_exportacao(tabela, formato)
+    elif futuro.exception() is not None:
+        st.error(f"❌ Erro ao exportar: {futuro.exception()}")
+    else:
+        # O arquivo só é lido para a sessão quando pedido (e descartado depois
+        # do download), não a cada rerun. Não vai para static/: as exportações
+        # têm dados de clientes e o static serving não exige login
+        preparado = f"{chave}_preparado"
+        if st.session_state.get(preparado) != futuro.result():
+            st.button("📦 Preparar download", key=f"{chave}_preparar",
+                      on_click=st.session_state.__setitem__, args=(preparado, futuro.result()))
+        else:
+            with open(futuro.result(), 'rb') as arquivo:
+                st.download_button("⬇️ Download", arquivo, f"{nome_arquivo}.{formato}", FORMATOS[formato],
+                                   on_click=st.session_state.pop, args=(preparado, None))
+
+# PDFs de propostas gerados em um pool de processos (cache por conteúdo)
+@st.cache_resource
+def obter_gerador_propostas():
+    return GeradorPropostas()
+
+@fragmento("proposta_pdf", run_every=1)
+def acompanhar_proposta(proposta):
+    """Acompanha a geração do PDF sem rerodar a página inteira"""
+    if obter_gerador_propostas().solicitar(proposta).done():
+        st.rerun()
+    st.info("⏳ Gerando PDF da proposta...")
+
+def pdf_proposta(proposta):
+    """Pede o PDF da proposta e oferece download e envio ao Drive quando fica pronto"""
+    if not pdf_disponivel():
+        st.caption("Geração de PDF indisponível: instale o fpdf2.")
+        return
+
+    futuro = obter_gerador_propostas().solicitar(proposta)
+    if not futuro.done():
+        acompanhar_proposta(proposta)
+    elif futuro.exception() is not None:
+        st.error(f"❌ Erro ao gerar o PDF: {futuro.exception()}")
+    else:
+        nome_arquivo = f"proposta_{proposta['cliente']}_{proposta['data']}.pdf".replace(' ', '_')
+        col1, col2 = st.columns(2)
+        with col1:
+            with open(futuro.result(), 'rb') as arquivo:
+                st.download_button("📥 Baixar PDF", arquivo, nome_arquivo, "application/pdf")
+        with col2:
+            if drive is not None and st.button("☁️ Enviar ao Drive"):
+                drive.enviar(futuro.result(), '01_Propostas', nome=nome_arquivo)
+                st.rerun()
+
+def campo_busca(rotulo, chave, placeholder="Código, nome ou categoria"):
+    """Caixa de busca atualizada a cada tecla (streamlit-keyup) ou ao confirmar"""
+    if st_keyup is not None:
+        return st_keyup(rotulo, key=chave, debounce=200, placeholder=placeholder)
+    return st.text_input(rotulo, key=chave, placeholder=placeholder)
+
+@fragmento("busca_proposta")
+def adicionar_item_proposta(carrinho):
+    """Busca de produtos e inclusão no carrinho; digitar só reroda este trecho"""
+    consulta = campo_busca("🔍 Buscar produto:", "busca_proposta")
+    resultados = busca_produtos(repositorio).buscar(consulta or '', limite=20)
+    if resultados.empty:
+        if consulta:
+            st.caption("Nenhum produto encontrado.")
+        return
+
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        codigo = st.selectbox(
+            "Selecionar Produto:", resultados['codigo'],
+            format_func=dict(zip(resultados['codigo'], resultados['codigo'] + ' — ' + resultados['nome'])).get
+        )
+    with col2:
+        quantidade = st.number_input("Quantidade:", min_value=1, value=1)
+    with col3:
+        desconto_item = st.number_input("Desconto do item (%):", min_value=0.0, max_value=50.0, value=0.0)
 
-# Dashboard Principal
-if page == "📊 Dashboard Principal":
-    st.header("📊 Dashboard Executivo")
+    if st.button("➕ Adicionar Item"):
+        carrinho.adicionar(codigo, quantidade, desconto_item)
+        st.rerun()
+
+# Páginas: cada trecho é um fragmento que recebe explicitamente o que depende
+# de widgets de fora dele. Mexer num widget reroda só o fragmento que o contém
+# (CSS, barra lateral e os demais trechos da página ficam como estão).
+
+# Figuras montadas, compartilhadas pelas sessões (válidas enquanto a versão dos dados não muda)
+@st.cache_resource
+def obter_figuras():
+    return CacheVersionado(max_itens=64)
 
-    # Métricas principais
+@fragmento("dashboard_kpis")
+def dashboard_kpis():
+    kpis = kpis_gerais(repositorio)
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        total_vendas = vendas[vendas['status'] == 'Finalizada']['valor_total'].sum()
-        st.metric("💰 Vendas Totais", f"R$ {total_vendas:,.2f}")
+        st.metric("💰 Vendas Totais", f"R$ {kpis['receita']:,.2f}")
 
     with col2:
-        leads_ativos = len(clientes[clientes['status'] == 'Ativo'])
-        st.metric("👥 Clientes Ativos", leads_ativos)
+        st.metric("👥 Clientes Ativos", kpis['clientes_ativos'])
 
     with col3:
-        produtos_estoque_baixo = len(produtos[produtos['estoque'] <= produtos['estoque_minimo']])
-        st.metric("⚠️ Estoque Baixo", produtos_estoque_baixo)
+        st.metric("⚠️ Estoque Baixo", kpis['estoque_baixo'])
 
     with col4:
-        vendas_pendentes = len(vendas[vendas['status'] == 'Pendente'])
-        st.metric("⏳ Vendas Pendentes", vendas_pendentes)
+        st.metric("⏳ Vendas Pendentes", kpis['pendentes'])
 
-    # Gráficos
+@fragmento("dashboard_graficos")
+def dashboard_graficos():
     col1, col2 = st.columns(2)
 
     with col1:
         st.subheader("📈 Vendas por Mês")
-        vendas_mes = vendas[vendas['status'] == 'Finalizada'].copy()
-        vendas_mes['mes'] = vendas_mes['data'].dt.to_period('M')
-        vendas_agrupadas = vendas_mes.groupby('mes')['valor_total'].sum().reset_index()
-        vendas_agrupadas['mes'] = vendas_agrupadas['mes'].astype(str)
+        # Lido do rollup mensal, mantido a cada venda inserida ou alterada
+        vendas_agrupadas = vendas_por_mes(repositorio)
 
-        fig = px.line(vendas_agrupadas, x='mes', y='valor_total', 
-                     title="Evolução das Vendas")
+        fig = grafico_linha(vendas_agrupadas, x='mes', y='valor_total', 
+                            title="Evolução das Vendas")
         st.plotly_chart(fig, use_container_width=True)
 
     with col2:
         st.subheader("🥧 Vendas por Status")
-        status_vendas = vendas['status'].value_counts()
-        fig = px.pie(values=status_vendas.values, names=status_vendas.index,
+        status_vendas = vendas_por_status(repositorio)
+        fig = px.pie(values=status_vendas['vendas'], names=status_vendas['status'],
                     title="Distribuição de Vendas por Status")
         st.plotly_chart(fig, use_container_width=True)
 
-# Controle de Estoque
-elif page == "📦 Controle de Estoque":
-    st.header("📦 Controle de Estoque")
+@fragmento("estoque")
+def controle_estoque(representadas):
+    """Filtros, tabela e gráfico de estoque; a paginação reroda só a tabela"""
+    indice = indice_produtos(repositorio, representadas)
 
-    # Filtros
-    col1, col2 = st.columns(2)
+    # Filtros (opções vindas do índice categórico)
+    col1, col2, col3 = st.columns(3)
     with col1:
-        categoria_filter = st.selectbox("Filtrar por categoria:", 
-                                       ['Todas'] + list(produtos['categoria'].unique()))
+        consulta_estoque = campo_busca("🔍 Buscar produto:", "busca_estoque")
     with col2:
+        categoria_filter = st.selectbox("Filtrar por categoria:", 
+                                       ['Todas'] + indice.opcoes('categoria'))
+    with col3:
         estoque_filter = st.selectbox("Filtrar por estoque:", 
                                      ['Todos', 'Estoque Baixo', 'Estoque OK'])
 
-    # Aplicar filtros
-    produtos_filtrados = produtos.copy()
-    if categoria_filter != 'Todas':
-        produtos_filtrados = produtos_filtrados[produtos_filtrados['categoria'] == categoria_filter]
-
-    if estoque_filter == 'Estoque Baixo':
-        produtos_filtrados = produtos_filtrados[produtos_filtrados['estoque'] <= produtos_filtrados['estoque_minimo']]
-    elif estoque_filter == 'Estoque OK':
-        produtos_filtrados = produtos_filtrados[produtos_filtrados['estoque'] > produtos_filtrados['estoque_minimo']]
-
-    # Adicionar coluna de status de estoque
-    produtos_filtrados['status_estoque'] = produtos_filtrados.apply(
-        lambda row: '🔴 Baixo' if row['estoque'] <= row['estoque_minimo'] else '🟢 OK', axis=1
+    # Aplicar filtros como interseção de índices, sem copiar a tabela
+    produtos_filtrados = indice.filtrar(
+        categoria=None if categoria_filter == 'Todas' else categoria_filter,
+        estoque_baixo={'Estoque Baixo': True, 'Estoque OK': False}.get(estoque_filter)
     )
+    if consulta_estoque:
+        encontrados = busca_produtos(repositorio).buscar(consulta_estoque, limite=200)['codigo']
+        produtos_filtrados = produtos_filtrados[produtos_filtrados['codigo'].isin(encontrados)]
+
+    versao = (repositorio.versao('produtos'), representadas, categoria_filter, estoque_filter,
+              consulta_estoque)
+    tabela_paginada(produtos_filtrados, 'tabela_produtos', versao)
+
+    # Gráfico de estoque (a mesma combinação de filtros reaproveita a figura)
+    def montar_grafico():
+        fig = grafico_barras(produtos_filtrados, x='nome', y='estoque', 
+                             title="Níveis de Estoque por Produto",
+                             color='categoria')
+        fig.update_layout(xaxis_tickangle=-45)
+        return fig
+    st.plotly_chart(obter_figuras().obter('estoque', versao, montar_grafico), use_container_width=True)
+
+@fragmento("novo_lead")
+def formulario_lead():
+    """Cadastro de lead; só ao salvar a página é rerodada (a lista precisa do novo cliente)"""
+    if st.session_state.pop('lead_adicionado', False):
+        st.success("Lead adicionado com sucesso!")
 
-    st.dataframe(produtos_filtrados, use_container_width=True)
-
-    # Gráfico de estoque
-    fig = px.bar(produtos_filtrados, x='nome', y='estoque', 
-                title="Níveis de Estoque por Produto",
-                color='categoria')
-    fig.update_layout(xaxis_tickangle=-45)
-    st.plotly_chart(fig, use_container_width=True)
-
-# Gestão de Leads
-elif page == "🎯 Gestão de Leads":
-    st.header("🎯 Gestão de Leads e Clientes")
-
-    # Formulário para novo lead
     with st.expander("➕ Adicionar Novo Lead"):
         with st.form("novo_lead"):
             col1, col2 = st.columns(2)
@@ -186,54 +324,112 @@ elif page == "🎯 Gestão de Leads":
                 cidade = st.selectbox("Cidade", ['São Paulo', 'Rio de Janeiro', 'Belo Horizonte', 'Salvador'])
 
             if st.form_submit_button("💾 Adicionar Lead"):
-                st.success("Lead adicionado com sucesso!")
-
-    # Filtros para clientes
+                # O id é atribuído pelo banco
+                repositorio.inserir('clientes', pd.DataFrame([{
+                    'nome': nome, 'email': email, 'telefone': telefone,
+                    'status': 'Prospect', 'cidade': cidade
+                }]))
+                st.session_state['lead_adicionado'] = True
+                st.rerun()
+
+@fragmento("clientes")
+def lista_clientes():
+    # Filtros para clientes (opções vindas do índice categórico)
+    indice = indice_clientes(repositorio)
     col1, col2 = st.columns(2)
     with col1:
-        status_filter = st.selectbox("Filtrar por status:", ['Todos'] + list(clientes['status'].unique()))
+        status_filter = st.selectbox("Filtrar por status:", ['Todos'] + indice.opcoes('status'))
     with col2:
-        cidade_filter = st.selectbox("Filtrar por cidade:", ['Todas'] + list(clientes['cidade'].unique()))
+        cidade_filter = st.selectbox("Filtrar por cidade:", ['Todas'] + indice.opcoes('cidade'))
 
-    # Aplicar filtros
-    clientes_filtrados = clientes.copy()
-    if status_filter != 'Todos':
-        clientes_filtrados = clientes_filtrados[clientes_filtrados['status'] == status_filter]
-    if cidade_filter != 'Todas':
-        clientes_filtrados = clientes_filtrados[clientes_filtrados['cidade'] == cidade_filter]
+    # Aplicar filtros como interseção de índices, sem copiar a tabela
+    clientes_filtrados = indice.filtrar(
+        status=None if status_filter == 'Todos' else status_filter,
+        cidade=None if cidade_filter == 'Todas' else cidade_filter
+    )
 
-    st.dataframe(clientes_filtrados, use_container_width=True)
+    tabela_paginada(clientes_filtrados, 'tabela_clientes',
+                    (repositorio.versao('clientes'), status_filter, cidade_filter))
 
-    # Gráfico de distribuição de clientes
-    fig = px.bar(clientes['status'].value_counts().reset_index(), 
-                x='index', y='status', title="Distribuição de Clientes por Status")
+@fragmento("grafico_clientes")
+def grafico_clientes():
+    # Distribuição de todos os clientes: não depende dos filtros acima
+    fig = px.bar(indice_clientes(repositorio).contagens('status').reset_index(), 
+                x='status', y='quantidade', title="Distribuição de Clientes por Status")
     st.plotly_chart(fig, use_container_width=True)
 
-# Propostas Comerciais
-elif page == "📋 Propostas Comerciais":
-    st.header("📋 Gerador de Propostas Comerciais")
+@fragmento("proposta")
+def montar_proposta():
+    """Dados, itens e totais da proposta; a busca de produtos é um fragmento à parte"""
+    catalogo = catalogo_produtos(repositorio)
+    clientes = repositorio.carregar('clientes', ['nome'])
+    carrinho = st.session_state.setdefault('carrinho_proposta', CarrinhoProposta())
 
-    with st.form("nova_proposta"):
-        st.subheader("📝 Nova Proposta")
+    st.subheader("📝 Nova Proposta")
+    col1, col2 = st.columns(2)
+    with col1:
+        cliente_selecionado = st.selectbox("Selecionar Cliente:", clientes['nome'].tolist())
+        data_proposta = st.date_input("Data da Proposta:", datetime.now())
 
-        col1, col2 = st.columns(2)
+    with col2:
+        validade = st.number_input("Validade (dias):", min_value=1, value=30)
+        desconto = st.number_input("Desconto (%):", min_value=0.0, max_value=50.0, value=0.0)
+
+    st.subheader("🛒 Itens da Proposta")
+    adicionar_item_proposta(carrinho)
+
+    # Produtos que saíram do catálogo (recarga de tabela de preços) deixam o carrinho
+    indisponiveis = carrinho.remover_indisponiveis(catalogo)
+    if indisponiveis:
+        st.warning(f"⚠️ Produtos indisponíveis removidos da proposta: {', '.join(map(str, indisponiveis))}")
+
+    if len(carrinho) and st.button("🗑️ Limpar Itens"):
+        carrinho.limpar()
+        st.session_state.pop('proposta_atual', None)
+        st.rerun(scope="fragment")
+
+    # Linhas e totais calculados de uma vez sobre o carrinho inteiro
+    itens, totais = carrinho.calcular(catalogo, desconto)
+    if itens.empty:
+        st.info("Adicione produtos para montar a proposta.")
+    else:
+        # Quantidade e desconto editáveis na própria tabela (quantidade 0 remove o item)
+        versao_itens = st.session_state.get('versao_itens_proposta', 0)
+        editado = st.data_editor(
+            itens, hide_index=True, use_container_width=True,
+            disabled=[c for c in itens.columns if c not in ('quantidade', 'desconto')],
+            key=f"itens_proposta_{versao_itens}"
+        )
+        alterados = editado[(editado['quantidade'] != itens['quantidade'])
+                            | (editado['desconto'] != itens['desconto'])]
+        if not alterados.empty:
+            for codigo, nova_quantidade, novo_desconto in alterados[['codigo', 'quantidade', 'desconto']].itertuples(index=False):
+                if nova_quantidade <= 0:
+                    carrinho.remover(codigo)
+                else:
+                    carrinho.alterar(codigo, nova_quantidade, novo_desconto)
+            st.session_state['versao_itens_proposta'] = versao_itens + 1
+            st.rerun(scope="fragment")
+
+        col1, col2, col3 = st.columns(3)
         with col1:
-            cliente_selecionado = st.selectbox("Selecionar Cliente:", clientes['nome'].tolist())
-            data_proposta = st.date_input("Data da Proposta:", datetime.now())
-
+            st.metric("🧾 Subtotal", f"R$ {totais['subtotal']:,.2f}")
         with col2:
-            validade = st.number_input("Validade (dias):", min_value=1, value=30)
-            desconto = st.number_input("Desconto (%):", min_value=0.0, max_value=50.0, value=0.0)
-
-        st.subheader("🛒 Itens da Proposta")
-        produto_selecionado = st.selectbox("Selecionar Produto:", produtos['nome'].tolist())
-        quantidade = st.number_input("Quantidade:", min_value=1, value=1)
-
-        if st.form_submit_button("📄 Gerar Proposta"):
-            produto_info = produtos[produtos['nome'] == produto_selecionado].iloc[0]
-            valor_unitario = produto_info['preco']
-            valor_total = valor_unitario * quantidade
-            valor_com_desconto = valor_total * (1 - desconto/100)
+            st.metric("🏷️ Desconto", f"R$ {totais['desconto']:,.2f}")
+        with col3:
+            st.metric("💰 Total", f"R$ {totais['total']:,.2f}", f"{len(itens)} itens", delta_color="off")
+
+        # A representada dos itens vai para o cabeçalho e escolhe o logo do PDF
+        representada = representada_dos_itens(itens)
+        if representada is None and itens['representada'].nunique() > 1:
+            st.caption("ℹ️ Itens de mais de uma representada: o PDF sai sem logo.")
+
+        if st.button("📄 Gerar Proposta", type="primary"):
+            st.session_state['proposta_atual'] = proposta_de_formulario(
+                cliente_selecionado, data_proposta, validade, desconto,
+                itens[['codigo', 'nome', 'quantidade', 'valor_unitario', 'desconto']].to_dict('records'),
+                representada=representada
+            )
 
             st.success("✅ Proposta gerada com sucesso!")
 
@@ -243,42 +439,56 @@ elif page == "📋 Propostas Comerciais":
             ### 📋 PROPOSTA COMERCIAL
 
             **Cliente:** {cliente_selecionado}  
+            **Representada:** {representada or '-'}  
             **Data:** {data_proposta.strftime('%d/%m/%Y')}  
             **Validade:** {validade} dias  
 
-            **Produto:** {produto_selecionado}  
-            **Código:** {produto_info['codigo']}  
-            **Quantidade:** {quantidade}  
-            **Valor Unitário:** R$ {valor_unitario:.2f}  
+            **Itens:** {len(itens)}  
+            **Subtotal:** R$ {totais['subtotal']:,.2f}  
             **Desconto:** {desconto}%  
-            **Valor Total:** R$ {valor_com_desconto:.2f}  
+            **Valor Total:** R$ {totais['total']:,.2f}  
             """)
 
-# Relatório de Vendas
-elif page == "💰 Relatório de Vendas":
-    st.header("💰 Relatório Detalhado de Vendas")
+    # PDF gerado em segundo plano; o formulário continua respondendo
+    if 'proposta_atual' in st.session_state:
+        pdf_proposta(st.session_state['proposta_atual'])
+
+@fragmento("relatorio")
+def relatorio_vendas(representadas):
+    """Período, métricas, tabela, gráfico e comissões das vendas das representadas"""
+    if representadas is None:
+        # Todas as representadas: período padrão dos rollups, sem ler as vendas
+        primeira_data, ultima_data = intervalo_datas(repositorio)
+    else:
+        # Vendas das representadas ordenadas por data (partições delas)
+        indice = indice_vendas(repositorio, representadas)
+        if len(indice) == 0:
+            st.info("📭 Sem vendas das representadas selecionadas.")
+            return
+        primeira_data, ultima_data = indice.minimo, indice.maximo
 
     # Filtros de data
     col1, col2 = st.columns(2)
     with col1:
-        data_inicio = st.date_input("Data Início:", vendas['data'].min())
+        data_inicio = st.date_input("Data Início:", primeira_data)
     with col2:
-        data_fim = st.date_input("Data Fim:", vendas['data'].max())
+        data_fim = st.date_input("Data Fim:", ultima_data)
 
-    # Filtrar vendas por data
-    vendas_filtradas = vendas[
-        (vendas['data'] >= pd.to_datetime(data_inicio)) & 
-        (vendas['data'] <= pd.to_datetime(data_fim))
-    ]
+    # Filtrar vendas por data (fatia do índice, proporcional ao período);
+    # sem filtro de representada, o índice cobre só os meses do período
+    if representadas is None:
+        indice = indice_vendas(repositorio, None, data_inicio, data_fim)
+    vendas_filtradas = indice.intervalo(data_inicio, data_fim)
+    vendas_diarias_periodo = vendas_diarias(repositorio, data_inicio, data_fim, representadas=representadas)
 
-    # Métricas do período
+    # Métricas do período (a partir do rollup diário)
     col1, col2, col3 = st.columns(3)
+    receita_periodo = vendas_diarias_periodo['valor_total'].sum()
+    qtd_vendas = int(vendas_diarias_periodo['vendas'].sum())
     with col1:
-        receita_periodo = vendas_filtradas[vendas_filtradas['status'] == 'Finalizada']['valor_total'].sum()
         st.metric("💰 Receita do Período", f"R$ {receita_periodo:,.2f}")
 
     with col2:
-        qtd_vendas = len(vendas_filtradas[vendas_filtradas['status'] == 'Finalizada'])
         st.metric("📦 Quantidade de Vendas", qtd_vendas)
 
     with col3:
@@ -287,32 +497,52 @@ elif page == "💰 Relatório de Vendas":
 
     # Tabela de vendas
     st.subheader("📊 Vendas Detalhadas")
-    st.dataframe(vendas_filtradas, use_container_width=True)
+    versao = (repositorio.versao('vendas'), representadas, data_inicio, data_fim)
+    tabela_paginada(vendas_filtradas, 'tabela_vendas', versao)
 
     # Gráfico de vendas por dia
-    vendas_diarias = vendas_filtradas[vendas_filtradas['status'] == 'Finalizada'].groupby('data')['valor_total'].sum().reset_index()
-    fig = px.line(vendas_diarias, x='data', y='valor_total', title="Vendas Diárias")
-    st.plotly_chart(fig, use_container_width=True)
-
-# Upload de Dados
-elif page == "📤 Upload de Dados":
-    st.header("📤 Upload e Sincronização de Dados")
-
-    st.markdown("""
-    ### 📋 Instruções para Upload
-
-    Você pode fazer upload de planilhas Excel (.xlsx, .xlsm) ou CSV com os seguintes formatos:
-
-    **Produtos/Estoque:**
-    - codigo, nome, categoria, preco, estoque, estoque_minimo
-
-    **Clientes:**
-    - nome, email, telefone, status, cidade
-
-    **Vendas:**
-    - data, cliente_id, produto_codigo, quantidade, valor_unitario, status
-    """)
+    st.plotly_chart(
+        obter_figuras().obter('vendas_diarias', versao, lambda: grafico_linha(
+            vendas_diarias_periodo, x='data', y='valor_total', title="Vendas Diárias"
+        )),
+        use_container_width=True
+    )
 
+    # Comissões dos meses do período (tabela mantida a cada escrita em vendas)
+    st.subheader("💸 Comissões por Vendedor")
+    comissoes_periodo = comissoes_detalhadas(
+        repositorio, pd.Timestamp(data_inicio).strftime('%Y-%m'), pd.Timestamp(data_fim).strftime('%Y-%m'),
+        representadas
+    )
+    if comissoes_periodo.empty:
+        st.info("Nenhuma venda finalizada com comissão no período.")
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("💸 Comissões do Período", f"R$ {comissoes_periodo['comissao'].sum():,.2f}")
+        with col2:
+            por_vendedor = comissoes_periodo.groupby('vendedor', as_index=False)['comissao'].sum()
+            st.metric("👤 Vendedores Comissionados", len(por_vendedor))
+        st.dataframe(comissoes_periodo, use_container_width=True, hide_index=True)
+
+@fragmento("regras_comissao")
+def editor_regras_comissao():
+    """Edição das regras; salvar reroda a página, pois as comissões do relatório mudam"""
+    with st.expander("⚙️ Regras de Comissão"):
+        st.caption("Use * para valer em qualquer representada ou categoria. "
+                   "A faixa é definida pelo volume mensal do vendedor na representada.")
+        regras, faixas = regras_comissao(repositorio)
+        novas_regras = st.data_editor(regras, num_rows="dynamic", key='regras_comissao',
+                                      hide_index=True, use_container_width=True)
+        novas_faixas = st.data_editor(faixas, num_rows="dynamic", key='faixas_comissao',
+                                      hide_index=True, use_container_width=True)
+        if st.button("💾 Salvar regras e recalcular"):
+            definir_regras(repositorio, novas_regras, novas_faixas)
+            st.success("✅ Comissões recalculadas!")
+            st.rerun()
+
+@fragmento("upload")
+def upload_dados():
     uploaded_file = st.file_uploader(
         "Escolha um arquivo", 
         type=['xlsx', 'xlsm', 'csv'],
@@ -321,47 +551,188 @@ elif page == "📤 Upload de Dados":
 
     if uploaded_file is not None:
         try:
-            if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(uploaded_file)
-            else:
-                df = pd.read_excel(uploaded_file)
+            # Preview a partir do primeiro bloco; o arquivo não é lido inteiro
+            preview, tabela_destino = pre_visualizar(uploaded_file, uploaded_file.name)
 
             st.success("✅ Arquivo carregado com sucesso!")
             st.subheader("👀 Preview dos Dados")
-            st.dataframe(df.head(), use_container_width=True)
+            st.dataframe(preview, use_container_width=True)
 
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("📊 Total de Linhas", len(df))
+                st.metric("💾 Tamanho do Arquivo", f"{uploaded_file.size / 1024 ** 2:,.1f} MB")
             with col2:
-                st.metric("📋 Total de Colunas", len(df.columns))
+                st.metric("📋 Total de Colunas", len(preview.columns))
+
+            if tabela_destino is None:
+                st.warning("⚠️ As colunas não correspondem a nenhum dos formatos acima.")
 
-            # Botão para processar dados
-            if st.button("🔄 Processar e Integrar Dados"):
-                st.success("🎉 Dados integrados com sucesso ao sistema!")
+            else:
+                representada_arquivo = substituir = None
+                if tabela_destino in ('produtos', 'vendas'):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        representada_arquivo = st.text_input(
+                            "🏢 Representada:", disabled='representada' in preview.columns,
+                            help="Usada quando a planilha não tem a coluna representada"
+                        )
+                    with col2:
+                        # Nova tabela de preços: recarrega só a partição da representada
+                        substituir = tabela_destino == 'produtos' and st.checkbox(
+                            "🔄 Substituir a tabela da representada",
+                            help="Produtos da representada que não estiverem no arquivo são excluídos"
+                        )
+
+                # Botão para processar dados
+                if st.button("🔄 Processar e Integrar Dados"):
+                    barra = st.progress(0.0, text="Importando...")
+                    tabela, total_linhas = importar_arquivo(
+                        uploaded_file, uploaded_file.name, repositorio,
+                        ao_progredir=lambda fracao, linhas: barra.progress(
+                            fracao, text=f"Importando... {linhas:,} linhas"
+                        ),
+                        representada=representada_arquivo or None,
+                        substituir_representada=bool(substituir)
+                    )
+                    barra.progress(1.0, text=f"{total_linhas:,} linhas importadas em '{tabela}'")
+                    st.success("🎉 Dados integrados com sucesso ao sistema!")
 
         except Exception as e:
             st.error(f"❌ Erro ao processar arquivo: {str(e)}")
 
-    # Seção de exportação
-    st.markdown("---")
+def enviar_backup():
+    """Copia o banco (sem travar as escritas) e o coloca na fila de upload do Drive"""
+    caminho_backup = repositorio.copia_seguranca(os.path.join(
+        'dados', 'backup', f"vitrine_{datetime.now():%Y%m%d_%H%M%S}.db"
+    ))
+    futuro = drive.enviar(caminho_backup, '06_Backup_Sistema')
+    futuro.add_done_callback(lambda _: os.remove(caminho_backup))
+    return futuro
+
+@fragmento("sincronizacao_andamento", run_every=1)
+def acompanhar_sincronizacao():
+    """Acompanha o ciclo de sincronização sem rerodar a página inteira"""
+    if not sincronizador.em_andamento():
+        st.rerun()
+    st.info("⏳ Sincronizando tabelas de preços...")
+
+@fragmento("drive")
+def secao_drive():
+    # Tabelas de preços que chegam pela pasta do Drive e backups enviados a ela
+    st.subheader("☁️ Google Drive")
+    if sincronizador is None:
+        st.caption("Sincronização desativada: configure o arquivo de credenciais do Google Drive.")
+        return
+    # O ciclo roda na thread do sincronizador; o rerun só pede e acompanha
+    st.button("🔄 Sincronizar agora", on_click=sincronizador.solicitar, disabled=sincronizador.em_andamento())
+    if sincronizador.em_andamento():
+        acompanhar_sincronizacao()
+    ultima = obter_metricas().get('sincronizacao_drive')
+    if ultima:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("📄 Arquivos importados", ultima.get('importados', 0))
+        with col2:
+            st.metric("⚡ Linhas/s", f"{ultima.get('linhas_por_segundo', 0):,.0f}")
+        with col3:
+            st.metric("⏱️ Atraso", f"{ultima.get('atraso_max_segundos', 0):,.0f} s")
+        com_erro = [r for r in sincronizador.estado['checksums'].values() if 'erro' in r]
+        for registro in com_erro:
+            st.warning(f"⚠️ {registro['nome']}: {registro['erro']}")
+
+    # Backup do banco copiado e enviado em segundo plano (conteúdo repetido não é reenviado)
+    if st.button("💾 Enviar backup do banco ao Drive"):
+        st.session_state['backup_drive'] = drive.em_segundo_plano(enviar_backup)
+        # Reroda a página: o progresso do envio aparece na barra lateral
+        st.rerun()
+    backup = st.session_state.get('backup_drive')
+    if backup is not None and backup.done() and backup.exception() is not None:
+        st.error(f"❌ Falha ao copiar o banco: {backup.exception()}")
+    # Fotos do catálogo: só as novas ou alteradas são baixadas (comparação por md5)
+    if st.button("🖼️ Baixar imagens do catálogo"):
+        st.success(f"✅ {sincronizar_imagens(drive):,} imagens atualizadas")
+    for upload in drive.status_uploads():
+        if upload['estado'] == 'erro':
+            st.error(f"❌ Falha ao enviar {upload['nome']}: {upload['erro']}")
+
+@fragmento("exportacao")
+def secao_exportacao():
+    # Seção de exportação (gerada em segundo plano e reaproveitada por versão)
     st.subheader("📥 Exportar Dados")
+    formato_exportacao = st.selectbox("Formato do arquivo:", list(FORMATOS))
 
     col1, col2, col3 = st.columns(3)
     with col1:
-        if st.button("📦 Exportar Estoque"):
-            csv = produtos.to_csv(index=False)
-            st.download_button("⬇️ Download CSV", csv, "estoque.csv", "text/csv")
+        botao_exportacao('produtos', "📦 Exportar Estoque", "estoque", formato_exportacao)
 
     with col2:
-        if st.button("👥 Exportar Clientes"):
-            csv = clientes.to_csv(index=False)
-            st.download_button("⬇️ Download CSV", csv, "clientes.csv", "text/csv")
+        botao_exportacao('clientes', "👥 Exportar Clientes", "clientes", formato_exportacao)
 
     with col3:
-        if st.button("💰 Exportar Vendas"):
-            csv = vendas.to_csv(index=False)
-            st.download_button("⬇️ Download CSV", csv, "vendas.csv", "text/csv")
+        botao_exportacao('vendas', "💰 Exportar Vendas", "vendas", formato_exportacao)
+
+# Dashboard Principal
+if page == "📊 Dashboard Principal":
+    st.header("📊 Dashboard Executivo")
+    dashboard_kpis()
+    dashboard_graficos()
+
+# Controle de Estoque
+elif page == "📦 Controle de Estoque":
+    st.header("📦 Controle de Estoque")
+    controle_estoque(representadas)
+
+# Gestão de Leads
+elif page == "🎯 Gestão de Leads":
+    st.header("🎯 Gestão de Leads e Clientes")
+    formulario_lead()
+    lista_clientes()
+    grafico_clientes()
+
+# Propostas Comerciais
+elif page == "📋 Propostas Comerciais":
+    st.header("📋 Gerador de Propostas Comerciais")
+    montar_proposta()
+
+# Relatório de Vendas
+elif page == "💰 Relatório de Vendas":
+    st.header("💰 Relatório Detalhado de Vendas")
+    relatorio_vendas(representadas)
+    editor_regras_comissao()
+
+# Upload de Dados
+elif page == "📤 Upload de Dados":
+    st.header("📤 Upload e Sincronização de Dados")
+
+    st.markdown("""
+    ### 📋 Instruções para Upload
+
+    Você pode fazer upload de planilhas Excel (.xlsx, .xlsm) ou CSV com os seguintes formatos:
+
+    **Produtos/Estoque:**
+    - codigo, nome, categoria, preco, estoque, estoque_minimo (opcional: representada)
+
+    **Clientes:**
+    - nome, email, telefone, status, cidade
+
+    **Vendas:**
+    - data, cliente_id, produto_codigo, quantidade, valor_unitario, status (opcional: representada, vendedor)
+    """)
+
+    upload_dados()
+    st.markdown("---")
+    secao_drive()
+    st.markdown("---")
+    secao_exportacao()
+
+# Métricas de carga dos dados
+with st.sidebar.expander("⏱️ Desempenho dos Dados"):
+    metricas = obter_metricas()
+    if metricas:
+        st.dataframe(pd.DataFrame(metricas).T.drop(columns='atualizado_em'),
+                     use_container_width=True)
+    else:
+        st.caption("Nenhuma carga registrada ainda.")
 
 # Footer
 st.markdown("---")
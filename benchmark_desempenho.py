@@ -0,0 +1,467 @@
+# Benchmarks de Desempenho do VitrineSCV
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def medir(funcao, repeticoes=5):
+    """Executa a função várias vezes e retorna o melhor tempo em segundos"""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def gerar_produtos(n, seed=42):
+    """Catálogo sintético com n produtos"""
+    rng = np.random.default_rng(seed)
+    preco = rng.uniform(50, 500, n).round(2)
+    return pd.DataFrame({
+        'codigo': [f'PROD{i:06d}' for i in range(1, n + 1)],
+        'nome': [f'Produto {i}' for i in range(1, n + 1)],
+        'categoria': rng.choice(['Eletrônicos', 'Roupas', 'Casa', 'Esportes'], n),
+        'preco': preco,
+        'custo': (preco * rng.uniform(0.55, 0.8, n)).round(2),
+        'estoque': rng.integers(0, 100, n),
+        'estoque_minimo': rng.integers(5, 20, n),
+    })
+
+
+def gerar_vendas(n, seed=42):
+    """Vendas sintéticas diárias a partir de 2020 (n linhas)"""
+    rng = np.random.default_rng(seed)
+    quantidade = rng.integers(1, 10, n)
+    valor_unitario = rng.uniform(50, 500, n).round(2)
+    return pd.DataFrame({
+        'id': np.arange(1, n + 1),
+        'data': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 5 * 365, n), unit='D'),
+        'cliente_id': rng.integers(1, 1000, n),
+        'produto_codigo': np.char.add('PROD', rng.integers(1, 10_000, n).astype(str)),
+        'quantidade': quantidade,
+        'valor_unitario': valor_unitario,
+        'status': rng.choice(['Finalizada', 'Pendente', 'Cancelada'], n, p=[0.7, 0.2, 0.1]),
+        'valor_total': quantidade * valor_unitario,
+    })
+
+
+def benchmark_colunas_derivadas(n=100_000):
+    """Compara o apply por linha com o cálculo vetorizado de colunas_derivadas"""
+    from colunas_derivadas import COLUNAS_PRODUTOS, calcular_colunas
+
+    produtos = gerar_produtos(n)
+
+    def com_apply():
+        produtos.apply(
+            lambda row: '🔴 Baixo' if row['estoque'] <= row['estoque_minimo'] else '🟢 OK', axis=1
+        )
+
+    def vetorizado():
+        calcular_colunas(produtos, COLUNAS_PRODUTOS)
+
+    t_apply = medir(com_apply, repeticoes=1)
+    t_vetorizado = medir(vetorizado)
+    print(f"📦 Colunas derivadas ({n:,} produtos)")
+    print(f"   apply por linha (só status_estoque): {t_apply * 1000:10.1f} ms")
+    print(f"   vetorizado (todas as colunas):       {t_vetorizado * 1000:10.1f} ms")
+    print(f"   ganho: {t_apply / t_vetorizado:,.0f}x")
+
+
+def benchmark_indice_categorico(n=500_000):
+    """Compara cópia + máscaras encadeadas com a interseção do índice categórico"""
+    from colunas_derivadas import COLUNAS_PRODUTOS, calcular_colunas
+    from indice_categorico import IndiceCategorico
+
+    produtos = calcular_colunas(gerar_produtos(n), COLUNAS_PRODUTOS)
+    inicio = time.perf_counter()
+    indice = IndiceCategorico(produtos, ['categoria', 'estoque_baixo'])
+    t_construcao = time.perf_counter() - inicio
+
+    def com_mascaras():
+        filtrados = produtos.copy()
+        filtrados = filtrados[filtrados['categoria'] == 'Casa']
+        filtrados[filtrados['estoque'] <= filtrados['estoque_minimo']]
+
+    def com_indice():
+        indice.filtrar(categoria='Casa', estoque_baixo=True)
+
+    t_mascaras = medir(com_mascaras)
+    t_indice = medir(com_indice)
+    print(f"🔎 Filtro categórico ({n:,} produtos)")
+    print(f"   construção do índice (1x por versão): {t_construcao * 1000:8.1f} ms")
+    print(f"   cópia + máscaras:                     {t_mascaras * 1000:8.1f} ms")
+    print(f"   interseção do índice:                 {t_indice * 1000:8.1f} ms")
+    print(f"   ganho: {t_mascaras / t_indice:,.0f}x")
+
+
+def benchmark_indice_datas(n=1_000_000):
+    """Compara o filtro por máscara de datas com a fatia do índice ordenado"""
+    from indice_datas import IndiceDatas
+
+    vendas = gerar_vendas(n)
+    indice = IndiceDatas(vendas)
+    inicio, fim = pd.Timestamp('2023-03-01'), pd.Timestamp('2023-03-31')
+
+    def com_mascara():
+        vendas[(vendas['data'] >= inicio) & (vendas['data'] <= fim)]
+        vendas['data'].min(), vendas['data'].max()
+
+    def com_indice():
+        indice.intervalo(inicio, fim)
+        indice.minimo, indice.maximo
+
+    t_mascara = medir(com_mascara)
+    t_indice = medir(com_indice)
+    print(f"📅 Filtro por período de 1 mês ({n:,} vendas)")
+    print(f"   máscara + min/max: {t_mascara * 1000:8.2f} ms")
+    print(f"   índice ordenado:   {t_indice * 1000:8.2f} ms")
+    print(f"   ganho: {t_mascara / t_indice:,.0f}x")
+
+
+def benchmark_carrinho(n=200_000, linhas=300):
+    """Compara a busca por varredura do nome com o carrinho indexado por código"""
+    from carrinho_proposta import CarrinhoProposta, CatalogoProdutos
+
+    produtos = gerar_produtos(n)
+    inicio = time.perf_counter()
+    catalogo = CatalogoProdutos(produtos)
+    t_construcao = time.perf_counter() - inicio
+
+    carrinho = CarrinhoProposta()
+    for codigo in produtos['codigo'].sample(linhas, random_state=42):
+        carrinho.adicionar(codigo, 2, 5.0)
+    nome = produtos['nome'].iloc[n // 2]
+
+    def com_varredura():
+        produto_info = produtos[produtos['nome'] == nome].iloc[0]
+        produto_info['preco'] * 2 * (1 - 5 / 100)
+
+    def com_carrinho():
+        carrinho.adicionar(catalogo.codigo_por_nome(nome), 2, 5.0)
+        carrinho.calcular(catalogo, 3.0)
+
+    t_varredura = medir(com_varredura)
+    t_carrinho = medir(com_carrinho)
+    print(f"🛒 Adicionar item a uma proposta de {linhas} linhas ({n:,} produtos)")
+    print(f"   construção do catálogo (1x por versão):   {t_construcao * 1000:8.1f} ms")
+    print(f"   varredura por nome (1 item, sem totais):  {t_varredura * 1000:8.2f} ms")
+    print(f"   carrinho (busca + todas as linhas):       {t_carrinho * 1000:8.2f} ms")
+
+
+def benchmark_busca(n=500_000, consultas=200):
+    """Latência (p50/p95) da busca aproximada simulando digitação, prefixo a prefixo"""
+    from busca_produtos import BuscaProdutos, IndiceTrigramas
+
+    produtos = gerar_produtos(n)
+    rng = np.random.default_rng(7)
+    inicio = time.perf_counter()
+    busca = BuscaProdutos()
+    busca._instalar(IndiceTrigramas(produtos))
+    t_construcao = time.perf_counter() - inicio
+
+    # Consultas reais: nomes, códigos e categorias sem acento, com e sem erro de digitação
+    alvos = produtos.iloc[rng.integers(0, n, consultas)]
+    textos = []
+    for i, (codigo, nome, categoria) in enumerate(zip(alvos['codigo'], alvos['nome'], alvos['categoria'])):
+        texto = [nome, codigo, f"{categoria} {nome.split()[-1]}"][i % 3]
+        if i % 4 == 0:
+            posicao = rng.integers(1, len(texto) - 1)
+            texto = texto[:posicao] + texto[posicao + 1:]
+        textos.append(texto.lower())
+
+    latencias = []
+    for texto in textos:
+        for fim in range(2, len(texto) + 1):
+            t = time.perf_counter()
+            busca.buscar(texto[:fim])
+            latencias.append(time.perf_counter() - t)
+    latencias = np.array(latencias) * 1000
+
+    novos = gerar_produtos(1_000, seed=1).assign(codigo=lambda df: 'N' + df['codigo'])
+    inicio = time.perf_counter()
+    busca.aplicar(None, pd.DataFrame(columns=busca.colunas), novos[busca.colunas])
+    t_incremental = time.perf_counter() - inicio
+
+    print(f"🔍 Busca aproximada ({n:,} produtos, {len(latencias):,} buscas digitando)")
+    print(f"   construção do índice (1x por catálogo): {t_construcao * 1000:8.0f} ms")
+    print(f"   atualização incremental (1.000 itens):  {t_incremental * 1000:8.1f} ms")
+    print(f"   p50: {np.percentile(latencias, 50):6.2f} ms   p95: {np.percentile(latencias, 95):6.2f} ms"
+          f"   máx: {latencias.max():6.2f} ms")
+
+
+def benchmark_propostas(n=200, itens=30):
+    """Documentos por segundo: render serial x pool de processos x cache por conteúdo"""
+    import os
+    import tempfile
+
+    from propostas_pdf import GeradorPropostas, disponivel, proposta_de_formulario, renderizar_pdf
+
+    if not disponivel():
+        print("📄 Propostas em PDF: fpdf2 não instalado, benchmark ignorado")
+        return
+
+    produtos = gerar_produtos(1_000)
+    rng = np.random.default_rng(42)
+    propostas = []
+    for i in range(n):
+        linhas = produtos.iloc[rng.choice(len(produtos), itens, replace=False)]
+        propostas.append(proposta_de_formulario(
+            f'Cliente {i}', '2025-01-01', 30, float(rng.integers(0, 15)),
+            [{'codigo': c, 'nome': nome, 'quantidade': int(q), 'valor_unitario': p}
+             for c, nome, q, p in zip(linhas['codigo'], linhas['nome'], rng.integers(1, 50, itens), linhas['preco'])]
+        ))
+
+    t_serial = medir(lambda: [renderizar_pdf(p) for p in propostas], repeticoes=1)
+    with tempfile.TemporaryDirectory() as diretorio:
+        gerador = GeradorPropostas(diretorio)
+        try:
+            # Aquece os processos (spawn + import do fpdf2) fora da medição
+            gerador.solicitar(propostas[0]).result()
+            os.remove(gerador.caminho(propostas[0]))
+            t_pool = medir(lambda: [f.result() for f in gerador.gerar_lote(propostas)], repeticoes=1)
+            t_cache = medir(lambda: [f.result() for f in gerador.gerar_lote(propostas)])
+        finally:
+            gerador.encerrar()
+
+    print(f"📄 Propostas em PDF ({n} documentos de {itens} itens, {os.cpu_count()} núcleos)")
+    print(f"   serial:            {n / t_serial:10,.0f} docs/s")
+    print(f"   pool de processos: {n / t_pool:10,.0f} docs/s")
+    print(f"   cache por hash:    {n / t_cache:10,.0f} docs/s")
+
+
+def benchmark_imagens(n=48):
+    """Fotos por segundo no pool de processos e bytes enviados por tamanho de miniatura"""
+    import os
+    import tempfile
+
+    from imagens_catalogo import (TAMANHOS_MINIATURA, CacheMiniaturas, PipelineImagens,
+                                  _gerar_miniaturas, disponivel)
+
+    if not disponivel():
+        print("🖼️ Miniaturas do catálogo: pillow não instalado, benchmark ignorado")
+        return
+
+    from PIL import Image
+
+    rng = np.random.default_rng(42)
+    with tempfile.TemporaryDirectory() as originais, tempfile.TemporaryDirectory() as miniaturas:
+        # Fotos de 12 MP com gradiente + ruído (comprimem como fotos reais, não como cor sólida)
+        base = np.linspace(0, 255, 4000, dtype=np.float32)[None, :, None] * np.ones((3000, 1, 3), np.float32)
+        for i in range(n):
+            ruido = rng.normal(0, 12, (3000 // 8, 4000 // 8, 3)).repeat(8, 0).repeat(8, 1)
+            pixels = np.clip(base + ruido + i, 0, 255).astype(np.uint8)
+            Image.fromarray(pixels).save(os.path.join(originais, f"PROD{i:06d}.jpg"), quality=90)
+        tamanho_original = np.mean([os.path.getsize(os.path.join(originais, a)) for a in os.listdir(originais)])
+
+        destinos = [(t, os.path.join(miniaturas, f"serial_{t}.webp")) for t in TAMANHOS_MINIATURA]
+        t_serial = medir(lambda: _gerar_miniaturas(os.path.join(originais, "PROD000000.jpg"), destinos))
+        bytes_por_tamanho = {t: os.path.getsize(c) for t, c in destinos}
+
+        pipeline = PipelineImagens(originais, CacheMiniaturas(miniaturas))
+        try:
+            # Aquece os processos (spawn + import do pillow) fora da medição
+            list(pipeline._executor.map(abs, range(os.cpu_count() or 1)))
+            inicio = time.perf_counter()
+            pipeline.preparar([f"PROD{i:06d}" for i in range(n)], TAMANHOS_MINIATURA[0])
+            while pipeline.pendentes():
+                time.sleep(0.01)
+            t_pool = time.perf_counter() - inicio
+        finally:
+            pipeline.encerrar()
+
+    print(f"🖼️ Miniaturas do catálogo ({n} fotos de 12 MP, {os.cpu_count()} núcleos)")
+    print(f"   serial (todos os tamanhos): {1 / t_serial:8.1f} fotos/s")
+    print(f"   pool de processos:          {n / t_pool:8.1f} fotos/s")
+    print(f"   original: {tamanho_original / 1024:8.0f} KB")
+    for tamanho, total in bytes_por_tamanho.items():
+        print(f"   {tamanho:4d} px:  {total / 1024:8.1f} KB")
+
+
+def benchmark_datasets(n=200_000, sessoes=40):
+    """Memória e tempo por leitura: cópia desserializada (st.cache_data) x visão Arrow"""
+    import pickle
+    import tracemalloc
+
+    from datasets_compartilhados import RegistroDatasets
+
+    vendas = gerar_vendas(n)
+    serializado = pickle.dumps(vendas)
+    registro = RegistroDatasets()
+    registro.obter('vendas', (), lambda: vendas)
+
+    def medir_sessoes(ler):
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        lidos = [ler() for _ in range(sessoes)]
+        duracao = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del lidos
+        return duracao / sessoes, pico / (1024 ** 2)
+
+    t_copia, mb_copia = medir_sessoes(lambda: pickle.loads(serializado))
+    t_visao, mb_visao = medir_sessoes(lambda: registro.obter('vendas', (), lambda: vendas))
+    print(f"💾 Dataset compartilhado ({n:,} vendas, {sessoes} sessões)")
+    print(f"   dataset em Arrow (1x por processo): {registro.memoria_total_bytes() / 1024 ** 2:8.1f} MB")
+    print(f"   cópia por sessão:  {t_copia * 1000:8.2f} ms/leitura  {mb_copia:8.1f} MB no total")
+    print(f"   visão sem cópia:   {t_visao * 1000:8.2f} ms/leitura  {mb_visao:8.1f} MB no total")
+
+
+def benchmark_particoes(n=300_000, representadas=20):
+    """Consulta de uma representada: tabela inteira + máscara x leitura só da partição dela"""
+    import os
+    import tempfile
+
+    from repositorio_dados import RepositorioDados
+
+    nomes = [f'Representada {i:02d}' for i in range(representadas)]
+    vendas = gerar_vendas(n).assign(
+        representada=np.random.default_rng(3).choice(nomes, n)
+    )
+    with tempfile.TemporaryDirectory() as diretorio:
+        repositorio = RepositorioDados(os.path.join(diretorio, 'vitrine.db'))
+        inicio = time.perf_counter()
+        repositorio.inserir('vendas', vendas)
+        t_carga = time.perf_counter() - inicio
+        alvo = [nomes[0]]
+
+        def com_mascara():
+            todas = repositorio.carregar('vendas', ['data', 'representada', 'valor_total'])
+            todas[todas['representada'] == alvo[0]]
+
+        def com_particao():
+            repositorio.carregar('vendas', ['data', 'representada', 'valor_total'], representadas=alvo)
+
+        t_mascara = medir(com_mascara)
+        t_fria = medir(com_particao, repeticoes=1)
+        t_particao = medir(com_particao)
+
+        # Nova remessa de uma representada: só as partições dela são regravadas
+        novas = vendas[vendas['representada'] == alvo[0]].head(1_000).assign(id=lambda df: df['id'] + n)
+        inicio = time.perf_counter()
+        repositorio.inserir('vendas', novas)
+        t_remessa = time.perf_counter() - inicio
+
+    print(f"🏢 Partições por representada ({n:,} vendas, {representadas} representadas)")
+    print(f"   carga inicial (grava todas as partições):   {t_carga * 1000:8.0f} ms")
+    print(f"   tabela inteira + máscara (em memória):      {t_mascara * 1000:8.2f} ms")
+    print(f"   partição da representada (1ª leitura):      {t_fria * 1000:8.2f} ms")
+    print(f"   partição da representada (em cache):        {t_particao * 1000:8.2f} ms")
+    print(f"   remessa de 1.000 vendas de uma representada: {t_remessa * 1000:7.0f} ms"
+          " (inclui rollups e partições mensais)")
+
+
+def benchmark_comissoes(n=300_000, vendedores=50, representadas=20):
+    """Comissões de um mês inteiro: laço por venda x motor vetorizado x recálculo incremental"""
+    import os
+    import tempfile
+
+    from comissoes import MotorComissoes, comissoes_detalhadas, definir_regras
+    from metricas_desempenho import obter_metricas
+    from repositorio_dados import RepositorioDados
+
+    rng = np.random.default_rng(5)
+    nomes = [f'Representada {i:02d}' for i in range(representadas)]
+    produtos = gerar_produtos(10_000).assign(codigo=lambda df: 'PROD' + (df.index + 1).astype(str))
+    vendas = gerar_vendas(n).assign(
+        data=pd.Timestamp('2025-03-01') + pd.to_timedelta(rng.integers(0, 31, n), unit='D'),
+        representada=rng.choice(nomes, n),
+        vendedor=rng.choice([f'Vendedor {i:02d}' for i in range(vendedores)], n),
+    )
+    regras = pd.DataFrame({
+        'representada': ['*'] + nomes[:10] + ['*', '*'] + nomes[:5],
+        'categoria': ['*'] + ['*'] * 10 + ['Eletrônicos', 'Casa'] + ['Roupas'] * 5,
+        'percentual': [5.0] + list(rng.uniform(3, 9, 10).round(1)) + [2.5, 4.0] + [10.0] * 5,
+    })
+    faixas = pd.DataFrame({
+        'representada': ['*', '*', '*', nomes[0], nomes[0]],
+        'volume_minimo': [0, 500_000, 1_000_000, 0, 300_000],
+        'multiplicador': [1.0, 1.1, 1.25, 1.0, 1.5],
+    })
+
+    diretorio = tempfile.TemporaryDirectory()
+    repositorio = RepositorioDados(os.path.join(diretorio.name, 'vitrine.db'))
+    repositorio.inserir('produtos', produtos)
+    repositorio.inserir('vendas', vendas)
+    definir_regras(repositorio, faixas=faixas)
+    motor = MotorComissoes(regras, faixas)
+    mes = repositorio.consultar_sql(
+        "SELECT substr(v.data, 1, 7) AS mes, v.vendedor, v.representada, p.categoria, v.valor_total "
+        "FROM vendas v LEFT JOIN produtos p ON p.codigo = v.produto_codigo WHERE v.status = 'Finalizada'"
+    )
+
+    def por_venda():
+        # Percorre as regras e faixas para cada venda, como uma planilha faria
+        taxas = {(r, c): p for r, c, p in regras.itertuples(index=False)}
+        base, volume = {}, {}
+        for m, vendedor, representada, categoria, valor in mes.itertuples(index=False):
+            taxa = taxas.get((representada, categoria), taxas.get((representada, '*'),
+                             taxas.get(('*', categoria), taxas.get(('*', '*'), 0.0))))
+            chave = (m, vendedor, representada)
+            base[chave] = base.get(chave, 0.0) + valor * taxa / 100
+            volume[chave] = volume.get(chave, 0.0) + valor
+        for chave, valor in volume.items():
+            proprias = faixas[faixas['representada'] == chave[2]]
+            tabela = proprias if not proprias.empty else faixas[faixas['representada'] == '*']
+            atingidas = tabela[tabela['volume_minimo'] <= valor]
+            base[chave] *= atingidas['multiplicador'].iloc[-1] if not atingidas.empty else 1.0
+
+    t_laco = medir(por_venda, repeticoes=1)
+    t_motor = medir(lambda: motor.calcular(mes))
+
+    # Troca das regras: o mês inteiro é relido da partição e recalculado
+    definir_regras(repositorio, regras=regras)
+    t_completo = obter_metricas()['comissoes_reconstrucao']['segundos']
+
+    # Remessa de um vendedor: só os pares (vendedor, mês) dela são recalculados
+    remessa = vendas[vendas['vendedor'] == 'Vendedor 00'].head(1_000).assign(id=lambda df: df['id'] + n)
+    inicio = time.perf_counter()
+    repositorio.inserir('vendas', remessa)
+    t_remessa = time.perf_counter() - inicio
+    t_incremental = obter_metricas()['comissoes_recalculo']['segundos']
+    grupos = len(comissoes_detalhadas(repositorio))
+    diretorio.cleanup()
+
+    print(f"💸 Comissões ({len(mes):,} vendas finalizadas em um mês, {grupos} vendedor x representada)")
+    print(f"   laço por venda (Python):                    {t_laco * 1000:8.0f} ms")
+    print(f"   motor vetorizado (colunas de texto):        {t_motor * 1000:8.1f} ms")
+    print(f"   recálculo do mês (partição + motor + gravação): {t_completo * 1000:5.0f} ms")
+    print(f"   remessa de 1.000 vendas de um vendedor:     {t_incremental * 1000:8.0f} ms"
+          f" (escrita completa, com rollups e partições: {t_remessa * 1000:.0f} ms)")
+
+
+BENCHMARKS = {
+    "colunas": benchmark_colunas_derivadas,
+    "indice": benchmark_indice_categorico,
+    "datas": benchmark_indice_datas,
+    "carrinho": benchmark_carrinho,
+    "busca": benchmark_busca,
+    "propostas": benchmark_propostas,
+    "imagens": benchmark_imagens,
+    "datasets": benchmark_datasets,
+    "particoes": benchmark_particoes,
+    "comissoes": benchmark_comissoes,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de desempenho do VitrineSCV")
+    parser.add_argument("nomes", nargs="*",
+                        help=f"Benchmarks a executar: {', '.join(BENCHMARKS)} (padrão: todos)")
+    args = parser.parse_args()
+    desconhecidos = set(args.nomes) - set(BENCHMARKS)
+    if desconhecidos:
+        parser.error(f"benchmark desconhecido: {', '.join(sorted(desconhecidos))}")
+
+    print("=" * 50)
+    print("⏱️ BENCHMARKS - SISTEMA DE VENDAS")
+    print("=" * 50)
+    for nome in args.nomes or BENCHMARKS:
+        BENCHMARKS[nome]()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+# Benchmark de Latência das Páginas do VitrineSCV
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+TAMANHOS_PADRAO = [1_000, 10_000, 100_000, 1_000_000]
+
+# Limite (segundos) de cada execução do script no AppTest
+TEMPO_LIMITE = 600
+
+# Diferença absoluta abaixo da qual a comparação considera ruído
+RUIDO = {"primeira_s": 0.02, "execucao_s": 0.02, "pico_rss_mb": 5}
+
+# app -> (páginas, seletor de página); o vitrinescv roda no layout de desktop
+APPS = {
+    "app_controle_vendas.py": ([
+        "📊 Dashboard Principal",
+        "📦 Controle de Estoque",
+        "🎯 Gestão de Leads",
+        "📋 Propostas Comerciais",
+        "💰 Relatório de Vendas",
+        "📤 Upload de Dados",
+    ], lambda at: at.sidebar.selectbox[0]),
+    "app.py": ([
+        "📊 Dashboard", "👥 Clientes", "📦 Produtos", "🛒 Pedidos", "📈 Relatórios", "⚙️ Configurações",
+    ], lambda at: at.sidebar.selectbox[0]),
+    "vitrinescv_responsive.py": ([
+        "Dashboard", "Clientes", "Produtos", "Pedidos", "Relatórios", "Configurações",
+    ], lambda at: at.selectbox(key="desktop_menu")),
+}
+
+
+def _pico_rss_mb():
+    """Maior RSS do processo até agora, em MB
+
+    No Linux vem do VmHWM: o ru_maxrss herda o pico do processo pai (que
+    montou o banco). Nos demais sistemas, do ru_maxrss (KB; bytes no macOS).
+    """
+    try:
+        with open("/proc/self/status") as status:
+            for linha in status:
+                if linha.startswith("VmHWM:"):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 ** 2 if sys.platform == "darwin" else 1024)
+
+
+def preparar_banco(vendas, diretorio, seed=42):
+    """Banco (com partições, rollups e comissões) populado com `vendas` vendas sintéticas"""
+    from dados_exemplo import gerar_dados_exemplo
+    from repositorio_dados import RepositorioDados
+
+    caminho = os.path.join(diretorio, f"vendas_{vendas}", "vitrine.db")
+    repositorio = RepositorioDados(caminho)
+    inicio = time.perf_counter()
+    if repositorio.vazio():
+        produtos, clientes, vendas_df = gerar_dados_exemplo(vendas, seed=seed)
+        repositorio.inserir('produtos', produtos)
+        repositorio.inserir('clientes', clientes)
+        repositorio.inserir('vendas', vendas_df)
+    return caminho, time.perf_counter() - inicio
+
+
+def medir_pagina(app, pagina, repeticoes):
+    """Latência e memória de uma página, num processo que acabou de subir
+
+    A primeira execução da página pega os caches frios (índices, partições,
+    gráficos); as `repeticoes` seguintes são reruns da mesma página, como
+    os de um usuário interagindo com ela.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    paginas, seletor = APPS[app]
+    pico_inicial = _pico_rss_mb()
+    at = AppTest.from_file(os.path.join(DIRETORIO, app), default_timeout=TEMPO_LIMITE)
+    # Desktop no vitrinescv (sem navegador, a detecção usa o último valor conhecido)
+    at.session_state["vitrine_dispositivo"] = {"bruto": None, "device_info": {
+        "width": 1440, "height": 900, "user_agent": "", "is_touch": False,
+        "orientation": 0, "pixel_ratio": 1, "device_type": "desktop",
+    }}
+
+    inicio = time.perf_counter()
+    at.run()
+    abertura = time.perf_counter() - inicio
+    primeira = abertura
+    if pagina != paginas[0]:
+        inicio = time.perf_counter()
+        seletor(at).select(pagina).run()
+        primeira = time.perf_counter() - inicio
+
+    execucoes = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        at.run()
+        execucoes.append(time.perf_counter() - inicio)
+
+    return {
+        "app": app,
+        "pagina": pagina,
+        "abertura_s": abertura,
+        "primeira_s": primeira,
+        "execucao_s": statistics.median(execucoes) if execucoes else primeira,
+        "execucao_min_s": min(execucoes, default=primeira),
+        "execucao_max_s": max(execucoes, default=primeira),
+        "pico_rss_mb": _pico_rss_mb(),
+        "acrescimo_mb": _pico_rss_mb() - pico_inicial,
+        "excecoes": [str(e.value) for e in at.exception],
+    }
+
+
+def _medir_em_subprocesso(app, pagina, banco, repeticoes):
+    # Um processo por página: caches frios e pico de memória só dela
+    comando = [sys.executable, os.path.abspath(__file__), "--pagina", app, pagina,
+               "--repeticoes", str(repeticoes)]
+    resultado = subprocess.run(
+        comando, cwd=DIRETORIO, env={**os.environ, "VITRINE_DB": banco},
+        capture_output=True, text=True
+    )
+    if resultado.returncode != 0:
+        erro = (resultado.stderr.strip().splitlines() or ["sem saída"])[-1]
+        return {"app": app, "pagina": pagina, "excecoes": [erro]}
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+
+def executar(tamanhos, apps, repeticoes, diretorio):
+    resultados = []
+    for vendas in tamanhos:
+        banco, carga = preparar_banco(vendas, diretorio)
+        print(f"🗄️ {vendas:,} vendas: banco pronto em {carga:.1f} s")
+        for app in apps:
+            for pagina in APPS[app][0]:
+                medicao = _medir_em_subprocesso(app, pagina, banco, repeticoes)
+                medicao.update(vendas=vendas, carga_banco_s=carga)
+                resultados.append(medicao)
+                if "execucao_s" in medicao:
+                    print(f"   {app:26s} {pagina:26s} primeira {medicao['primeira_s'] * 1000:8.0f} ms"
+                          f"  rerun {medicao['execucao_s'] * 1000:8.0f} ms"
+                          f"  pico {medicao['pico_rss_mb']:7.0f} MB"
+                          + ("  ⚠️ exceção" if medicao["excecoes"] else ""))
+                else:
+                    print(f"   {app:26s} {pagina:26s} ❌ {medicao['excecoes'][0]}")
+    return resultados
+
+
+def comparar(resultados, anterior, tolerancia):
+    """Medições que pioraram mais que `tolerancia` (fração) em relação à execução anterior"""
+    base = {(r["app"], r["pagina"], r["vendas"]): r for r in anterior["resultados"]}
+    regressoes = []
+    for atual in resultados:
+        referencia = base.get((atual["app"], atual["pagina"], atual["vendas"]))
+        if referencia is None:
+            continue
+        if atual["excecoes"] and not referencia["excecoes"]:
+            regressoes.append((atual, "excecoes", 0, len(atual["excecoes"])))
+        for campo, ruido in RUIDO.items():
+            if campo not in atual or campo not in referencia:
+                continue
+            antes, depois = referencia[campo], atual[campo]
+            if depois > antes * (1 + tolerancia) and depois - antes > ruido:
+                regressoes.append((atual, campo, antes, depois))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Latência e memória de cada página dos apps (Streamlit AppTest, sem navegador)"
+    )
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS_PADRAO,
+                        help="Quantidades de vendas do banco sintético (padrão: 1k a 1M)")
+    parser.add_argument("--apps", nargs="+", choices=list(APPS), default=list(APPS))
+    parser.add_argument("--repeticoes", type=int, default=3, help="Reruns medidos por página")
+    parser.add_argument("--diretorio", help="Onde criar os bancos (padrão: temporário; "
+                                            "um diretório fixo reaproveita os bancos entre execuções)")
+    parser.add_argument("--saida", default="benchmark_paginas.json", help="Arquivo JSON de resultados")
+    parser.add_argument("--comparar", metavar="JSON", help="Resultados anteriores para detectar regressões")
+    parser.add_argument("--tolerancia", type=float, default=0.25,
+                        help="Piora aceita em relação ao --comparar (0.25 = 25%%)")
+    parser.add_argument("--pagina", nargs=2, metavar=("APP", "PAGINA"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.pagina:
+        # Processo filho: mede uma página no banco de VITRINE_DB e imprime o JSON
+        print(json.dumps(medir_pagina(*args.pagina, args.repeticoes), ensure_ascii=False))
+        return
+
+    print("=" * 50)
+    print("⏱️ BENCHMARK DAS PÁGINAS - SISTEMA DE VENDAS")
+    print("=" * 50)
+    with tempfile.TemporaryDirectory() as temporario:
+        resultados = executar(args.tamanhos, args.apps, args.repeticoes, args.diretorio or temporario)
+
+    import streamlit
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "streamlit": streamlit.__version__,
+        "plataforma": platform.platform(),
+        "processadores": os.cpu_count(),
+        "repeticoes": args.repeticoes,
+        "resultados": resultados,
+    }
+    with open(args.saida, "w", encoding="utf-8") as arquivo:
+        json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+    print(f"💾 Resultados em {args.saida}")
+
+    falhas = [r for r in resultados if r["excecoes"]]
+    regressoes = []
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            regressoes = comparar(resultados, json.load(arquivo), args.tolerancia)
+        for atual, campo, antes, depois in regressoes:
+            print(f"📉 {atual['app']} | {atual['pagina']} | {atual['vendas']:,} vendas: "
+                  f"{campo} {antes:.3f} → {depois:.3f}")
+        if not regressoes:
+            print("✅ Nenhuma regressão acima da tolerância")
+    sys.exit(1 if falhas or regressoes else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+# busca_produtos.py
+
+import threading
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Fração mínima dos trigramas da consulta presentes no produto (tolera erros de digitação)
+LIMIAR_SEMELHANCA = 0.4
+
+# Candidatos reordenados pelos critérios de desempate antes do corte final
+CANDIDATOS_POR_RESULTADO = 5
+
+# Produtos pré-selecionados pelos trigramas raros antes da contagem completa
+MAX_PRESELECAO = 5000
+
+# Trigramas presentes em mais desta fração dos produtos não entram na pré-seleção
+FRACAO_TRIGRAMA_COMUM = 0.1
+
+# Tamanho mínimo da consulta normalizada (" ab" já forma um trigrama de início de palavra)
+MIN_CARACTERES = 2
+
+# O delta vira parte do índice principal quando passa desta fração do catálogo
+FRACAO_MAXIMA_DELTA = 0.05
+
+_SEPARADOR = 10  # "\n" entre produtos no texto concatenado
+_ESPACO = 32
+
+
+def normalizar(texto):
+    """Minúsculas, sem acentos e só ASCII ("Ação" -> "acao")"""
+    texto = unicodedata.normalize('NFKD', str(texto).lower())
+    return texto.encode('ascii', 'ignore').decode('ascii')
+
+
+def _normalizar_serie(serie):
+    return (serie.astype(str).str.lower().str.normalize('NFKD')
+            .str.encode('ascii', 'ignore').str.decode('ascii'))
+
+
+def _texto_consulta(consulta):
+    """Palavras da consulta, cada uma precedida de espaço (marca de início de palavra)"""
+    return ''.join(' ' + palavra for palavra in normalizar(consulta).split())
+
+
+def _codigos_trigramas(buffer):
+    """Código inteiro (7 bits por caractere) de cada trigrama do buffer de bytes"""
+    c = buffer.astype(np.int32)
+    return (c[:-2] << 14) | (c[1:-1] << 7) | c[2:]
+
+
+class IndiceTrigramas:
+    """Índice invertido trigrama -> produtos, em arrays NumPy (formato CSR)
+
+    Cada produto vira o texto " codigo nome categoria" normalizado; os
+    trigramas de todos os produtos são extraídos de uma vez sobre um único
+    buffer de bytes, e as listas de produtos por trigrama ficam contíguas em
+    `_docs`, delimitadas por `_inicios`.
+    """
+
+    def __init__(self, produtos):
+        self.produtos = produtos[['codigo', 'nome', 'categoria']].reset_index(drop=True)
+        self.codigos = pd.Index(self.produtos['codigo'].astype(str))
+        self._codigos_norm = pd.Index(self.codigos.str.lower())
+        # Monta já a tabela hash do índice (senão a primeira busca pagaria o custo)
+        self._codigo_unico = self._codigos_norm.is_unique
+        n = len(self.produtos)
+
+        # Normaliza o texto de todos os produtos de uma vez (uma string só)
+        textos = (' ' + self.produtos['codigo'].astype(str) + ' ' + self.produtos['nome'].astype(str)
+                  + ' ' + self.produtos['categoria'].fillna('').astype(str))
+        buffer = np.frombuffer(normalizar('\n'.join(textos) + '\n').encode('ascii'), dtype=np.uint8).copy()
+        # Caracteres de controle viram espaço para não colidirem com o separador
+        buffer[(buffer < 32) & (buffer != _SEPARADOR)] = _ESPACO
+        if len(buffer) < 3:
+            buffer = np.full(3, _SEPARADOR, dtype=np.uint8)
+
+        # Produto de cada posição = separadores antes dela
+        doc = np.cumsum(buffer == _SEPARADOR)[:-2]
+        validos = ((buffer[:-2] != _SEPARADOR) & (buffer[1:-1] != _SEPARADOR) & (buffer[2:] != _SEPARADOR)
+                   & ~((buffer[:-2] == _ESPACO) & (buffer[1:-1] == _ESPACO)))
+        # Pares (trigrama, produto) únicos e ordenados, codificados em uma chave inteira
+        base = max(n, 1)
+        chaves = _codigos_trigramas(buffer)[validos].astype(np.int64) * base + doc[validos]
+        chaves.sort()
+        chaves = chaves[np.concatenate(([True], chaves[1:] != chaves[:-1]))]
+        trigramas = chaves // base
+        inicios = np.flatnonzero(np.concatenate(([True], trigramas[1:] != trigramas[:-1])))
+        self._docs = (chaves % base).astype(np.int32)
+        self._trigramas = trigramas[inicios]
+        self._inicios = np.append(inicios, len(chaves))
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def candidatos(self, texto_consulta, k, ativos=None):
+        """Até k produtos com mais trigramas da consulta, com a contagem de cada um
+
+        Trigramas muito frequentes (ex.: "pro" de "Produto") pouco distinguem
+        os produtos: a pré-seleção usa só os raros, e os frequentes são
+        conferidos depois apenas nos candidatos, por busca binária.
+        """
+        buffer = np.frombuffer(texto_consulta.encode('ascii'), dtype=np.uint8)
+        consulta = np.unique(_codigos_trigramas(buffer)) if len(buffer) >= 3 else np.empty(0, dtype=np.int32)
+        posicoes = np.minimum(np.searchsorted(self._trigramas, consulta), len(self._trigramas) - 1)
+        posicoes = posicoes[self._trigramas[posicoes] == consulta]
+        listas = [self._docs[self._inicios[p]:self._inicios[p + 1]] for p in posicoes]
+        vazio = np.empty(0, dtype=np.intp)
+        if not listas:
+            return vazio, vazio, len(consulta)
+
+        raras = [lista for lista in listas if len(lista) <= FRACAO_TRIGRAMA_COMUM * len(self)]
+        comuns = [lista for lista in listas if len(lista) > FRACAO_TRIGRAMA_COMUM * len(self)]
+        if not raras:
+            # Só trigramas comuns: pré-seleciona pela lista mais curta
+            listas.sort(key=len)
+            raras, comuns = listas[:1], listas[1:]
+        contagens = np.bincount(np.concatenate(raras), minlength=len(self))
+        if ativos is not None:
+            contagens[~ativos] = 0
+        selecionados = self._maiores(contagens, MAX_PRESELECAO)
+        selecionados = selecionados[contagens[selecionados] > 0]
+        pontos = contagens[selecionados]
+        for lista in comuns:
+            # Listas de produtos são ordenadas: pertinência por busca binária
+            indices = np.minimum(np.searchsorted(lista, selecionados), len(lista) - 1)
+            pontos = pontos + (lista[indices] == selecionados)
+        melhores = self._maiores(pontos, k)
+        return selecionados[melhores], pontos[melhores], len(consulta)
+
+    @staticmethod
+    def _maiores(valores, k):
+        """Posições dos k maiores valores (sem ordenar o array inteiro)"""
+        if k >= len(valores):
+            return np.arange(len(valores))
+        return np.argpartition(-valores, k - 1)[:k]
+
+    def posicao_codigo(self, termo):
+        """Posição do produto cujo código normalizado é exatamente o termo (ou -1)"""
+        return self._codigos_norm.get_indexer([termo])[0] if self._codigo_unico else -1
+
+
+class BuscaProdutos:
+    """Busca aproximada de produtos por código, nome e categoria
+
+    Observador de `produtos` no RepositorioDados: o índice principal é
+    construído uma vez por catálogo e cada escrita posterior só marca as
+    versões antigas como removidas e reconstrói um pequeno índice delta
+    com as linhas novas. Quando o delta cresce demais, os dois são fundidos.
+    """
+
+    tabela = 'produtos'
+    colunas = ['codigo', 'nome', 'categoria']
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._escritas = 0
+        self._principal = None
+        self._ativos = None
+        self._delta = pd.DataFrame(columns=self.colunas)
+        self._indice_delta = None
+
+    def criar(self, conn):
+        """O índice principal é montado sob demanda, na primeira busca"""
+
+    def aplicar(self, conn, antes, depois):
+        """Remove do índice as versões antigas e indexa as novas no delta"""
+        with self._lock:
+            self._escritas += 1
+            if self._principal is None:
+                return
+            codigos = pd.concat([antes.get('codigo', pd.Series(dtype=object)),
+                                 depois.get('codigo', pd.Series(dtype=object))]).astype(str).unique()
+            posicoes = self._principal.codigos.get_indexer(codigos)
+            ativos = self._ativos.copy()
+            ativos[posicoes[posicoes >= 0]] = False
+            delta = self._delta[~self._delta['codigo'].astype(str).isin(codigos)]
+            if not depois.empty:
+                delta = pd.concat([delta, depois[self.colunas]], ignore_index=True)
+
+            if len(delta) > FRACAO_MAXIMA_DELTA * max(len(self._principal), 1):
+                vivos = self._principal.produtos[ativos]
+                self._instalar(IndiceTrigramas(pd.concat([vivos, delta], ignore_index=True)))
+            else:
+                self._ativos, self._delta = ativos, delta
+                self._indice_delta = IndiceTrigramas(delta) if not delta.empty else None
+
+    def _instalar(self, principal):
+        self._principal = principal
+        self._ativos = np.ones(len(principal), dtype=bool)
+        self._delta = pd.DataFrame(columns=self.colunas)
+        self._indice_delta = None
+
+    @property
+    def construido(self):
+        return self._principal is not None
+
+    def construir(self, repositorio):
+        """Monta o índice principal a partir do catálogo atual do repositório"""
+        while True:
+            escritas = self._escritas
+            principal = IndiceTrigramas(repositorio.carregar('produtos', self.colunas))
+            with self._lock:
+                # Escritas durante a construção não entraram no índice: refaz
+                if self._escritas == escritas:
+                    self._instalar(principal)
+                    return
+
+    @staticmethod
+    def _bonus(candidatos, termo):
+        """Desempate: código ou nome exato, depois prefixo, depois o texto mais curto"""
+        bonus = []
+        for codigo, nome in zip(candidatos['codigo'], candidatos['nome']):
+            codigo, nome = normalizar(codigo), normalizar(nome)
+            if termo in (codigo, nome):
+                pontos = 1.0
+            elif codigo.startswith(termo) or nome.startswith(termo):
+                pontos = 0.5
+            else:
+                pontos = 0.0
+            bonus.append(pontos - 0.001 * min(abs(len(nome) - len(termo)), 100) / 100)
+        return np.array(bonus)
+
+    def buscar(self, consulta, limite=20):
+        """Produtos mais parecidos com a consulta, do mais ao menos relevante"""
+        texto = _texto_consulta(consulta)
+        if len(texto.replace(' ', '')) < MIN_CARACTERES or self._principal is None:
+            return pd.DataFrame(columns=self.colunas + ['pontuacao'])
+        with self._lock:
+            partes = [(self._principal, self._ativos), (self._indice_delta, None)]
+
+        termo = texto.strip()
+        resultados = []
+        for indice, ativos in partes:
+            if indice is None:
+                continue
+            candidatos, pontos, total = indice.candidatos(
+                texto, limite * CANDIDATOS_POR_RESULTADO, ativos
+            )
+            # O código digitado por inteiro sempre entra entre os candidatos
+            exato = indice.posicao_codigo(termo)
+            if exato >= 0 and (ativos is None or ativos[exato]) and exato not in candidatos:
+                candidatos, pontos = np.append(candidatos, exato), np.append(pontos, total)
+            minimo = max(1, int(np.ceil(LIMIAR_SEMELHANCA * total)))
+            candidatos, pontos = candidatos[pontos >= minimo], pontos[pontos >= minimo]
+            if not len(candidatos):
+                continue
+            encontrados = indice.produtos.iloc[candidatos]
+            encontrados = encontrados.assign(
+                pontuacao=pontos / total + self._bonus(encontrados, termo)
+            )
+            resultados.append(encontrados)
+
+        if not resultados:
+            return pd.DataFrame(columns=self.colunas + ['pontuacao'])
+        resultado = pd.concat(resultados, ignore_index=True)
+        return resultado.sort_values('pontuacao', ascending=False, kind='stable').head(limite).reset_index(drop=True)
+
+
+def busca_produtos(repositorio):
+    """Índice de busca registrado no repositório, construído na primeira chamada"""
+    busca = next((o for o in repositorio.observadores if isinstance(o, BuscaProdutos)), None)
+    if busca is None:
+        busca = BuscaProdutos()
+        repositorio.observadores.append(busca)
+    if not busca.construido:
+        busca.construir(repositorio)
+    return busca
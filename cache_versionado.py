@@ -0,0 +1,39 @@
+# cache_versionado.py
+
+import threading
+from collections import OrderedDict
+
+
+class CacheVersionado:
+    """Cache LRU de resultados calculados, válido enquanto a versão dos dados não muda"""
+
+    def __init__(self, max_itens=32):
+        self.max_itens = max_itens
+        self.acertos = 0
+        self.falhas = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave, versao, calcular):
+        """Retorna o valor de `chave` na `versao` informada, calculando se preciso"""
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None and item[0] == versao:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return item[1]
+            self.falhas += 1
+
+        valor = calcular()
+
+        with self._lock:
+            self._itens[chave] = (versao, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+        return valor
+
+    def limpar(self):
+        """Descarta todos os valores em cache"""
+        with self._lock:
+            self._itens.clear()
@@ -0,0 +1,132 @@
+# carrinho_proposta.py
+
+import numpy as np
+import pandas as pd
+
+from cache_versionado import CacheVersionado
+
+_cache = CacheVersionado(max_itens=4)
+
+
+def calcular_linhas(quantidade, valor_unitario, desconto):
+    """Valor bruto, desconto e valor líquido de cada linha (arrays, uma passada)"""
+    bruto = np.asarray(quantidade, dtype=float) * np.asarray(valor_unitario, dtype=float)
+    valor_desconto = bruto * np.asarray(desconto, dtype=float) / 100
+    return bruto, valor_desconto, bruto - valor_desconto
+
+
+def resumo_totais(valor_liquido, desconto_geral=0.0):
+    """Subtotal das linhas, desconto geral e total da proposta"""
+    subtotal = float(np.sum(valor_liquido))
+    desconto = subtotal * desconto_geral / 100
+    return {'subtotal': subtotal, 'desconto': desconto, 'total': subtotal - desconto}
+
+
+class CatalogoProdutos:
+    """Catálogo com busca O(1) por código e por nome (tabelas hash)"""
+
+    def __init__(self, produtos):
+        self.codigos = pd.Index(produtos['codigo'].astype(str))
+        self.nomes = produtos['nome'].to_numpy()
+        self.precos = produtos['preco'].to_numpy(dtype=float)
+        self.representadas = produtos['representada'].fillna('').to_numpy(dtype=object)
+        # Nomes repetidos apontam para o primeiro produto com aquele nome
+        self._por_nome = dict(zip(self.nomes[::-1], self.codigos[::-1]))
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def posicoes(self, codigos):
+        """Linhas do catálogo dos códigos informados (KeyError se algum não existir)"""
+        posicoes = self.codigos.get_indexer(codigos)
+        if (posicoes < 0).any():
+            faltando = [c for c, p in zip(codigos, posicoes) if p < 0]
+            raise KeyError(f"Produtos não encontrados no catálogo: {', '.join(map(str, faltando))}")
+        return posicoes
+
+    def codigo_por_nome(self, nome):
+        return self._por_nome[nome]
+
+
+def catalogo_produtos(repositorio):
+    """Catálogo de produtos para propostas (cache por versão)"""
+    return _cache.obter(
+        'catalogo', repositorio.versao('produtos'),
+        lambda: CatalogoProdutos(repositorio.carregar('produtos', ['codigo', 'nome', 'preco', 'representada']))
+    )
+
+
+def representada_dos_itens(itens):
+    """Representada comum a todos os itens da proposta (None se vazia ou misturada)"""
+    representadas = set(itens['representada'])
+    return representadas.pop() or None if len(representadas) == 1 else None
+
+
+class CarrinhoProposta:
+    """Itens de uma proposta indexados pelo código do produto
+
+    Guarda só código, quantidade e desconto de cada linha; nome e preço vêm
+    do catálogo no momento do cálculo, de modo que o carrinho (mantido no
+    session_state) sobrevive a uma nova versão do catálogo.
+    """
+
+    def __init__(self):
+        self._itens = {}
+
+    def __len__(self):
+        return len(self._itens)
+
+    def __contains__(self, codigo):
+        return codigo in self._itens
+
+    def adicionar(self, codigo, quantidade=1, desconto=0.0):
+        """Adiciona a quantidade ao item (cria a linha se o código ainda não estiver no carrinho)"""
+        atual = self._itens.get(codigo)
+        quantidade += atual[0] if atual is not None else 0
+        self._itens[codigo] = (int(quantidade), float(desconto))
+
+    def alterar(self, codigo, quantidade=None, desconto=None):
+        atual_quantidade, atual_desconto = self._itens[codigo]
+        self._itens[codigo] = (
+            int(atual_quantidade if quantidade is None else quantidade),
+            float(atual_desconto if desconto is None else desconto),
+        )
+
+    def remover(self, codigo):
+        self._itens.pop(codigo, None)
+
+    def limpar(self):
+        self._itens.clear()
+
+    def remover_indisponiveis(self, catalogo):
+        """Tira do carrinho os produtos que saíram do catálogo e retorna seus códigos"""
+        codigos = list(self._itens)
+        faltando = [c for c, p in zip(codigos, catalogo.codigos.get_indexer(codigos)) if p < 0]
+        for codigo in faltando:
+            self.remover(codigo)
+        return faltando
+
+    def calcular(self, catalogo, desconto_geral=0.0):
+        """Linhas da proposta com valores e o resumo dos totais, em uma passada vetorizada
+
+        Itens cujo produto não está mais no catálogo ficam de fora do
+        cálculo (ver remover_indisponiveis).
+        """
+        codigos = [c for c, p in zip(self._itens, catalogo.codigos.get_indexer(list(self._itens))) if p >= 0]
+        valores = [self._itens[c] for c in codigos]
+        quantidades, descontos = np.array(valores, dtype=float).reshape(-1, 2).T
+        posicoes = catalogo.posicoes(codigos)
+        valor_unitario = catalogo.precos[posicoes]
+        bruto, valor_desconto, liquido = calcular_linhas(quantidades, valor_unitario, descontos)
+        itens = pd.DataFrame({
+            'codigo': codigos,
+            'nome': catalogo.nomes[posicoes],
+            'representada': catalogo.representadas[posicoes],
+            'quantidade': quantidades.astype(int),
+            'valor_unitario': valor_unitario,
+            'desconto': descontos,
+            'valor_bruto': bruto,
+            'valor_desconto': valor_desconto,
+            'valor_liquido': liquido,
+        })
+        return itens, resumo_totais(liquido, desconto_geral)
@@ -0,0 +1,80 @@
+# cartoes_kpis.py
+
+import os
+
+import pandas as pd
+import streamlit as st
+
+from cache_versionado import CacheVersionado
+from comissoes import comissoes_detalhadas
+from rollups_vendas import intervalo_datas, kpis_periodo
+
+# Segundos entre atualizações dos cartões (só o fragmento deles roda de novo)
+INTERVALO_ATUALIZACAO = float(os.environ.get("VITRINE_INTERVALO_KPIS", 30))
+
+# indicador -> (formato, ajuda)
+INDICADORES = {
+    "receita": ("moeda", "Vendas finalizadas no mês até o último dia com vendas, "
+                         "contra o mesmo trecho do mês anterior"),
+    "pedidos": ("inteiro", "Pedidos não cancelados no mês, contra o mesmo trecho do mês anterior"),
+    "clientes": ("inteiro", "Clientes com pedidos no mês, contra o mês anterior inteiro"),
+    "produtos": ("inteiro", "Produtos diferentes vendidos no mês, contra o mês anterior inteiro"),
+    "comissoes": ("moeda", "Comissões das vendas finalizadas no mês, contra o mês anterior inteiro"),
+}
+
+_cache = CacheVersionado(max_itens=8)
+
+
+def formatar(valor, formato):
+    """Valor no padrão brasileiro (R$ 1.234,56 ou 1.234)"""
+    if formato == "moeda":
+        texto = f"R$ {valor:,.2f}"
+    else:
+        texto = f"{valor:,.0f}"
+    return texto.replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def variacao(atual, anterior):
+    """Variação percentual para o delta do st.metric (None sem base de comparação)"""
+    if not anterior:
+        return None
+    return f"{(atual / anterior - 1) * 100:+.1f}%".replace(".", ",")
+
+
+def indicadores(repositorio):
+    """{indicador: (atual, anterior)} do mês corrente, recalculado só quando os dados mudam
+
+    Lê os rollups e a tabela de comissões (poucas linhas por mês): as
+    sessões que atualizam os cartões periodicamente não varrem as vendas.
+    """
+    # Produtos entram pela categoria, que muda o percentual das comissões
+    versao = (repositorio.versao("vendas"), repositorio.versao("produtos"),
+              repositorio.versao("regras_comissao"), repositorio.versao("faixas_comissao"))
+
+    def calcular():
+        referencia = intervalo_datas(repositorio)[1]
+        valores = kpis_periodo(repositorio, referencia)
+        mes = referencia.strftime("%Y-%m")
+        anterior = (referencia.replace(day=1) - pd.DateOffset(months=1)).strftime("%Y-%m")
+        por_mes = comissoes_detalhadas(repositorio, anterior, mes).groupby("mes")["comissao"].sum()
+        valores["comissoes"] = (float(por_mes.get(mes, 0.0)), float(por_mes.get(anterior, 0.0)))
+        return valores
+
+    return _cache.obter("indicadores", versao, calcular)
+
+
+@st.fragment(run_every=INTERVALO_ATUALIZACAO)
+def cartoes_kpis(repositorio, cartoes, colunas=None):
+    """Cartões st.metric atualizados a cada INTERVALO_ATUALIZACAO segundos
+
+    `cartoes` é uma sequência de (indicador, rótulo). Roda como fragmento:
+    a atualização refaz só os cartões, sem rerodar a página, o CSS, a
+    barra lateral e os gráficos. Com `colunas`, os cartões ficam lado a lado.
+    """
+    valores = indicadores(repositorio)
+    posicoes = st.columns(colunas) if colunas else [st.container() for _ in cartoes]
+    for i, (indicador, rotulo) in enumerate(cartoes):
+        formato, ajuda = INDICADORES[indicador]
+        atual, anterior = valores[indicador]
+        with posicoes[i % len(posicoes)]:
+            st.metric(rotulo, formatar(atual, formato), variacao(atual, anterior), help=ajuda)
@@ -0,0 +1,84 @@
+# colunas_derivadas.py
+
+import numpy as np
+import pandas as pd
+
+from cache_versionado import CacheVersionado
+from rollups_vendas import vendas_por_status
+
+STATUS_BAIXO = '🔴 Baixo'
+STATUS_OK = '🟢 OK'
+
+
+# Definições das colunas derivadas (todas vetorizadas, sem apply por linha)
+def estoque_baixo(produtos):
+    return produtos['estoque'].to_numpy() <= produtos['estoque_minimo'].to_numpy()
+
+
+def status_estoque(produtos):
+    baixo = produtos['estoque_baixo'] if 'estoque_baixo' in produtos else estoque_baixo(produtos)
+    return pd.Categorical.from_codes(
+        np.where(baixo, 0, 1), categories=[STATUS_BAIXO, STATUS_OK]
+    )
+
+
+def margem(produtos):
+    if 'custo' not in produtos:
+        return np.full(len(produtos), np.nan)
+    preco = produtos['preco'].to_numpy(dtype=float)
+    custo = produtos['custo'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(preco > 0, (preco - custo) / preco, np.nan)
+
+
+def valor_total(vendas):
+    return vendas['quantidade'].to_numpy() * vendas['valor_unitario'].to_numpy()
+
+
+# Colunas derivadas por tabela, calculadas na ordem declarada
+COLUNAS_PRODUTOS = {
+    'estoque_baixo': estoque_baixo,
+    'status_estoque': status_estoque,
+    'margem': margem,
+}
+
+
+def calcular_colunas(df, definicoes):
+    """Retorna uma cópia do DataFrame com as colunas derivadas adicionadas"""
+    return df.assign(**definicoes)
+
+
+_cache = CacheVersionado()
+
+
+def produtos_derivados(repositorio):
+    """Produtos com status_estoque, estoque_baixo e margem (cache por versão)"""
+    return _cache.obter(
+        'produtos', repositorio.versao('produtos'),
+        lambda: calcular_colunas(repositorio.carregar('produtos'), COLUNAS_PRODUTOS)
+    )
+
+
+def kpis_gerais(repositorio):
+    """KPIs do Dashboard, recalculados apenas quando alguma tabela muda
+
+    Os totais de vendas vêm do rollup mensal, sem varrer a tabela de vendas.
+    """
+    versao = tuple(repositorio.versao(t) for t in ('produtos', 'clientes', 'vendas'))
+
+    def calcular():
+        produtos = repositorio.carregar('produtos', ['estoque', 'estoque_minimo'])
+        clientes = repositorio.carregar('clientes', ['status'])
+        por_status = vendas_por_status(repositorio).set_index('status')
+        receita = float(por_status['valor_total'].get('Finalizada', 0.0))
+        quantidade = int(por_status['vendas'].get('Finalizada', 0))
+        return {
+            'receita': receita,
+            'quantidade': quantidade,
+            'ticket_medio': receita / quantidade if quantidade > 0 else 0.0,
+            'pendentes': int(por_status['vendas'].get('Pendente', 0)),
+            'clientes_ativos': int((clientes['status'].to_numpy() == 'Ativo').sum()),
+            'estoque_baixo': int(estoque_baixo(produtos).sum()),
+        }
+
+    return _cache.obter('kpis_gerais', versao, calcular)
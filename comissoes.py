@@ -0,0 +1,384 @@
+# comissoes.py
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from metricas_desempenho import cronometro
+
+# Representada ou categoria "*" vale para todas as que não têm regra própria
+CORINGA = "*"
+
+# Só vendas com este status geram comissão
+STATUS_COMISSIONADO = "Finalizada"
+
+COLUNAS_REGRAS = ["representada", "categoria", "percentual"]
+COLUNAS_FAIXAS = ["representada", "volume_minimo", "multiplicador"]
+
+# Regras usadas enquanto as tabelas de regras estiverem vazias
+REGRAS_PADRAO = pd.DataFrame({
+    "representada": [CORINGA],
+    "categoria": [CORINGA],
+    "percentual": [5.0],
+})
+FAIXAS_PADRAO = pd.DataFrame({
+    "representada": [CORINGA] * 3,
+    "volume_minimo": [0.0, 50_000.0, 100_000.0],
+    "multiplicador": [1.0, 1.1, 1.25],
+})
+
+COLUNAS_COMISSOES = [
+    "mes", "vendedor", "representada", "vendas",
+    "valor_vendas", "comissao_base", "multiplicador", "comissao",
+]
+
+# Vendas comissionáveis com a categoria do produto (o percentual depende dela)
+SELECAO_VENDAS = (
+    "SELECT substr(v.data, 1, 7) AS mes, COALESCE(v.vendedor, '') AS vendedor, "
+    "COALESCE(v.representada, '') AS representada, COALESCE(p.categoria, '') AS categoria, "
+    "COALESCE(v.valor_total, 0) AS valor_total "
+    "FROM vendas v LEFT JOIN produtos p ON p.codigo = v.produto_codigo "
+    "WHERE v.status = ?"
+)
+
+# Colunas lidas das partições mensais de vendas
+COLUNAS_PARTICAO = {"data", "vendedor", "representada", "produto_codigo", "status", "valor_total"}
+
+# Pares (vendedor, mês) informados em JSON: [["Ana", "2025-01"], ...]
+PARES_JSON = "SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]') FROM json_each(?)"
+
+
+def _fatorar(valores):
+    """Código inteiro por valor e os valores distintos em texto (nulo vira "")"""
+    posicoes, unicos = pd.factorize(valores, use_na_sentinel=False)
+    return posicoes, pd.Index(unicos, dtype=object).fillna("").astype(str)
+
+
+def _codigos(indice, valores):
+    """Código de cada valor no índice; 0 (coringa) para os que não estão nele
+
+    Só os valores distintos são procurados no índice (colunas categóricas,
+    como as lidas das partições, nem chegam a ser convertidas em texto).
+    """
+    posicoes, unicos = _fatorar(valores)
+    return (indice.get_indexer(unicos) + 1)[posicoes]
+
+
+class MotorComissoes:
+    """Regras de comissão como tabelas de consulta em arrays NumPy
+
+    O percentual fica numa matriz [representada, categoria] e as faixas de
+    volume em arrays [representada, faixa]; o código 0 de cada eixo é o
+    coringa. Calcular a comissão de qualquer número de vendas são algumas
+    indexações e um agrupamento, sem laço em Python por venda.
+
+    Precedência do percentual: representada e categoria > só representada
+    > só categoria > coringa geral. Vendas sem regra aplicável não geram
+    comissão. Representadas sem faixas próprias usam as faixas do coringa.
+    """
+
+    def __init__(self, regras, faixas):
+        regras = regras if not regras.empty else REGRAS_PADRAO
+        faixas = faixas if not faixas.empty else FAIXAS_PADRAO
+        rep_regras = regras["representada"].fillna("").astype(str).to_numpy()
+        cat_regras = regras["categoria"].fillna("").astype(str).to_numpy()
+        rep_faixas = faixas["representada"].fillna("").astype(str).to_numpy()
+
+        self.representadas = pd.Index(sorted((set(rep_regras) | set(rep_faixas)) - {CORINGA}))
+        self.categorias = pd.Index(sorted(set(cat_regras) - {CORINGA}))
+
+        # Percentuais: do nível menos ao mais específico, cada um sobrescreve o anterior
+        r, c = _codigos(self.representadas, rep_regras), _codigos(self.categorias, cat_regras)
+        p = regras["percentual"].to_numpy(dtype=float)
+        geral_r, geral_c = rep_regras == CORINGA, cat_regras == CORINGA
+        taxas = np.full((len(self.representadas) + 1, len(self.categorias) + 1), np.nan)
+        if (geral_r & geral_c).any():
+            taxas[:, :] = p[geral_r & geral_c][-1]
+        taxas[:, c[geral_r & ~geral_c]] = p[geral_r & ~geral_c]
+        taxas[r[~geral_r & geral_c], :] = p[~geral_r & geral_c][:, None]
+        taxas[r[~geral_r & ~geral_c], c[~geral_r & ~geral_c]] = p[~geral_r & ~geral_c]
+        self._taxas = np.nan_to_num(taxas) / 100
+
+        # Faixas: volumes mínimos crescentes por representada, completados com infinito
+        faixas = faixas.assign(_rep=_codigos(self.representadas, rep_faixas))
+        faixas = faixas.sort_values(["_rep", "volume_minimo"], kind="stable")
+        posicao = faixas.groupby("_rep").cumcount().to_numpy()
+        linhas = faixas["_rep"].to_numpy()
+        largura = int(posicao.max()) + 1
+        self._limites = np.full((len(self.representadas) + 1, largura), np.inf)
+        self._multiplicadores = np.ones((len(self.representadas) + 1, largura))
+        self._limites[linhas, posicao] = faixas["volume_minimo"].to_numpy(dtype=float)
+        self._multiplicadores[linhas, posicao] = faixas["multiplicador"].to_numpy(dtype=float)
+        proprias = np.zeros(len(self.representadas) + 1, dtype=bool)
+        proprias[linhas] = True
+        self._limites[~proprias] = self._limites[0]
+        self._multiplicadores[~proprias] = self._multiplicadores[0]
+
+    def taxas(self, representadas, categorias):
+        """Percentual (fração) de cada venda pela representada e categoria"""
+        return self._taxas[_codigos(self.representadas, representadas),
+                           _codigos(self.categorias, categorias)]
+
+    def multiplicadores(self, representadas, volumes):
+        """Multiplicador da faixa atingida por cada volume mensal"""
+        linhas = _codigos(self.representadas, representadas)
+        faixa = (self._limites[linhas] <= np.asarray(volumes, dtype=float)[:, None]).sum(axis=1) - 1
+        return np.where(faixa >= 0, self._multiplicadores[linhas, np.maximum(faixa, 0)], 1.0)
+
+    def calcular(self, vendas):
+        """Comissão por mês, vendedor e representada
+
+        `vendas` tem as colunas mes, vendedor, representada, categoria e
+        valor_total (só vendas comissionáveis). A faixa é definida pelo volume
+        do vendedor na representada no mês e vale para todas essas vendas.
+        """
+        valor = vendas["valor_total"].to_numpy(dtype=float)
+        base = valor * self.taxas(vendas["representada"], vendas["categoria"])
+
+        # Grupo de cada venda: combinação dos códigos de mês, vendedor e representada
+        mes, meses = _fatorar(vendas["mes"])
+        vendedor, vendedores = _fatorar(vendas["vendedor"])
+        representada, representadas = _fatorar(vendas["representada"])
+        chave = (mes.astype(np.int64) * len(vendedores) + vendedor) * len(representadas) + representada
+        grupo, chaves = pd.factorize(chave)
+        resto, i_rep = np.divmod(chaves, max(len(representadas), 1))
+        i_mes, i_vend = np.divmod(resto, max(len(vendedores), 1))
+
+        grupos = pd.DataFrame({
+            "mes": meses[i_mes],
+            "vendedor": vendedores[i_vend],
+            "representada": representadas[i_rep],
+            "vendas": np.bincount(grupo, minlength=len(chaves)),
+            "valor_vendas": np.bincount(grupo, weights=valor, minlength=len(chaves)),
+            "comissao_base": np.bincount(grupo, weights=base, minlength=len(chaves)),
+        })
+        grupos["multiplicador"] = self.multiplicadores(grupos["representada"], grupos["valor_vendas"])
+        grupos["comissao"] = (grupos["comissao_base"] * grupos["multiplicador"]).round(2)
+        return grupos[COLUNAS_COMISSOES]
+
+
+class ComissoesVendas:
+    """Mantém a tabela `comissoes` (mês, vendedor, representada) atualizada
+
+    Observador de vendas no RepositorioDados: cada escrita recalcula só os
+    pares (vendedor, mês) que ela tocou, lendo apenas as vendas desses
+    meses no SQLite, na mesma transação (as partições só são regravadas
+    depois do commit). Mudanças de categoria de produto recalculam os meses
+    em que o produto foi vendido e mudanças nas regras recalculam tudo,
+    lendo das partições mensais quando houver.
+    """
+
+    tabela = "vendas"
+    colunas = ["vendedor", "data"]
+
+    def __init__(self, particoes=None):
+        # Partições mensais das vendas (ParticoesMensais): em dia com o banco
+        # fora das escritas em vendas, servem a reconstrução e os gatilhos
+        self.particoes = particoes
+        self._motor = None
+
+    def observadores(self):
+        """Este observador e os que acompanham produtos e as tabelas de regras"""
+        return [
+            self,
+            GatilhoComissoes(self, "produtos", ["codigo", "categoria"]),
+            GatilhoComissoes(self, "regras_comissao", ["representada"]),
+            GatilhoComissoes(self, "faixas_comissao", ["representada"]),
+        ]
+
+    def criar(self, conn):
+        """Cria a tabela de comissões e a calcula se ainda estiver vazia"""
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS comissoes ("
+            "mes TEXT NOT NULL, vendedor TEXT NOT NULL, representada TEXT NOT NULL, "
+            "vendas INTEGER NOT NULL, valor_vendas REAL NOT NULL, comissao_base REAL NOT NULL, "
+            "multiplicador REAL NOT NULL, comissao REAL NOT NULL, "
+            "PRIMARY KEY (mes, vendedor, representada)) WITHOUT ROWID"
+        )
+        if conn.execute("SELECT 1 FROM comissoes LIMIT 1").fetchone() is None:
+            self.reconstruir(conn)
+
+    def motor(self, conn):
+        """Motor com as regras atuais (relido só depois de uma mudança nas regras)"""
+        if self._motor is None:
+            self._motor = MotorComissoes(
+                pd.read_sql_query(f"SELECT {', '.join(COLUNAS_REGRAS)} FROM regras_comissao", conn),
+                pd.read_sql_query(f"SELECT {', '.join(COLUNAS_FAIXAS)} FROM faixas_comissao", conn),
+            )
+        return self._motor
+
+    def reconstruir(self, conn):
+        """Recalcula as comissões de todas as vendas (ex.: depois de mudar as regras)"""
+        self._motor = None
+        with cronometro("comissoes_reconstrucao") as info:
+            vendas = self._ler_vendas(conn)
+            conn.execute("DELETE FROM comissoes")
+            self._gravar(conn, self.motor(conn).calcular(vendas))
+            info["linhas"] = len(vendas)
+
+    def aplicar(self, conn, antes, depois):
+        """Recalcula os pares (vendedor, mês) das linhas antigas e novas"""
+        linhas = pd.concat([antes.reindex(columns=self.colunas), depois.reindex(columns=self.colunas)])
+        pares = pd.DataFrame({
+            "vendedor": linhas["vendedor"].fillna("").astype(str),
+            "mes": pd.to_datetime(linhas["data"]).dt.strftime("%Y-%m"),
+        })
+        # As partições ainda não têm esta escrita: lê as vendas do SQLite
+        self.recalcular(conn, pares.dropna(), particoes=False)
+
+    def recalcular(self, conn, pares, particoes=True):
+        """Substitui as comissões dos pares (vendedor, mês) informados"""
+        pares = pares[["vendedor", "mes"]].drop_duplicates()
+        if pares.empty:
+            return
+        with cronometro("comissoes_recalculo") as info:
+            vendas = self._ler_vendas(conn, pares, particoes)
+            resultado = self.motor(conn).calcular(vendas)
+            resultado = resultado.merge(pares, on=["vendedor", "mes"])[COLUNAS_COMISSOES]
+            conn.execute(f"DELETE FROM comissoes WHERE (vendedor, mes) IN ({PARES_JSON})",
+                         (pares.to_json(orient="values"),))
+            self._gravar(conn, resultado)
+            info.update(linhas=len(vendas), pares=len(pares))
+
+    def _ler_vendas(self, conn, pares=None, particoes=True):
+        """Vendas comissionáveis dos pares (vendedor, mês), ou todas, com a categoria
+
+        Com partições mensais (e `particoes`), lê só os meses dos pares em
+        formato colunar (texto como categorias); senão, consulta o SQLite.
+        """
+        meses = sorted(pares["mes"].unique()) if pares is not None else None
+        if particoes and self.particoes is not None:
+            arquivos = self.particoes.arquivos(meses)
+            # Partições gravadas antes da coluna vendedor existir: o SQLite responde
+            if all(COLUNAS_PARTICAO <= set(pq.read_schema(a).names) for a in arquivos):
+                return self._ler_particoes(conn, arquivos, pares)
+        if pares is None:
+            return pd.read_sql_query(SELECAO_VENDAS, conn, params=(STATUS_COMISSIONADO,))
+        # O período limita a leitura pelo índice de data; os pares filtram o resto
+        return pd.read_sql_query(
+            f"{SELECAO_VENDAS} AND v.data BETWEEN ? AND ? "
+            f"AND (COALESCE(v.vendedor, ''), substr(v.data, 1, 7)) IN ({PARES_JSON})",
+            conn, params=(STATUS_COMISSIONADO, meses[0] + "-01", meses[-1] + "-31",
+                          pares.to_json(orient="values"))
+        )
+
+    @staticmethod
+    def _ler_particoes(conn, arquivos, pares):
+        filtros = [("status", "=", STATUS_COMISSIONADO)]
+        if pares is not None and "" not in set(pares["vendedor"]):
+            filtros.append(("vendedor", "in", sorted(pares["vendedor"].unique())))
+        if not arquivos:
+            return pd.DataFrame(columns=["mes", "vendedor", "representada", "categoria", "valor_total"])
+        tabela = pa.concat_tables([
+            pq.read_table(a, columns=sorted(COLUNAS_PARTICAO), filters=filtros,
+                          read_dictionary=["vendedor", "representada", "produto_codigo"])
+            for a in arquivos
+        ]).unify_dictionaries().combine_chunks()
+        vendas = tabela.to_pandas()
+
+        # Categoria de cada produto vendido (consulta só os códigos distintos)
+        produtos = vendas["produto_codigo"].cat.categories
+        categorias = pd.read_sql_query(
+            "SELECT codigo, categoria FROM produtos WHERE codigo IN (SELECT value FROM json_each(?))",
+            conn, params=(pd.Series(list(produtos), dtype=object).to_json(orient="values"),)
+        ).set_index("codigo")["categoria"].reindex(produtos)
+        cat_produto, nomes = pd.factorize(categorias)
+        codigos = vendas["produto_codigo"].cat.codes.to_numpy()
+        categoria = np.where(codigos >= 0, cat_produto[codigos], -1)
+
+        mes, meses = pd.factorize(vendas["data"].to_numpy().astype("datetime64[M]"))
+        return pd.DataFrame({
+            "mes": pd.Categorical.from_codes(mes, pd.DatetimeIndex(meses).strftime("%Y-%m")),
+            "vendedor": vendas["vendedor"],
+            "representada": vendas["representada"],
+            "categoria": pd.Categorical.from_codes(categoria, nomes),
+            "valor_total": vendas["valor_total"].fillna(0),
+        })
+
+    def recalcular_produtos(self, conn, antes, depois):
+        """Recalcula os meses em que foram vendidos produtos que mudaram de categoria"""
+        juntos = antes.reindex(columns=["codigo", "categoria"]).merge(
+            depois.reindex(columns=["codigo", "categoria"]), on="codigo", how="outer",
+            suffixes=("_antes", "_depois")
+        )
+        mudaram = juntos.loc[
+            juntos["categoria_antes"].fillna("") != juntos["categoria_depois"].fillna(""), "codigo"
+        ]
+        if mudaram.empty:
+            return
+        pares = pd.read_sql_query(
+            "SELECT DISTINCT COALESCE(vendedor, '') AS vendedor, substr(data, 1, 7) AS mes FROM vendas "
+            "WHERE produto_codigo IN (SELECT value FROM json_each(?))",
+            conn, params=(pd.Series(list(mudaram), dtype=object).to_json(orient="values"),)
+        )
+        self.recalcular(conn, pares)
+
+    @staticmethod
+    def _gravar(conn, comissoes):
+        conn.executemany(
+            f"INSERT OR REPLACE INTO comissoes ({', '.join(COLUNAS_COMISSOES)}) "
+            f"VALUES ({', '.join('?' for _ in COLUNAS_COMISSOES)})",
+            comissoes.astype(object).itertuples(index=False, name=None)
+        )
+
+
+class GatilhoComissoes:
+    """Repassa ao ComissoesVendas as escritas em produtos e nas tabelas de regras"""
+
+    def __init__(self, comissoes, tabela, colunas):
+        self.comissoes = comissoes
+        self.tabela = tabela
+        self.colunas = colunas
+
+    def criar(self, conn):
+        """As tabelas são do esquema do repositório; nada a criar"""
+
+    def aplicar(self, conn, antes, depois):
+        if self.tabela == "produtos":
+            self.comissoes.recalcular_produtos(conn, antes, depois)
+        else:
+            self.comissoes.reconstruir(conn)
+
+
+def comissoes_detalhadas(repositorio, mes_inicio=None, mes_fim=None, representadas=None):
+    """Comissões calculadas por mês, vendedor e representada ("AAAA-MM")"""
+    filtros, parametros = ["mes BETWEEN ? AND ?"], [mes_inicio or "0000-00", mes_fim or "9999-99"]
+    if representadas is not None:
+        filtros.append("representada IN (SELECT value FROM json_each(?))")
+        parametros.append(pd.Series(list(representadas), dtype=object).to_json(orient="values"))
+    return repositorio.consultar_sql(
+        f"SELECT {', '.join(COLUNAS_COMISSOES)} FROM comissoes WHERE {' AND '.join(filtros)} "
+        f"ORDER BY mes, comissao DESC", tuple(parametros)
+    )
+
+
+def comissoes_por_mes(repositorio, representadas=None):
+    """Total de comissões e de vendas comissionadas por mês"""
+    df = comissoes_detalhadas(repositorio, representadas=representadas)
+    return df.groupby("mes", as_index=False)[["valor_vendas", "comissao"]].sum()
+
+
+def regras_comissao(repositorio):
+    """Regras de percentual e faixas em vigor (as padrão se nenhuma foi definida)"""
+    regras = repositorio.carregar("regras_comissao", COLUNAS_REGRAS)
+    faixas = repositorio.carregar("faixas_comissao", COLUNAS_FAIXAS)
+    return (regras if not regras.empty else REGRAS_PADRAO.copy(),
+            faixas if not faixas.empty else FAIXAS_PADRAO.copy())
+
+
+def definir_regras(repositorio, regras=None, faixas=None):
+    """Substitui as regras de percentual e/ou as faixas; as comissões são recalculadas"""
+    for tabela, novas, colunas in (("regras_comissao", regras, COLUNAS_REGRAS),
+                                   ("faixas_comissao", faixas, COLUNAS_FAIXAS)):
+        if novas is None:
+            continue
+        novas = novas[colunas].dropna(how="all").reset_index(drop=True)
+        atuais = repositorio.carregar(tabela, ["id", *colunas])
+        if atuais[colunas].equals(novas):
+            continue
+        atuais = atuais["id"]
+        repositorio.inserir(tabela, novas.assign(id=np.arange(1, len(novas) + 1)))
+        sobrando = atuais[atuais > len(novas)]
+        if not sobrando.empty:
+            repositorio.excluir(tabela, "id", [int(i) for i in sobrando])
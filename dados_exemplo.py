@@ -0,0 +1,76 @@
+# dados_exemplo.py
+
+import numpy as np
+import pandas as pd
+
+from colunas_derivadas import valor_total
+
+REPRESENTADAS_EXEMPLO = ['Alfa Distribuidora', 'Beta Industrial', 'Gama Têxtil']
+VENDEDORES_EXEMPLO = ['Ana Souza', 'Bruno Lima', 'Carla Dias']
+CATEGORIAS_EXEMPLO = ['Eletrônicos', 'Roupas', 'Casa', 'Esportes']
+CIDADES_EXEMPLO = ['São Paulo', 'Rio de Janeiro', 'Belo Horizonte', 'Salvador']
+
+# Período das vendas: uma por dia até completar, no máximo, três anos
+INICIO_VENDAS = pd.Timestamp('2025-01-01')
+DIAS_MAXIMOS = 3 * 365
+
+
+def _numerados(prefixo, n, largura=0):
+    """prefixo + 1..n (com zeros à esquerda até `largura`), sem laço em Python"""
+    numeros = np.arange(1, n + 1).astype(str)
+    return np.char.add(prefixo, np.char.zfill(numeros, largura) if largura else numeros)
+
+
+def gerar_dados_exemplo(vendas=100, produtos=None, clientes=None, seed=None):
+    """Produtos, clientes e vendas sintéticos, prontos para o RepositorioDados
+
+    O padrão (50 produtos, 25 clientes, 100 vendas, uma por dia a partir de
+    2025-01-01) é o banco de exemplo do app. Com mais vendas, catálogo e
+    carteira crescem junto (um produto a cada 200 vendas, um cliente a cada
+    40) e as datas se espalham por até três anos, várias vendas por dia.
+    Tudo é gerado de forma vetorizada; com `seed` o resultado é reproduzível.
+    """
+    rng = np.random.default_rng(seed)
+    n_produtos = produtos if produtos is not None else max(50, vendas // 200)
+    n_clientes = clientes if clientes is not None else max(25, vendas // 40)
+
+    # Dados de produtos/estoque
+    preco = rng.uniform(50, 500, n_produtos).round(2)
+    produtos = pd.DataFrame({
+        'codigo': _numerados('PROD', n_produtos, 3),
+        'nome': _numerados('Produto ', n_produtos),
+        'categoria': rng.choice(CATEGORIAS_EXEMPLO, n_produtos),
+        'preco': preco,
+        'estoque': rng.integers(0, 100, n_produtos),
+        'estoque_minimo': rng.integers(5, 20, n_produtos),
+        'representada': rng.choice(REPRESENTADAS_EXEMPLO, n_produtos)
+    })
+    produtos['custo'] = (preco * rng.uniform(0.55, 0.8, n_produtos)).round(2)
+
+    # Dados de clientes/leads
+    clientes = pd.DataFrame({
+        'id': np.arange(1, n_clientes + 1),
+        'nome': _numerados('Cliente ', n_clientes),
+        'email': np.char.add(_numerados('cliente', n_clientes), '@email.com'),
+        'telefone': _numerados('(11) 9999-', n_clientes, 4),
+        'status': rng.choice(['Ativo', 'Prospect', 'Inativo'], n_clientes),
+        'cidade': rng.choice(CIDADES_EXEMPLO, n_clientes)
+    })
+
+    # Dados de vendas, em ordem de data
+    dias = min(vendas, DIAS_MAXIMOS)
+    produto = rng.integers(0, n_produtos, vendas)
+    vendas_df = pd.DataFrame({
+        'id': np.arange(1, vendas + 1),
+        'data': INICIO_VENDAS + pd.to_timedelta(np.arange(vendas) * dias // max(vendas, 1), unit='D'),
+        'cliente_id': rng.integers(1, n_clientes + 1, vendas),
+        'produto_codigo': produtos['codigo'].to_numpy()[produto],
+        'quantidade': rng.integers(1, 10, vendas),
+        'valor_unitario': rng.uniform(50, 500, vendas).round(2),
+        'status': rng.choice(['Finalizada', 'Pendente', 'Cancelada'], vendas, p=[0.7, 0.2, 0.1])
+    })
+    vendas_df['valor_total'] = valor_total(vendas_df)
+    vendas_df['representada'] = produtos['representada'].to_numpy()[produto]
+    vendas_df['vendedor'] = rng.choice(VENDEDORES_EXEMPLO, vendas)
+
+    return produtos, clientes, vendas_df
@@ -0,0 +1,194 @@
+# datasets_compartilhados.py
+
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import pandas as pd
+import pyarrow as pa
+
+# Espaço máximo dos datasets em memória; acima dele saem os menos usados
+LIMITE_DATASETS_MB = float(os.environ.get("VITRINE_LIMITE_DATASETS_MB", 256))
+
+# Validade padrão (segundos) de um dataset gerado; None = até ser descartado por espaço
+TTL_PADRAO = None
+
+
+def _para_arrow(resultado):
+    """DataFrame (ou tupla de DataFrames) convertido para tabelas Arrow imutáveis"""
+    if isinstance(resultado, tuple):
+        return tuple(pa.Table.from_pandas(df, preserve_index=False) for df in resultado)
+    return pa.Table.from_pandas(resultado, preserve_index=False)
+
+
+def _coluna(coluna):
+    """Array pandas sobre os buffers da coluna Arrow, sem cópia"""
+    tipo = coluna.type
+    numerico = (pa.types.is_integer(tipo) or pa.types.is_floating(tipo)
+                or (pa.types.is_timestamp(tipo) and tipo.tz is None))
+    if numerico and coluna.null_count == 0 and coluna.num_chunks == 1:
+        # Array NumPy somente leitura apontando para o buffer compartilhado
+        return coluna.chunk(0).to_numpy(zero_copy_only=True)
+    if pa.types.is_string(tipo) or pa.types.is_large_string(tipo):
+        return pd.arrays.ArrowStringArray(coluna)
+    return pd.arrays.ArrowExtensionArray(coluna)
+
+
+def visao(tabela):
+    """DataFrame novo que lê os buffers da tabela Arrow (só os objetos de coluna são criados)
+
+    As colunas numéricas são somente leitura: alterar valores no lugar gera
+    erro em vez de corromper o dataset das outras sessões. Atribuir uma
+    coluna inteira (df['x'] = ...) funciona normalmente, só nesta visão.
+    """
+    return pd.DataFrame(
+        {nome: _coluna(coluna) for nome, coluna in zip(tabela.column_names, tabela.columns)},
+        copy=False
+    )
+
+
+class RegistroDatasets:
+    """Datasets mantidos uma vez por processo, como tabelas Arrow imutáveis
+
+    Substitui o st.cache_data para dados grandes: em vez de desserializar uma
+    cópia por sessão e por rerun, cada leitura recebe uma visão sem cópia das
+    mesmas tabelas. Entradas saem por TTL ou, acima do limite de memória, das
+    menos usadas para as mais usadas. Cada (nome, chave) é gerado por uma
+    chamada de cada vez: as sessões que pedem o mesmo dataset durante a
+    geração esperam por ela em vez de gerá-lo de novo.
+    """
+
+    def __init__(self, limite_bytes=LIMITE_DATASETS_MB * 1024 * 1024):
+        self.limite_bytes = limite_bytes
+        self._itens = OrderedDict()
+        self._estatisticas = {}
+        self._pendentes = {}
+        self._lock = threading.Lock()
+
+    def obter(self, nome, chave, gerar, ttl=TTL_PADRAO):
+        """Visões do dataset `nome` para os argumentos `chave`, gerando-o se preciso"""
+        agora = time.monotonic()
+        with self._lock:
+            estatisticas = self._estatisticas.setdefault(
+                nome, {"acertos": 0, "falhas": 0, "descartes": 0, "segundos_geracao": 0.0}
+            )
+            item = self._itens.get((nome, chave))
+            if item is not None and (item["expira_em"] is None or item["expira_em"] > agora):
+                self._itens.move_to_end((nome, chave))
+                estatisticas["acertos"] += 1
+                return self._visoes(item["tabelas"])
+            pendente = self._pendentes.get((nome, chave))
+            if pendente is None:
+                pendente = self._pendentes[(nome, chave)] = Future()
+                estatisticas["falhas"] += 1
+                gerador = True
+            else:
+                estatisticas["acertos"] += 1
+                gerador = False
+
+        if not gerador:
+            # Outra sessão já está gerando: espera pelo mesmo resultado (ou erro)
+            return self._visoes(pendente.result())
+
+        try:
+            inicio = time.perf_counter()
+            tabelas = _para_arrow(gerar())
+            duracao = time.perf_counter() - inicio
+        except BaseException as e:
+            with self._lock:
+                self._pendentes.pop((nome, chave), None)
+            pendente.set_exception(e)
+            raise
+        tamanho = sum(t.nbytes for t in tabelas) if isinstance(tabelas, tuple) else tabelas.nbytes
+
+        with self._lock:
+            self._estatisticas[nome]["segundos_geracao"] += duracao
+            self._itens[(nome, chave)] = {
+                "tabelas": tabelas,
+                "bytes": tamanho,
+                "criado_em": time.time(),
+                "expira_em": agora + ttl if ttl is not None else None,
+            }
+            self._itens.move_to_end((nome, chave))
+            self._pendentes.pop((nome, chave), None)
+            self._descartar(agora)
+        pendente.set_result(tabelas)
+        return self._visoes(tabelas)
+
+    @staticmethod
+    def _visoes(tabelas):
+        if isinstance(tabelas, tuple):
+            return tuple(visao(tabela) for tabela in tabelas)
+        return visao(tabelas)
+
+    def _descartar(self, agora):
+        for chave in [c for c, item in self._itens.items()
+                      if item["expira_em"] is not None and item["expira_em"] <= agora]:
+            self._itens.pop(chave)
+            self._estatisticas[chave[0]]["descartes"] += 1
+        # Mantém ao menos o mais recente, mesmo que sozinho passe do limite
+        total = sum(item["bytes"] for item in self._itens.values())
+        while total > self.limite_bytes and len(self._itens) > 1:
+            (nome, _), item = self._itens.popitem(last=False)
+            total -= item["bytes"]
+            self._estatisticas[nome]["descartes"] += 1
+
+    def estatisticas(self):
+        """Memória e taxa de acerto por dataset"""
+        with self._lock:
+            linhas = []
+            for nome, estatisticas in self._estatisticas.items():
+                itens = [item for (n, _), item in self._itens.items() if n == nome]
+                leituras = estatisticas["acertos"] + estatisticas["falhas"]
+                linhas.append({
+                    "dataset": nome,
+                    "versoes": len(itens),
+                    "memoria_mb": sum(item["bytes"] for item in itens) / (1024 ** 2),
+                    "acertos": estatisticas["acertos"],
+                    "falhas": estatisticas["falhas"],
+                    "taxa_acerto": estatisticas["acertos"] / leituras if leituras else 0.0,
+                    "descartes": estatisticas["descartes"],
+                    "segundos_geracao": estatisticas["segundos_geracao"],
+                })
+        return pd.DataFrame(linhas, columns=[
+            "dataset", "versoes", "memoria_mb", "acertos", "falhas",
+            "taxa_acerto", "descartes", "segundos_geracao",
+        ])
+
+    def memoria_total_bytes(self):
+        with self._lock:
+            return sum(item["bytes"] for item in self._itens.values())
+
+    def limpar(self):
+        """Descarta todos os datasets (as visões já entregues continuam válidas)"""
+        with self._lock:
+            self._itens.clear()
+
+
+_registro = RegistroDatasets()
+
+
+def registro_datasets():
+    """Registro de datasets compartilhado por todas as sessões do processo"""
+    return _registro
+
+
+def dataset_compartilhado(ttl=TTL_PADRAO):
+    """Decorador no lugar do @st.cache_data para funções que geram DataFrames
+
+    A função roda uma vez por combinação de argumentos (hasheáveis) e o
+    resultado fica no registro do processo; cada chamada devolve visões sem
+    cópia, ou uma tupla delas se a função retornar uma tupla de DataFrames.
+    """
+    def decorador(funcao):
+        nome = funcao.__name__
+
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            chave = (args, tuple(sorted(kwargs.items())))
+            return _registro.obter(nome, chave, lambda: funcao(*args, **kwargs), ttl)
+        return envoltorio
+    return decorador
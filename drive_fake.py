@@ -0,0 +1,334 @@
+# drive_fake.py
+
+import hashlib
+import itertools
+import re
+import threading
+from datetime import datetime, timezone
+
+# Backend local que imita o subconjunto da API do Google Drive v3 usado pelo
+# VitrineSCV. Permite exercitar GoogleDriveManager sem rede nem credenciais:
+#     GoogleDriveManager(service=FakeDriveService(), caminho_cache=...)
+
+_TOKENS = re.compile(
+    r"\s*(\(|\)|'(?:\\.|[^'])*'|!=|>=|<=|=|>|<|[A-Za-z_][A-Za-z0-9_.]*|-?\d+(?:\.\d+)?)"
+)
+
+
+def _tokenizar(q):
+    tokens, posicao = [], 0
+    q = q.strip()
+    while posicao < len(q):
+        encontrado = _TOKENS.match(q, posicao)
+        if not encontrado:
+            raise ValueError(f"Consulta inválida perto de: {q[posicao:]!r}")
+        tokens.append(encontrado.group(1))
+        posicao = encontrado.end()
+    return tokens
+
+
+class _Consulta:
+    """Avaliador do parâmetro `q` (and/or/not, parênteses, =, !=, <, >, contains, in)"""
+
+    def __init__(self, q):
+        self.tokens = _tokenizar(q) if q else []
+        self.posicao = 0
+        self.arvore = self._expressao() if self.tokens else None
+
+    def _proximo(self):
+        token = self.tokens[self.posicao]
+        self.posicao += 1
+        return token
+
+    def _espiar(self):
+        return self.tokens[self.posicao] if self.posicao < len(self.tokens) else None
+
+    def _expressao(self):
+        termos = [self._conjuncao()]
+        while self._espiar() == 'or':
+            self._proximo()
+            termos.append(self._conjuncao())
+        return ('or', termos)
+
+    def _conjuncao(self):
+        termos = [self._termo()]
+        while self._espiar() == 'and':
+            self._proximo()
+            termos.append(self._termo())
+        return ('and', termos)
+
+    def _termo(self):
+        if self._espiar() == 'not':
+            self._proximo()
+            return ('not', self._termo())
+        if self._espiar() == '(':
+            self._proximo()
+            expressao = self._expressao()
+            self._proximo()  # ')'
+            return expressao
+        esquerda = self._proximo()
+        operador = self._proximo()
+        direita = self._proximo()
+        return ('cmp', esquerda, operador, direita)
+
+    @staticmethod
+    def _valor(token):
+        if token.startswith("'"):
+            return token[1:-1].replace("\\'", "'")
+        if token in ('true', 'false'):
+            return token == 'true'
+        try:
+            return float(token)
+        except ValueError:
+            return token
+
+    def _avaliar(self, no, arquivo):
+        tipo = no[0]
+        if tipo == 'or':
+            return any(self._avaliar(t, arquivo) for t in no[1])
+        if tipo == 'and':
+            return all(self._avaliar(t, arquivo) for t in no[1])
+        if tipo == 'not':
+            return not self._avaliar(no[1], arquivo)
+        _, esquerda, operador, direita = no
+        if operador == 'in':
+            return self._valor(esquerda) in arquivo.get(direita, [])
+        atual = arquivo.get(esquerda)
+        esperado = self._valor(direita)
+        if operador == 'contains':
+            return esperado in (atual or '')
+        if operador == '=':
+            return atual == esperado
+        if operador == '!=':
+            return atual != esperado
+        if atual is None:
+            return False
+        return {'>': atual > esperado, '<': atual < esperado,
+                '>=': atual >= esperado, '<=': atual <= esperado}[operador]
+
+    def atende(self, arquivo):
+        return self.arvore is None or self._avaliar(self.arvore, arquivo)
+
+
+class _Requisicao:
+    """Equivalente ao HttpRequest: a chamada só acontece em execute()"""
+
+    def __init__(self, servico, funcao):
+        self._servico = servico
+        self._funcao = funcao
+
+    def execute(self, num_retries=0):
+        self._servico.contar_chamada()
+        return self._funcao()
+
+
+class _Progresso:
+    """Equivalente ao MediaUploadProgress"""
+
+    def __init__(self, resumable_progress, total_size):
+        self.resumable_progress = resumable_progress
+        self.total_size = total_size
+
+    def progress(self):
+        return self.resumable_progress / self.total_size if self.total_size else 1.0
+
+
+class _RequisicaoUpload(_Requisicao):
+    """files().create com media_body: envio simples (execute) ou em chunks (next_chunk)"""
+
+    def __init__(self, servico, body, media):
+        super().__init__(servico, self._criar)
+        self._body = body
+        self._media = media
+        self._enviados = 0
+        self._partes = []
+
+    def _criar(self):
+        conteudo = b''.join(self._partes) or self._media.getbytes(0, self._media.size())
+        return dict(self._servico.adicionar(conteudo=conteudo, **self._body))
+
+    def next_chunk(self, num_retries=0):
+        self._servico.contar_chamada()
+        tamanho = self._media.size()
+        parte = self._media.getbytes(self._enviados, self._media.chunksize())
+        self._partes.append(parte)
+        self._enviados += len(parte)
+        if self._enviados >= tamanho:
+            return None, self._criar()
+        return _Progresso(self._enviados, tamanho), None
+
+
+class _Lote:
+    """Equivalente ao BatchHttpRequest (uma única ida ao servidor)"""
+
+    def __init__(self, servico, callback=None):
+        self._servico = servico
+        self._callback = callback
+        self._requisicoes = []
+
+    def add(self, requisicao, callback=None, request_id=None):
+        request_id = request_id or str(len(self._requisicoes) + 1)
+        self._requisicoes.append((request_id, requisicao, callback or self._callback))
+
+    def execute(self):
+        self._servico.contar_chamada()
+        for request_id, requisicao, callback in self._requisicoes:
+            try:
+                resposta, erro = requisicao._funcao(), None
+            except Exception as e:
+                resposta, erro = None, e
+            if callback is not None:
+                callback(request_id, resposta, erro)
+
+
+class _Arquivos:
+    def __init__(self, servico):
+        self._servico = servico
+
+    def list(self, q=None, fields=None, pageSize=100, pageToken=None, **kwargs):
+        def executar():
+            consulta = _Consulta(q)
+            with self._servico.lock:
+                arquivos = [dict(a) for a in self._servico.arquivos.values() if consulta.atende(a)]
+            inicio = int(pageToken or 0)
+            resposta = {'files': arquivos[inicio:inicio + pageSize]}
+            if inicio + pageSize < len(arquivos):
+                resposta['nextPageToken'] = str(inicio + pageSize)
+            return resposta
+        return _Requisicao(self._servico, executar)
+
+    def create(self, body=None, fields=None, media_body=None, **kwargs):
+        if media_body is not None:
+            return _RequisicaoUpload(self._servico, body or {}, media_body)
+
+        def executar():
+            return dict(self._servico.adicionar(**(body or {})))
+        return _Requisicao(self._servico, executar)
+
+    def get(self, fileId, fields=None, **kwargs):
+        def executar():
+            return dict(self._servico.metadados(fileId))
+        return _Requisicao(self._servico, executar)
+
+    def get_media(self, fileId, **kwargs):
+        def executar():
+            self._servico.metadados(fileId)
+            return self._servico.conteudos.get(fileId, b'')
+        return _Requisicao(self._servico, executar)
+
+    def export_media(self, fileId, mimeType, **kwargs):
+        return self.get_media(fileId)
+
+
+class _Mudancas:
+    def __init__(self, servico):
+        self._servico = servico
+
+    def getStartPageToken(self, **kwargs):
+        def executar():
+            with self._servico.lock:
+                return {'startPageToken': str(len(self._servico.mudancas))}
+        return _Requisicao(self._servico, executar)
+
+    def list(self, pageToken, fields=None, pageSize=100, **kwargs):
+        def executar():
+            inicio = int(pageToken)
+            with self._servico.lock:
+                total = len(self._servico.mudancas)
+                pagina = self._servico.mudancas[inicio:inicio + pageSize]
+                mudancas = []
+                for file_id, quando in pagina:
+                    arquivo = self._servico.arquivos.get(file_id)
+                    mudanca = {'fileId': file_id, 'time': quando, 'removed': arquivo is None}
+                    if arquivo is not None:
+                        mudanca['file'] = dict(arquivo)
+                    mudancas.append(mudanca)
+            resposta = {'changes': mudancas}
+            if inicio + pageSize < total:
+                resposta['nextPageToken'] = str(inicio + pageSize)
+            else:
+                resposta['newStartPageToken'] = str(total)
+            return resposta
+        return _Requisicao(self._servico, executar)
+
+
+class FakeDriveService:
+    """Drive em memória com a interface de `build('drive', 'v3', ...)`
+
+    Toda criação, alteração ou remoção entra em `mudancas`, que alimenta
+    changes().list() com page tokens numéricos. `falhas` faz as próximas
+    chamadas levantarem ConnectionError, para exercitar as retentativas.
+    """
+
+    def __init__(self, falhas=0):
+        self.lock = threading.RLock()
+        self.arquivos = {}
+        self.conteudos = {}
+        self.mudancas = []
+        self.chamadas = 0
+        self.falhas = falhas
+        self._ids = itertools.count(1)
+
+    def contar_chamada(self):
+        """Conta uma ida ao servidor e simula uma falha transitória, se houver"""
+        with self.lock:
+            self.chamadas += 1
+            if self.falhas > 0:
+                self.falhas -= 1
+                raise ConnectionError("Falha simulada de rede")
+
+    def files(self):
+        return _Arquivos(self)
+
+    def changes(self):
+        return _Mudancas(self)
+
+    def new_batch_http_request(self, callback=None):
+        return _Lote(self, callback)
+
+    def metadados(self, file_id):
+        with self.lock:
+            if file_id not in self.arquivos:
+                raise KeyError(f"Arquivo não encontrado: {file_id}")
+            return self.arquivos[file_id]
+
+    def _registrar_mudanca(self, file_id):
+        agora = datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+        self.mudancas.append((file_id, agora))
+        if file_id in self.arquivos:
+            self.arquivos[file_id]['modifiedTime'] = agora
+
+    def adicionar(self, name, mimeType='application/octet-stream', parents=None, conteudo=None, **extras):
+        """Cria um arquivo/pasta diretamente no backend (útil para preparar cenários)"""
+        with self.lock:
+            file_id = f"fake{next(self._ids)}"
+            self.arquivos[file_id] = {
+                'id': file_id, 'name': name, 'mimeType': mimeType,
+                'parents': list(parents or []), 'trashed': False, **extras
+            }
+            if conteudo is not None:
+                self._gravar_conteudo(file_id, conteudo)
+            self._registrar_mudanca(file_id)
+            return self.arquivos[file_id]
+
+    def _gravar_conteudo(self, file_id, conteudo):
+        self.conteudos[file_id] = conteudo
+        self.arquivos[file_id]['md5Checksum'] = hashlib.md5(conteudo).hexdigest()
+        self.arquivos[file_id]['size'] = str(len(conteudo))
+
+    def alterar(self, file_id, conteudo=None, **metadados):
+        """Substitui o conteúdo e/ou metadados de um arquivo existente"""
+        with self.lock:
+            self.metadados(file_id).update(metadados)
+            if conteudo is not None:
+                self._gravar_conteudo(file_id, conteudo)
+            self._registrar_mudanca(file_id)
+            return self.arquivos[file_id]
+
+    def remover(self, file_id):
+        """Exclui o arquivo definitivamente (aparece como `removed` no change feed)"""
+        with self.lock:
+            self.metadados(file_id)
+            del self.arquivos[file_id]
+            self.conteudos.pop(file_id, None)
+            self._registrar_mudanca(file_id)
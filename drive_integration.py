@@ -1,31 +1,349 @@
-# drive_integration.py
-
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-
-class GoogleDriveManager:
-    def __init__(self):
-        creds = service_account.Credentials.from_service_account_file(
-            'credentials.json',
-            scopes=['https://www.googleapis.com/auth/drive']
-        )
-        self.service = build('drive', 'v3', credentials=creds)
-        self.folders = self._setup_folders()
-
-    def _setup_folders(self):
-        names = [
-            '01_Propostas','02_Pedidos','03_Imagens',
-            '04_Tabelas_de_Precos','05_Relatorios','06_Backup_Sistema'
-        ]
-        ids = {}
-        for name in names:
-            query = f"name='{name}' and mimeType='application/vnd.google-apps.folder'"
-            results = self.service.files().list(q=query, fields='files(id)').execute()
-            files = results.get('files', [])
-            if files:
-                ids[name] = files[0]['id']
-            else:
-                md = {'name': name, 'mimeType': 'application/vnd.google-apps.folder'}
-                folder = self.service.files().create(body=md, fields='id').execute()
-                ids[name] = folder['id']
-        return ids
+# drive_integration.py
+
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import google_auth_httplib2
+import httplib2
+from google.oauth2 import service_account
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest, MediaFileUpload, MediaIoBaseUpload
+
+CAMINHO_CREDENCIAIS = 'credentials.json'
+
+PASTAS = [
+    '01_Propostas','02_Pedidos','03_Imagens',
+    '04_Tabelas_de_Precos','05_Relatorios','06_Backup_Sistema'
+]
+
+MIME_PASTA = 'application/vnd.google-apps.folder'
+
+# IDs das pastas ficam em disco; dentro do TTL o boot não faz chamadas ao Drive
+CAMINHO_CACHE_PASTAS = os.environ.get(
+    'VITRINE_CACHE_DRIVE', os.path.join('dados', 'drive_pastas.json')
+)
+TTL_CACHE_PASTAS = 24 * 60 * 60
+
+# Uploads simultâneos por processo
+MAX_UPLOADS_SIMULTANEOS = 4
+
+# Arquivos acima deste tamanho vão em upload resumable, em chunks
+LIMITE_UPLOAD_SIMPLES = 5 * 1024 * 1024
+TAMANHO_CHUNK = 8 * 1024 * 1024  # múltiplo de 256 KB, exigido pelo Drive
+
+# Uploads terminados continuam no status por este tempo (segundos), até este limite de registros
+RETENCAO_UPLOADS = 10 * 60
+MAX_REGISTROS_UPLOADS = 100
+
+# Retentativas com backoff exponencial (base * 2^n + jitter) em falhas transitórias
+MAX_TENTATIVAS = 6
+BACKOFF_BASE = 1.0
+STATUS_TRANSITORIOS = {429, 500, 502, 503, 504}
+
+_servico = None
+_lock_servico = threading.Lock()
+# Conexão HTTP de cada thread: o httplib2.Http não pode ser compartilhado
+_http_por_thread = threading.local()
+
+
+def _http_da_thread(credenciais):
+    """AuthorizedHttp exclusivo da thread atual (criado no primeiro uso)"""
+    http = getattr(_http_por_thread, 'http', None)
+    if http is None:
+        http = google_auth_httplib2.AuthorizedHttp(credenciais, http=httplib2.Http())
+        _http_por_thread.http = http
+    return http
+
+
+def obter_servico(caminho_credenciais=CAMINHO_CREDENCIAIS):
+    """Cliente da API do Drive compartilhado por todo o processo
+
+    O cliente é um só, mas cada requisição usa a conexão da thread que a
+    monta (sessões do Streamlit, workers de upload, sincronização), então
+    chamadas simultâneas não disputam o mesmo httplib2.Http.
+    """
+    global _servico
+    with _lock_servico:
+        if _servico is None:
+            creds = service_account.Credentials.from_service_account_file(
+                caminho_credenciais,
+                scopes=['https://www.googleapis.com/auth/drive']
+            )
+
+            def requisicao(http, *args, **kwargs):
+                return HttpRequest(_http_da_thread(creds), *args, **kwargs)
+
+            _servico = build('drive', 'v3', http=_http_da_thread(creds),
+                             requestBuilder=requisicao, cache_discovery=False)
+        return _servico
+
+
+def erro_transitorio(erro):
+    """Indica se vale a pena repetir a chamada que falhou"""
+    if isinstance(erro, HttpError):
+        return erro.resp.status in STATUS_TRANSITORIOS
+    return isinstance(erro, (ConnectionError, TimeoutError, socket.timeout))
+
+
+def _md5_arquivo(caminho, tamanho_bloco=1024 * 1024):
+    md5 = hashlib.md5()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b''):
+            md5.update(bloco)
+    return md5.hexdigest()
+
+
+class GoogleDriveManager:
+    def __init__(self, service=None, caminho_cache=CAMINHO_CACHE_PASTAS, ttl_cache=TTL_CACHE_PASTAS,
+                 max_uploads=MAX_UPLOADS_SIMULTANEOS, backoff_base=BACKOFF_BASE):
+        # `service` permite usar outro backend (ex.: drive_fake.FakeDriveService)
+        self._service = service
+        self.caminho_cache = caminho_cache
+        self.ttl_cache = ttl_cache
+        self.folders = self._setup_folders()
+
+        # Fila de uploads: um registro de status por envio, do mais antigo ao mais
+        # recente, e o envio responsável por cada conteúdo (pasta + md5)
+        self.backoff_base = backoff_base
+        self._executor = ThreadPoolExecutor(max_workers=max_uploads, thread_name_prefix='upload_drive')
+        self._lock_uploads = threading.Lock()
+        self._uploads = []
+        self._por_conteudo = {}
+
+    @property
+    def service(self):
+        """Cliente do Drive, criado só quando alguma chamada é necessária"""
+        if self._service is None:
+            self._service = obter_servico()
+        return self._service
+
+    def _setup_folders(self):
+        """IDs das pastas: do cache local ou com uma consulta + um lote de criações"""
+        ids = self._ler_cache()
+        if ids is not None:
+            return ids
+
+        ids = self._buscar_pastas(PASTAS)
+        faltando = [name for name in PASTAS if name not in ids]
+        if faltando:
+            ids.update(self._criar_pastas(faltando))
+        self._gravar_cache(ids)
+        return ids
+
+    def _buscar_pastas(self, names):
+        """Busca todas as pastas em uma única consulta"""
+        nomes = ' or '.join(f"name='{name}'" for name in names)
+        query = f"mimeType='{MIME_PASTA}' and trashed=false and ({nomes})"
+        ids = {}
+        page_token = None
+        while True:
+            results = self.service.files().list(
+                q=query, fields='nextPageToken, files(id, name)', pageSize=100, pageToken=page_token
+            ).execute()
+            for file in results.get('files', []):
+                ids.setdefault(file['name'], file['id'])
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                return ids
+
+    def _criar_pastas(self, names):
+        """Cria as pastas que faltam em um único batch request"""
+        ids = {}
+        erros = []
+
+        def callback(request_id, response, exception):
+            if exception is not None:
+                erros.append(exception)
+            else:
+                ids[request_id] = response['id']
+
+        batch = self.service.new_batch_http_request(callback=callback)
+        for name in names:
+            md = {'name': name, 'mimeType': MIME_PASTA}
+            batch.add(self.service.files().create(body=md, fields='id'), request_id=name)
+        batch.execute()
+        if erros:
+            raise erros[0]
+        return ids
+
+    def _ler_cache(self):
+        """IDs gravados no arquivo de cache, se ainda dentro do TTL"""
+        try:
+            with open(self.caminho_cache, encoding='utf-8') as arquivo:
+                cache = json.load(arquivo)
+        except (OSError, ValueError):
+            return None
+        if time.time() - cache.get('criado_em', 0) > self.ttl_cache:
+            return None
+        ids = cache.get('pastas', {})
+        if any(name not in ids for name in PASTAS):
+            return None
+        return ids
+
+    def _gravar_cache(self, ids):
+        diretorio = os.path.dirname(os.path.abspath(self.caminho_cache))
+        os.makedirs(diretorio, exist_ok=True)
+        temporario = self.caminho_cache + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump({'criado_em': time.time(), 'pastas': ids}, arquivo)
+        os.replace(temporario, self.caminho_cache)
+
+    def invalidar_cache(self):
+        """Descarta o cache local e resolve as pastas novamente"""
+        if os.path.exists(self.caminho_cache):
+            os.remove(self.caminho_cache)
+        self.folders = self._setup_folders()
+
+    # --- Uploads ------------------------------------------------------------
+
+    def enviar(self, origem, pasta, nome=None, mimetype=None):
+        """Coloca um arquivo (caminho ou bytes) na fila de upload da pasta
+
+        Retorna um Future com o ID do arquivo no Drive. O md5 é calculado no
+        worker, não na thread de quem chama; o mesmo conteúdo enviado de novo
+        para a mesma pasta reaproveita o upload em andamento ou já concluído
+        em vez de gerar outra cópia.
+        """
+        if isinstance(origem, (bytes, bytearray)):
+            if nome is None:
+                raise ValueError("Informe o nome do arquivo ao enviar bytes")
+            tamanho = len(origem)
+        else:
+            tamanho = os.path.getsize(origem)
+            nome = nome or os.path.basename(origem)
+        pasta_id = self.folders[pasta]
+
+        with self._lock_uploads:
+            self._podar_uploads()
+            registro = {
+                'nome': nome, 'pasta': pasta, 'md5': None, 'tamanho': tamanho,
+                'enviados': 0, 'tentativas': 0, 'estado': 'na fila', 'erro': None,
+                'criado_em': time.time(), 'terminado_em': None,
+            }
+            registro['futuro'] = self._executor.submit(
+                self._enviar, registro, origem, pasta_id,
+                mimetype or mimetypes.guess_type(nome)[0] or 'application/octet-stream'
+            )
+            self._uploads.append(registro)
+            return registro['futuro']
+
+    def _podar_uploads(self):
+        """Descarta registros de uploads terminados há mais que a retenção ou além do limite"""
+        agora = time.time()
+        terminados = [r for r in self._uploads if r['terminado_em'] is not None]
+        excedentes = len(self._uploads) - MAX_REGISTROS_UPLOADS
+        descartados = {
+            id(r) for i, r in enumerate(terminados)
+            if i < excedentes or agora - r['terminado_em'] > RETENCAO_UPLOADS
+        }
+        if not descartados:
+            return
+        self._uploads = [r for r in self._uploads if id(r) not in descartados]
+        self._por_conteudo = {c: r for c, r in self._por_conteudo.items() if id(r) not in descartados}
+
+    def em_segundo_plano(self, funcao, *args):
+        """Roda `funcao` no pool dos uploads (ex.: gerar o arquivo que será enviado)"""
+        return self._executor.submit(funcao, *args)
+
+    def status_uploads(self):
+        """Cópia do estado de cada upload, do mais recente para o mais antigo"""
+        with self._lock_uploads:
+            self._podar_uploads()
+            registros = [{k: v for k, v in r.items() if k != 'futuro'} for r in self._uploads]
+        return sorted(registros, key=lambda r: r['criado_em'], reverse=True)
+
+    def uploads_ativos(self):
+        return sum(r['estado'] in ('na fila', 'enviando') for r in self.status_uploads())
+
+    def _com_retentativas(self, registro, chamada):
+        """Executa a chamada repetindo falhas transitórias com backoff exponencial"""
+        for tentativa in range(MAX_TENTATIVAS):
+            try:
+                return chamada()
+            except Exception as e:
+                if not erro_transitorio(e) or tentativa == MAX_TENTATIVAS - 1:
+                    raise
+                registro['tentativas'] += 1
+                time.sleep(self.backoff_base * (2 ** tentativa + random.random()))
+
+    def _buscar_existente(self, registro, pasta_id):
+        """ID de um arquivo de mesmo nome e mesmo md5 que já esteja na pasta"""
+        nome = registro['nome'].replace("\\", "\\\\").replace("'", "\\'")
+        query = f"'{pasta_id}' in parents and name='{nome}' and trashed=false"
+        results = self._com_retentativas(registro, self.service.files().list(
+            q=query, fields='files(id, md5Checksum)', pageSize=100
+        ).execute)
+        for arquivo in results.get('files', []):
+            if arquivo.get('md5Checksum') == registro['md5']:
+                return arquivo['id']
+        return None
+
+    def _enviar(self, registro, origem, pasta_id, mimetype):
+        registro['estado'] = 'enviando'
+        try:
+            if isinstance(origem, (bytes, bytearray)):
+                registro['md5'] = hashlib.md5(origem).hexdigest()
+            else:
+                registro['md5'] = _md5_arquivo(origem)
+
+            # O primeiro envio de cada conteúdo faz o upload; os demais esperam por ele
+            chave = (pasta_id, registro['md5'])
+            with self._lock_uploads:
+                anterior = self._por_conteudo.get(chave)
+                if anterior is None or anterior['estado'] == 'erro':
+                    self._por_conteudo[chave] = registro
+                    anterior = None
+            if anterior is not None:
+                try:
+                    file_id = anterior['futuro'].result()
+                except Exception:
+                    pass  # o envio anterior falhou: este segue com o próprio upload
+                else:
+                    registro.update(estado='duplicado', enviados=registro['tamanho'])
+                    return file_id
+
+            existente = self._buscar_existente(registro, pasta_id)
+            if existente is not None:
+                registro.update(estado='duplicado', enviados=registro['tamanho'])
+                return existente
+
+            resumable = registro['tamanho'] > LIMITE_UPLOAD_SIMPLES
+            if isinstance(origem, (bytes, bytearray)):
+                media = MediaIoBaseUpload(io.BytesIO(origem), mimetype=mimetype,
+                                          chunksize=TAMANHO_CHUNK, resumable=resumable)
+            else:
+                media = MediaFileUpload(origem, mimetype=mimetype,
+                                        chunksize=TAMANHO_CHUNK, resumable=resumable)
+            request = self.service.files().create(
+                body={'name': registro['nome'], 'parents': [pasta_id]},
+                media_body=media, fields='id, md5Checksum'
+            )
+
+            if resumable:
+                # next_chunk retoma a sessão do ponto confirmado pelo servidor após uma falha
+                resposta = None
+                while resposta is None:
+                    progresso, resposta = self._com_retentativas(registro, request.next_chunk)
+                    if progresso is not None:
+                        registro['enviados'] = progresso.resumable_progress
+            else:
+                resposta = self._com_retentativas(registro, request.execute)
+
+            if resposta.get('md5Checksum', registro['md5']) != registro['md5']:
+                raise IOError(f"Checksum divergente após o upload de {registro['nome']}")
+            registro.update(estado='concluído', enviados=registro['tamanho'])
+            return resposta['id']
+        except Exception as e:
+            registro.update(estado='erro', erro=str(e))
+            raise
+        finally:
+            registro['terminado_em'] = time.time()
@@ -0,0 +1,188 @@
+# estilos.py
+
+import hashlib
+import os
+import re
+from functools import lru_cache
+
+import streamlit as st
+
+DIRETORIO_CSS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "css")
+
+# URL relativa servida pelo Streamlit quando server.enableStaticServing = true
+URL_CSS = "app/static/css"
+
+# CSS base responsivo (comum a todos os dispositivos)
+CSS_BASE = """
+/* Reset e base */
+.main .block-container {
+    padding-top: 1rem;
+    padding-bottom: 1rem;
+}
+
+/* Botões touch-friendly */
+.stButton > button {
+    min-height: 44px;
+    font-size: 16px !important;
+    border-radius: 8px;
+    font-weight: 500;
+}
+
+/* Inputs otimizados para mobile */
+.stTextInput > div > div > input,
+.stSelectbox select,
+.stNumberInput > div > div > input {
+    font-size: 16px !important;
+    padding: 12px !important;
+    border-radius: 8px;
+}
+
+/* Métricas responsivas */
+.metric-container {
+    background: #f0f2f6;
+    padding: 1rem;
+    border-radius: 10px;
+    margin: 0.5rem 0;
+}
+"""
+
+# CSS específico por dispositivo
+CSS_SMARTPHONE = """
+/* Mobile específico */
+.main .block-container {
+    padding-left: 1rem;
+    padding-right: 1rem;
+    max-width: 100%;
+}
+
+.stButton > button {
+    width: 100%;
+    margin-bottom: 0.5rem;
+}
+
+.stDataFrame {
+    font-size: 12px;
+    overflow-x: auto;
+}
+
+/* Ocultar elementos não essenciais no mobile */
+.st-emotion-cache-1y4p8pa {
+    padding: 0.5rem;
+}
+
+/* Sidebar compacta no mobile */
+.css-1d391kg {
+    width: 280px;
+}
+"""
+
+CSS_TABLET = """
+/* Tablet específico */
+.main .block-container {
+    padding-left: 2rem;
+    padding-right: 2rem;
+    max-width: 1000px;
+}
+
+.stColumns > div {
+    padding: 0.5rem;
+}
+"""
+
+CSS_DESKTOP = """
+/* Desktop específico */
+.main .block-container {
+    max-width: 1200px;
+    padding: 3rem 1rem;
+}
+"""
+
+# CSS das páginas de app_controle_vendas.py e app.py
+CSS_CONTROLE_VENDAS = """
+.main-header {
+    font-size: 2.5rem;
+    color: #1f77b4;
+    text-align: center;
+    margin-bottom: 2rem;
+}
+.metric-card {
+    background-color: #f0f2f6;
+    padding: 1rem;
+    border-radius: 0.5rem;
+    border-left: 5px solid #1f77b4;
+}
+.status-ativo { color: #28a745; }
+.status-pendente { color: #ffc107; }
+.status-cancelado { color: #dc3545; }
+"""
+
+CSS_APP = """
+.main-header {
+    font-size: 2.5rem;
+    color: #1f77b4;
+    text-align: center;
+    padding: 1rem 0;
+    border-bottom: 2px solid #1f77b4;
+    margin-bottom: 2rem;
+}
+.metric-card {
+    background-color: #f8f9fa;
+    padding: 1rem;
+    border-radius: 10px;
+    border-left: 4px solid #1f77b4;
+}
+.sidebar .sidebar-content {
+    background-color: #f1f3f4;
+}
+"""
+
+FOLHAS = {
+    "smartphone": CSS_BASE + CSS_SMARTPHONE,
+    "small_tablet": CSS_BASE + CSS_TABLET,
+    "tablet": CSS_BASE + CSS_TABLET,
+    "desktop": CSS_BASE + CSS_DESKTOP,
+    "controle_vendas": CSS_CONTROLE_VENDAS,
+    "app": CSS_APP,
+}
+
+
+def minificar(css):
+    """Remove comentários e espaços desnecessários do CSS"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{}:;,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+@lru_cache(maxsize=None)
+def compilar_folhas():
+    """Minifica as folhas e grava em static/css com o hash do conteúdo no nome
+
+    Executado uma vez por processo. Como o nome muda junto com o conteúdo, o
+    navegador pode manter o arquivo em cache e revalidá-lo só pelo ETag.
+    Retorna {nome: (arquivo, css minificado)}.
+    """
+    os.makedirs(DIRETORIO_CSS, exist_ok=True)
+    compiladas = {}
+    for nome, css in FOLHAS.items():
+        minificado = minificar(css)
+        resumo = hashlib.sha256(minificado.encode("utf-8")).hexdigest()[:12]
+        arquivo = f"vitrine-{nome}.{resumo}.css"
+        caminho = os.path.join(DIRETORIO_CSS, arquivo)
+        if not os.path.exists(caminho):
+            temporario = caminho + ".tmp"
+            with open(temporario, "w", encoding="utf-8") as saida:
+                saida.write(minificado)
+            os.replace(temporario, caminho)
+        compiladas[nome] = (arquivo, minificado)
+    return compiladas
+
+
+def aplicar_estilo(nome):
+    """Injeta a folha pré-compilada: só um <link> quando há static serving"""
+    arquivo, minificado = compilar_folhas()[nome]
+    if st.get_option("server.enableStaticServing"):
+        st.markdown(f'<link rel="stylesheet" href="{URL_CSS}/{arquivo}">', unsafe_allow_html=True)
+    else:
+        # Sem static serving, envia o CSS já minificado em linha
+        st.markdown(f"<style>{minificado}</style>", unsafe_allow_html=True)
@@ -0,0 +1,166 @@
+# exportacao.py
+
+import glob
+import gzip
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing
+
+import pandas as pd
+
+from metricas_desempenho import cronometro
+from repositorio_dados import COLUNAS_DATA, ESQUEMA
+
+DIRETORIO_EXPORTACOES = os.environ.get("VITRINE_EXPORTACOES", os.path.join("dados", "exportacoes"))
+
+# Linhas lidas do banco e gravadas no arquivo por vez
+LINHAS_POR_BLOCO = 50_000
+
+# Limite de linhas de uma aba do Excel (incluindo o cabeçalho)
+LINHAS_POR_ABA_XLSX = 1_048_575
+
+FORMATOS = {
+    "csv.gz": "application/gzip",
+    "parquet": "application/vnd.apache.parquet",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def escrever_csv_gz(blocos, caminho):
+    """Grava os blocos em um CSV compactado, um bloco por vez"""
+    with gzip.open(caminho, "wt", encoding="utf-8", newline="") as arquivo:
+        for i, bloco in enumerate(blocos):
+            bloco.to_csv(arquivo, index=False, header=(i == 0))
+
+
+def esquema_parquet(tabela):
+    """Esquema Arrow das colunas da tabela, a partir dos tipos declarados no ESQUEMA
+
+    Vale para o arquivo todo: uma coluna inteiramente vazia no primeiro
+    bloco (ex.: adicionada depois com ALTER TABLE) não vira tipo null.
+    """
+    import pyarrow as pa
+
+    tipos = {"TEXT": pa.string(), "INTEGER": pa.int64(), "REAL": pa.float64()}
+    campos = []
+    for coluna, tipo in ESQUEMA[tabela].items():
+        if coluna in COLUNAS_DATA.get(tabela, []):
+            campos.append(pa.field(coluna, pa.timestamp("ns")))
+        else:
+            campos.append(pa.field(coluna, tipos[tipo.split()[0]]))
+    return pa.schema(campos)
+
+
+def escrever_parquet(blocos, caminho, esquema=None):
+    """Grava os blocos como row groups de um único arquivo Parquet
+
+    Sem `esquema`, usa o do primeiro bloco.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    escritor = None
+    try:
+        for bloco in blocos:
+            if esquema is not None:
+                campos = pa.schema([esquema.field(c) for c in bloco.columns])
+                tabela = pa.Table.from_pandas(bloco, schema=campos, preserve_index=False)
+            else:
+                tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+            if escritor is None:
+                escritor = pq.ParquetWriter(caminho, tabela.schema)
+            escritor.write_table(tabela.cast(escritor.schema))
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+
+def escrever_xlsx(blocos, caminho):
+    """Grava os blocos com xlsxwriter em modo constant_memory (linha a linha)"""
+    import xlsxwriter
+
+    planilha = xlsxwriter.Workbook(caminho, {"constant_memory": True})
+    formato_data = planilha.add_format({"num_format": "dd/mm/yyyy"})
+    aba, linha = None, 0
+    try:
+        for bloco in blocos:
+            colunas_data = {i for i, c in enumerate(bloco.columns)
+                            if pd.api.types.is_datetime64_any_dtype(bloco[c])}
+            bloco = bloco.astype(object).where(bloco.notna(), None)
+            for valores in bloco.itertuples(index=False, name=None):
+                if aba is None or linha > LINHAS_POR_ABA_XLSX:
+                    aba = planilha.add_worksheet()
+                    aba.write_row(0, 0, list(bloco.columns))
+                    linha = 1
+                for coluna, valor in enumerate(valores):
+                    if coluna in colunas_data and valor is not None:
+                        aba.write_datetime(linha, coluna, valor.to_pydatetime(), formato_data)
+                    else:
+                        aba.write(linha, coluna, valor)
+                linha += 1
+    finally:
+        planilha.close()
+
+
+ESCRITORES = {
+    "csv.gz": escrever_csv_gz,
+    "parquet": escrever_parquet,
+    "xlsx": escrever_xlsx,
+}
+
+
+class ExportadorDados:
+    """Gera exportações em segundo plano, com cache em disco por versão dos dados
+
+    Cada arquivo leva a versão da tabela no nome: enquanto a tabela não muda,
+    novos pedidos reaproveitam o arquivo pronto (ou o que está sendo gerado).
+    """
+
+    def __init__(self, repositorio, diretorio=DIRETORIO_EXPORTACOES, max_workers=2):
+        self.repositorio = repositorio
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="exportacao")
+        self._pendentes = {}
+        self._lock = threading.Lock()
+
+    def caminho(self, tabela, formato, versao=None):
+        """Caminho do arquivo de exportação da tabela na versão atual"""
+        revisao, ultimo = versao or self.repositorio.versao(tabela)
+        return os.path.join(self.diretorio, f"{tabela}_r{revisao}_u{ultimo}.{formato}")
+
+    def solicitar(self, tabela, formato):
+        """Pede a exportação e retorna um Future com o caminho do arquivo"""
+        caminho = self.caminho(tabela, formato)
+        with self._lock:
+            if os.path.exists(caminho):
+                pronto = Future()
+                pronto.set_result(caminho)
+                return pronto
+            if caminho not in self._pendentes:
+                self._pendentes[caminho] = self._executor.submit(self._gerar, tabela, formato, caminho)
+            return self._pendentes[caminho]
+
+    def _gerar(self, tabela, formato, caminho):
+        temporario = caminho + ".tmp"
+        try:
+            opcoes = {"esquema": esquema_parquet(tabela)} if formato == "parquet" else {}
+            # closing: a leitura termina (e fecha a conexão) nesta thread, mesmo se a escrita falhar
+            with cronometro(f"exportacao_{tabela}_{formato}") as info, \
+                    closing(self.repositorio.iterar_blocos(tabela, LINHAS_POR_BLOCO)) as blocos:
+                ESCRITORES[formato](blocos, temporario, **opcoes)
+                os.replace(temporario, caminho)
+                info["bytes"] = os.path.getsize(caminho)
+            self._remover_versoes_antigas(tabela, formato, caminho)
+            return caminho
+        finally:
+            with self._lock:
+                self._pendentes.pop(caminho, None)
+            if os.path.exists(temporario):
+                os.remove(temporario)
+
+    def _remover_versoes_antigas(self, tabela, formato, atual):
+        for arquivo in glob.glob(os.path.join(self.diretorio, f"{tabela}_r*_u*.{formato}")):
+            if arquivo != atual:
+                os.remove(arquivo)
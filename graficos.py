@@ -0,0 +1,104 @@
+# graficos.py
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from metricas_desempenho import registrar
+
+# Máximo de pontos enviados ao navegador por série temporal
+MAX_PONTOS = 1000
+
+# Séries originais acima deste número de pontos usam WebGL (Scattergl)
+LIMIAR_WEBGL = 1000
+
+# Barras exibidas antes de agrupar o restante em "Outros"
+TOP_N_BARRAS = 30
+
+
+def _numerico(valores):
+    """Converte o eixo x em números para o cálculo de áreas do LTTB
+
+    Datas viram ns; texto (ex.: mes 'AAAA-MM') é lido como data quando
+    possível e, senão, vale a posição do ponto no eixo.
+    """
+    valores = np.asarray(valores)
+    if valores.dtype.kind in 'OUS':
+        datas = pd.to_datetime(pd.Series(valores), errors='coerce', format='ISO8601')
+        if datas.notna().all():
+            return datas.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(float)
+        return np.arange(len(valores), dtype=float)
+    if np.issubdtype(valores.dtype, np.datetime64):
+        return valores.astype('datetime64[ns]').astype(np.int64).astype(float)
+    return valores.astype(float)
+
+
+def lttb(x, y, n_saida):
+    """Índices selecionados pelo Largest-Triangle-Three-Buckets
+
+    Preserva picos e vales da série mantendo sempre o primeiro e o último ponto.
+    """
+    n = len(x)
+    if n_saida >= n or n_saida < 3:
+        return np.arange(n)
+    x = _numerico(x)
+    y = np.asarray(y, dtype=float)
+
+    limites = np.linspace(1, n - 1, n_saida - 1).astype(int)
+    selecionados = np.empty(n_saida, dtype=np.intp)
+    selecionados[0] = 0
+    anterior = 0
+    for i in range(n_saida - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        # Média do próximo bucket (ou o último ponto, no bucket final)
+        prox_fim = limites[i + 2] if i + 2 < len(limites) else n
+        media_x = x[fim:prox_fim].mean() if prox_fim > fim else x[-1]
+        media_y = y[fim:prox_fim].mean() if prox_fim > fim else y[-1]
+        areas = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        selecionados[i + 1] = anterior
+    selecionados[-1] = n - 1
+    return selecionados
+
+
+def reduzir_serie(df, x, y, max_pontos=MAX_PONTOS):
+    """Reduz a série a no máximo `max_pontos` pontos com LTTB"""
+    if len(df) <= max_pontos:
+        return df
+    df = df.sort_values(x)
+    return df.iloc[lttb(df[x].to_numpy(), df[y].to_numpy(), max_pontos)]
+
+
+def grafico_linha(df, x, y, title, max_pontos=MAX_PONTOS, **kwargs):
+    """px.line com redução LTTB e WebGL para séries grandes"""
+    reduzido = reduzir_serie(df, x, y, max_pontos)
+    fig = px.line(
+        reduzido, x=x, y=y, title=title,
+        render_mode='webgl' if len(df) > LIMIAR_WEBGL else 'auto',
+        **kwargs
+    )
+    registrar(f"grafico: {title}", pontos_originais=len(df), pontos_enviados=len(reduzido))
+    return fig
+
+
+def top_n(df, x, y, n=TOP_N_BARRAS, rotulo_outros='Outros'):
+    """Mantém as n maiores barras e soma as demais em uma barra "Outros" """
+    if len(df) <= n:
+        return df
+    ordenado = df.sort_values(y, ascending=False)
+    principais, restantes = ordenado.iloc[:n], ordenado.iloc[n:]
+    outros = {coluna: rotulo_outros for coluna in df.columns if coluna != y}
+    outros[x] = f"{rotulo_outros} ({len(restantes):,})"
+    outros[y] = restantes[y].sum()
+    return pd.concat([principais, pd.DataFrame([outros])], ignore_index=True)
+
+
+def grafico_barras(df, x, y, title, n=TOP_N_BARRAS, **kwargs):
+    """px.bar limitado às top-n barras, com as demais agrupadas em "Outros" """
+    reduzido = top_n(df[[c for c in df.columns if c in {x, y, kwargs.get('color')}]], x, y, n)
+    fig = px.bar(reduzido, x=x, y=y, title=title, **kwargs)
+    registrar(f"grafico: {title}", pontos_originais=len(df), pontos_enviados=len(reduzido))
+    return fig
@@ -0,0 +1,381 @@
+# imagens_catalogo.py
+
+import hashlib
+import html
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import streamlit as st
+
+from cache_versionado import CacheVersionado
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pillow é opcional (requirements_mobile.txt)
+    Image = None
+
+# Fotos originais dos produtos, uma por código (<codigo>.jpg, .png...)
+DIRETORIO_ORIGINAIS = os.environ.get("VITRINE_IMAGENS", os.path.join("dados", "imagens"))
+
+# Miniaturas dentro de static/: com static serving o navegador as baixa direto, com cache
+DIRETORIO_MINIATURAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "miniaturas")
+URL_MINIATURAS = "app/static/miniaturas"
+
+# Espaço máximo em disco das miniaturas; acima dele saem as menos usadas
+LIMITE_CACHE_MB = float(os.environ.get("VITRINE_LIMITE_MINIATURAS_MB", 200))
+
+# Larguras geradas para cada foto (px); a página escolhe pela largura da tela
+TAMANHOS_MINIATURA = (160, 320, 480, 640)
+QUALIDADE_WEBP = 80
+
+EXTENSOES_IMAGEM = (".jpg", ".jpeg", ".png", ".webp")
+PASTA_IMAGENS_DRIVE = "03_Imagens"
+
+# Produtos por lote da grade; o lote seguinte já é preparado em segundo plano
+ITENS_POR_LOTE = 24
+
+# Intervalo mínimo entre dois "toques" de acesso no mesmo arquivo (mtime = recência no LRU)
+INTERVALO_TOQUE = 60
+
+_cache = CacheVersionado(max_itens=2)
+
+
+def disponivel():
+    """Indica se as miniaturas podem ser geradas (pillow instalado)"""
+    return Image is not None
+
+
+def colunas_grade(largura):
+    """Colunas da grade do catálogo para a largura da tela"""
+    if largura <= 480:
+        return 2
+    if largura <= 768:
+        return 3
+    if largura <= 1024:
+        return 4
+    return 6
+
+
+def tamanho_miniatura(largura, colunas=None, densidade=1.0):
+    """Menor tamanho gerado que cobre a célula da grade nesta tela
+
+    A densidade de pixels (telas retina) é limitada a 2: acima disso a
+    diferença não aparece e o tráfego de dados móveis dobra de novo.
+    """
+    colunas = colunas or colunas_grade(largura)
+    necessario = largura / colunas * min(max(densidade or 1.0, 1.0), 2.0)
+    for tamanho in TAMANHOS_MINIATURA:
+        if tamanho >= necessario:
+            return tamanho
+    return TAMANHOS_MINIATURA[-1]
+
+
+def _nome_miniatura(resumo, tamanho):
+    return f"{resumo[:24]}_{tamanho}.webp"
+
+
+def _gerar_miniaturas(original, destinos):
+    """Executado no processo de trabalho: gera todos os tamanhos de uma foto
+
+    A foto é decodificada uma vez (JPEG já reduzido na decodificação, via
+    draft) e cada tamanho sai do anterior, do maior para o menor.
+    Retorna [(nome, bytes)] dos arquivos gravados.
+    """
+    gravados = []
+    with Image.open(original) as imagem:
+        maior = max(tamanho for tamanho, _ in destinos)
+        imagem.draft("RGB", (maior, maior))
+        imagem = ImageOps.exif_transpose(imagem)
+        imagem = imagem.convert("RGBA" if "A" in imagem.getbands() else "RGB")
+        for tamanho, caminho in sorted(destinos, reverse=True):
+            imagem.thumbnail((tamanho, tamanho), Image.LANCZOS)
+            temporario = f"{caminho}.{os.getpid()}.tmp"
+            imagem.save(temporario, "WEBP", quality=QUALIDADE_WEBP, method=4)
+            os.replace(temporario, caminho)
+            gravados.append((os.path.basename(caminho), os.path.getsize(caminho)))
+    return gravados
+
+
+class CacheMiniaturas:
+    """Diretório de miniaturas endereçado por conteúdo, com descarte LRU por espaço
+
+    A recência de cada arquivo fica no próprio mtime, então a ordem do LRU
+    sobrevive a reinícios do processo.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_MINIATURAS, limite_bytes=LIMITE_CACHE_MB * 1024 * 1024):
+        self.diretorio = diretorio
+        self.limite_bytes = limite_bytes
+        self.descartados = 0
+        os.makedirs(diretorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self._arquivos = OrderedDict()
+        self._acessos = {}
+        self.total_bytes = 0
+        entradas = [e for e in os.scandir(diretorio) if e.is_file() and e.name.endswith(".webp")]
+        for entrada in sorted(entradas, key=lambda e: e.stat().st_mtime):
+            estado = entrada.stat()
+            self._arquivos[entrada.name] = estado.st_size
+            self._acessos[entrada.name] = estado.st_mtime
+            self.total_bytes += estado.st_size
+        self._descartar()
+
+    def __contains__(self, nome):
+        return nome in self._arquivos
+
+    def acessar(self, nome):
+        """Marca o arquivo como usado agora; False se não estiver no cache"""
+        agora = time.time()
+        with self._lock:
+            if nome not in self._arquivos:
+                return False
+            self._arquivos.move_to_end(nome)
+            tocar = agora - self._acessos.get(nome, 0) > INTERVALO_TOQUE
+            if tocar:
+                self._acessos[nome] = agora
+        if tocar:
+            try:
+                os.utime(os.path.join(self.diretorio, nome))
+            except OSError:
+                pass
+        return True
+
+    def registrar(self, arquivos):
+        """Inclui arquivos recém-gravados [(nome, bytes)] e descarta o excedente"""
+        agora = time.time()
+        with self._lock:
+            for nome, tamanho in arquivos:
+                self.total_bytes += tamanho - self._arquivos.pop(nome, 0)
+                self._arquivos[nome] = tamanho
+                self._acessos[nome] = agora
+            self._descartar()
+
+    def _descartar(self):
+        # Mantém ao menos o arquivo mais recente, mesmo que sozinho passe do limite
+        while self.total_bytes > self.limite_bytes and len(self._arquivos) > 1:
+            nome, tamanho = self._arquivos.popitem(last=False)
+            self._acessos.pop(nome, None)
+            self.total_bytes -= tamanho
+            self.descartados += 1
+            try:
+                os.remove(os.path.join(self.diretorio, nome))
+            except OSError:
+                pass
+
+
+class PipelineImagens:
+    """Miniaturas das fotos do catálogo geradas em um pool de processos
+
+    Cada foto é identificada pelo hash do conteúdo: a mesma foto em dois
+    produtos gera as miniaturas uma única vez, e trocar a foto de um produto
+    gera novas miniaturas sem reaproveitar as antigas. Só as fotos pedidas
+    pela grade (os produtos visíveis) são processadas.
+    """
+
+    def __init__(self, diretorio_originais=DIRETORIO_ORIGINAIS, cache=None, max_workers=None):
+        self.diretorio_originais = diretorio_originais
+        self.cache = cache or CacheMiniaturas()
+        # spawn: o processo do Streamlit tem várias threads, e fork com threads não é seguro
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers or os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        self._lock = threading.Lock()
+        self._pendentes = {}
+        self._erros = {}
+        self._resumos = {}
+        self._originais = {}
+        self._mtime_diretorio = None
+
+    def _original(self, codigo):
+        """Caminho da foto original do produto (listagem refeita só quando a pasta muda)"""
+        try:
+            mtime = os.stat(self.diretorio_originais).st_mtime_ns
+        except OSError:
+            return None
+        if mtime != self._mtime_diretorio:
+            originais = {}
+            for entrada in os.scandir(self.diretorio_originais):
+                base, extensao = os.path.splitext(entrada.name)
+                if extensao.lower() in EXTENSOES_IMAGEM and entrada.is_file():
+                    originais[base] = entrada.path
+            self._originais, self._mtime_diretorio = originais, mtime
+        return self._originais.get(str(codigo))
+
+    def _resumo(self, caminho):
+        """sha256 da foto, recalculado só quando o arquivo muda"""
+        estado = os.stat(caminho)
+        assinatura = (estado.st_mtime_ns, estado.st_size)
+        memorizado = self._resumos.get(caminho)
+        if memorizado is not None and memorizado[0] == assinatura:
+            return memorizado[1]
+        sha = hashlib.sha256()
+        with open(caminho, "rb") as arquivo:
+            for bloco in iter(lambda: arquivo.read(1024 * 1024), b""):
+                sha.update(bloco)
+        resumo = sha.hexdigest()
+        self._resumos[caminho] = (assinatura, resumo)
+        return resumo
+
+    def miniatura(self, codigo, tamanho):
+        """Nome do arquivo da miniatura pronta, ou None (gerando ou sem foto)"""
+        original = self._original(codigo)
+        if original is None:
+            return None
+        try:
+            resumo = self._resumo(original)
+        except OSError:
+            return None
+        nome = _nome_miniatura(resumo, tamanho)
+        if self.cache.acessar(nome):
+            return nome
+        self._solicitar(resumo, original)
+        return None
+
+    def preparar(self, codigos, tamanho):
+        """Agenda as miniaturas dos produtos sem esperar por elas (ex.: próximo lote)"""
+        for codigo in codigos:
+            self.miniatura(codigo, tamanho)
+
+    def _solicitar(self, resumo, original):
+        if Image is None:
+            return
+        with self._lock:
+            if resumo in self._pendentes or resumo in self._erros:
+                return
+            destinos = [(tamanho, os.path.join(self.cache.diretorio, _nome_miniatura(resumo, tamanho)))
+                        for tamanho in TAMANHOS_MINIATURA]
+            futuro = self._executor.submit(_gerar_miniaturas, original, destinos)
+            self._pendentes[resumo] = futuro
+        # Fora do lock: se o futuro já terminou, o callback roda nesta mesma thread
+        futuro.add_done_callback(lambda f: self._concluir(resumo, f))
+
+    def _concluir(self, resumo, futuro):
+        try:
+            self.cache.registrar(futuro.result())
+        except Exception as e:
+            # Foto corrompida não é reprocessada até mudar de conteúdo
+            with self._lock:
+                self._erros[resumo] = str(e)
+        with self._lock:
+            self._pendentes.pop(resumo, None)
+
+    def pendentes(self):
+        with self._lock:
+            return len(self._pendentes)
+
+    def encerrar(self):
+        self._executor.shutdown(wait=True)
+
+
+def sincronizar_imagens(drive, diretorio=DIRETORIO_ORIGINAIS, pasta=PASTA_IMAGENS_DRIVE):
+    """Baixa da pasta de imagens do Drive as fotos novas ou alteradas
+
+    Compara o md5Checksum do Drive com o arquivo local; retorna quantas
+    fotos foram baixadas.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    files = drive.service.files()
+    query = f"'{drive.folders[pasta]}' in parents and trashed=false"
+    baixadas, page_token = 0, None
+    while True:
+        results = files.list(q=query, fields="nextPageToken, files(id, name, md5Checksum)",
+                             pageSize=1000, pageToken=page_token).execute()
+        for arquivo in results.get("files", []):
+            if not arquivo["name"].lower().endswith(EXTENSOES_IMAGEM):
+                continue
+            caminho = os.path.join(diretorio, os.path.basename(arquivo["name"]))
+            if os.path.exists(caminho):
+                with open(caminho, "rb") as local:
+                    if hashlib.md5(local.read()).hexdigest() == arquivo.get("md5Checksum"):
+                        continue
+            temporario = caminho + ".tmp"
+            with open(temporario, "wb") as saida:
+                saida.write(files.get_media(fileId=arquivo["id"]).execute())
+            os.replace(temporario, caminho)
+            baixadas += 1
+        page_token = results.get("nextPageToken")
+        if not page_token:
+            return baixadas
+
+
+def produtos_catalogo(repositorio):
+    """Produtos exibidos no catálogo (cache por versão)"""
+    return _cache.obter(
+        "catalogo", repositorio.versao("produtos"),
+        lambda: repositorio.carregar("produtos", ["codigo", "nome", "categoria", "preco"])
+    )
+
+
+def _moeda(valor):
+    return "R$ " + f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+@st.fragment(run_every=1)
+def acompanhar_miniaturas(pipeline):
+    """Atualiza a grade quando as miniaturas em geração ficam prontas"""
+    if pipeline.pendentes() == 0:
+        st.rerun()
+    st.caption(f"⏳ Preparando {pipeline.pendentes()} imagens...")
+
+
+def grade_catalogo(produtos, pipeline, largura=1200, densidade=1.0, chave="catalogo"):
+    """Grade de produtos com miniaturas no tamanho da tela, carregada por lotes
+
+    Só os produtos visíveis (e o lote seguinte) têm miniaturas geradas. Com
+    static serving, as imagens vão como <img loading="lazy">: o navegador só
+    as baixa quando entram na área visível, à medida que a grade rola.
+    """
+    colunas = colunas_grade(largura)
+    tamanho = tamanho_miniatura(largura, colunas, densidade)
+    chave_visiveis = f"{chave}_visiveis"
+    visiveis = st.session_state.setdefault(chave_visiveis, ITENS_POR_LOTE)
+    pagina = produtos.head(visiveis)
+
+    miniaturas = [pipeline.miniatura(codigo, tamanho) for codigo in pagina["codigo"]]
+    proximos = produtos["codigo"].iloc[visiveis:visiveis + ITENS_POR_LOTE]
+    pipeline.preparar(proximos, tamanho)
+
+    if st.get_option("server.enableStaticServing"):
+        celulas = []
+        for (codigo, nome, preco), arquivo in zip(
+            pagina[["codigo", "nome", "preco"]].itertuples(index=False), miniaturas
+        ):
+            if arquivo is not None:
+                imagem = (f'<img src="{URL_MINIATURAS}/{arquivo}" loading="lazy" decoding="async" '
+                          f'alt="{html.escape(str(nome))}" style="width:100%;aspect-ratio:1;object-fit:contain">')
+            else:
+                imagem = '<div style="width:100%;aspect-ratio:1;background:#F0F2F6;border-radius:8px"></div>'
+            celulas.append(
+                f'<div>{imagem}<div style="font-size:0.85rem"><b>{html.escape(str(nome))}</b><br>'
+                f'{html.escape(str(codigo))} · {_moeda(preco)}</div></div>'
+            )
+        st.markdown(
+            f'<div style="display:grid;grid-template-columns:repeat({colunas},1fr);gap:12px">'
+            + "".join(celulas) + "</div>",
+            unsafe_allow_html=True
+        )
+    else:
+        # Sem static serving, cada miniatura segue pelo servidor de mídia do Streamlit
+        for inicio in range(0, len(pagina), colunas):
+            for coluna, (_, produto), arquivo in zip(
+                st.columns(colunas), pagina.iloc[inicio:inicio + colunas].iterrows(),
+                miniaturas[inicio:inicio + colunas]
+            ):
+                with coluna:
+                    if arquivo is not None:
+                        st.image(os.path.join(pipeline.cache.diretorio, arquivo), use_container_width=True)
+                    st.markdown(f"**{produto['nome']}**")
+                    st.caption(f"{produto['codigo']} · {_moeda(produto['preco'])}")
+
+    if pipeline.pendentes():
+        acompanhar_miniaturas(pipeline)
+    if visiveis < len(produtos):
+        st.caption(f"Exibindo {len(pagina):,} de {len(produtos):,} produtos")
+        if st.button("⬇️ Carregar mais", key=f"{chave}_mais"):
+            st.session_state[chave_visiveis] = visiveis + ITENS_POR_LOTE
+            st.rerun()
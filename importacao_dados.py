@@ -0,0 +1,169 @@
+# importacao_dados.py
+
+import os
+
+import pandas as pd
+
+from colunas_derivadas import valor_total
+
+# Orçamento de memória (MB) para cada bloco lido durante a importação
+ORCAMENTO_MEMORIA_MB = float(os.environ.get("VITRINE_ORCAMENTO_IMPORTACAO_MB", 64))
+
+# Linhas lidas para estimar o tamanho de cada linha em memória
+LINHAS_AMOSTRA = 1000
+
+# Margem para cópias feitas durante a conversão e a gravação de cada bloco
+FATOR_SEGURANCA = 4
+
+COLUNAS_OBRIGATORIAS = {
+    "produtos": {"codigo", "nome", "categoria", "preco", "estoque", "estoque_minimo"},
+    "clientes": {"nome", "email", "telefone", "status", "cidade"},
+    "vendas": {"data", "cliente_id", "produto_codigo", "quantidade", "valor_unitario", "status"},
+}
+
+
+def identificar_tabela(colunas):
+    """Identifica a tabela de destino pelas colunas da planilha"""
+    colunas = {str(c).strip().lower() for c in colunas}
+    for tabela, obrigatorias in COLUNAS_OBRIGATORIAS.items():
+        if obrigatorias <= colunas:
+            return tabela
+    return None
+
+
+def linhas_por_bloco(amostra, orcamento_mb=ORCAMENTO_MEMORIA_MB):
+    """Calcula quantas linhas cabem em um bloco dentro do orçamento de memória"""
+    if amostra.empty:
+        return LINHAS_AMOSTRA
+    bytes_por_linha = amostra.memory_usage(deep=True, index=False).sum() / len(amostra)
+    linhas = int(orcamento_mb * 1024 ** 2 / (bytes_por_linha * FATOR_SEGURANCA))
+    return max(100, linhas)
+
+
+def _tamanho_arquivo(arquivo):
+    """Tamanho em bytes de um arquivo aberto ou UploadedFile"""
+    tamanho = getattr(arquivo, "size", None)
+    if tamanho is None:
+        posicao = arquivo.tell()
+        tamanho = arquivo.seek(0, os.SEEK_END)
+        arquivo.seek(posicao)
+    return tamanho or 1
+
+
+def ler_amostra_csv(arquivo, linhas=LINHAS_AMOSTRA):
+    """Primeiras linhas de um CSV, sem ler o restante do arquivo"""
+    arquivo.seek(0)
+    amostra = pd.read_csv(arquivo, nrows=linhas)
+    arquivo.seek(0)
+    return amostra
+
+
+def ler_csv_em_blocos(arquivo, orcamento_mb=ORCAMENTO_MEMORIA_MB):
+    """Lê um CSV em blocos, gerando (bloco, fração lida do arquivo)"""
+    total = _tamanho_arquivo(arquivo)
+    amostra = ler_amostra_csv(arquivo)
+
+    with pd.read_csv(arquivo, chunksize=linhas_por_bloco(amostra, orcamento_mb)) as leitor:
+        for bloco in leitor:
+            yield bloco, min(arquivo.tell() / total, 1.0)
+
+
+def ler_excel_em_blocos(arquivo, orcamento_mb=ORCAMENTO_MEMORIA_MB):
+    """Lê a primeira aba de uma planilha Excel em modo somente leitura (openpyxl)"""
+    from openpyxl import load_workbook
+
+    arquivo.seek(0)
+    planilha = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        aba = planilha.worksheets[0]
+        total = max((aba.max_row or 0) - 1, 1)
+        linhas = aba.iter_rows(values_only=True)
+        cabecalho = [str(c) for c in next(linhas, ())]
+
+        tamanho_bloco = LINHAS_AMOSTRA
+        lidas = 0
+        buffer = []
+        for linha in linhas:
+            buffer.append(linha)
+            if len(buffer) >= tamanho_bloco:
+                bloco = pd.DataFrame(buffer, columns=cabecalho)
+                if lidas == 0:
+                    # O primeiro bloco (amostra) define o tamanho dos seguintes
+                    tamanho_bloco = linhas_por_bloco(bloco, orcamento_mb)
+                lidas += len(buffer)
+                buffer = []
+                yield bloco, min(lidas / total, 1.0)
+        if buffer:
+            yield pd.DataFrame(buffer, columns=cabecalho), 1.0
+    finally:
+        planilha.close()
+
+
+def ler_em_blocos(arquivo, nome, orcamento_mb=ORCAMENTO_MEMORIA_MB):
+    """Escolhe o leitor em blocos adequado à extensão do arquivo"""
+    if nome.lower().endswith(".csv"):
+        return ler_csv_em_blocos(arquivo, orcamento_mb)
+    return ler_excel_em_blocos(arquivo, orcamento_mb)
+
+
+def preparar_bloco(tabela, bloco):
+    """Normaliza nomes de colunas e calcula campos derivados do bloco"""
+    bloco.columns = [str(c).strip().lower() for c in bloco.columns]
+    if tabela == "vendas" and "valor_total" not in bloco.columns:
+        bloco["valor_total"] = valor_total(bloco)
+    return bloco
+
+
+def pre_visualizar(arquivo, nome, linhas=5):
+    """Lê só a amostra do início do arquivo para montar o preview
+
+    Os blocos dimensionados pelo orçamento de memória ficam para a
+    importação: no CSV o preview usa a leitura com `nrows`, e no Excel o
+    primeiro bloco já é a amostra de LINHAS_AMOSTRA linhas.
+    """
+    if nome.lower().endswith(".csv"):
+        amostra = ler_amostra_csv(arquivo)
+    else:
+        blocos = ler_excel_em_blocos(arquivo)
+        try:
+            amostra, _ = next(blocos, (pd.DataFrame(), 1.0))
+        finally:
+            blocos.close()
+    return amostra.head(linhas), identificar_tabela(amostra.columns)
+
+
+def importar_arquivo(arquivo, nome, repositorio, orcamento_mb=ORCAMENTO_MEMORIA_MB, ao_progredir=None,
+                     tabelas=None, representada=None, substituir_representada=False):
+    """Importa o arquivo bloco a bloco para o repositório
+
+    Cada bloco é gravado e descartado antes da leitura do próximo, de modo que
+    o pico de memória depende do orçamento e não do tamanho do arquivo.
+    `tabelas` restringe as tabelas de destino aceitas (None aceita todas).
+    `representada` preenche a coluna quando a planilha não a tiver. Com
+    `substituir_representada`, um arquivo de produtos é a tabela completa de
+    cada representada nele: os produtos delas ausentes do arquivo são
+    excluídos, e só as partições dessas representadas são regravadas.
+    Retorna a tabela de destino e o total de linhas importadas.
+    """
+    tabela = None
+    total = 0
+    importados = {}
+    for bloco, fracao in ler_em_blocos(arquivo, nome, orcamento_mb):
+        if tabela is None:
+            tabela = identificar_tabela(bloco.columns)
+            if tabela is None:
+                raise ValueError("Colunas não correspondem a produtos, clientes ou vendas")
+            if tabelas is not None and tabela not in tabelas:
+                raise ValueError(f"Arquivo de {tabela} não aceito aqui (esperado: {', '.join(tabelas)})")
+        bloco = preparar_bloco(tabela, bloco)
+        if representada and tabela in ("produtos", "vendas") and "representada" not in bloco.columns:
+            bloco["representada"] = representada
+        total += repositorio.inserir(tabela, bloco)
+        if substituir_representada and tabela == "produtos" and "representada" in bloco.columns:
+            for nome_representada, codigos in bloco.groupby(bloco["representada"].fillna(""))["codigo"]:
+                importados.setdefault(nome_representada, set()).update(codigos.astype(str))
+        if ao_progredir is not None:
+            ao_progredir(fracao, total)
+    for nome_representada, codigos in importados.items():
+        repositorio.podar_particao(tabela, nome_representada, codigos)
+    return tabela, total
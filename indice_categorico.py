@@ -0,0 +1,97 @@
+# indice_categorico.py
+
+import numpy as np
+import pandas as pd
+
+from cache_versionado import CacheVersionado
+from colunas_derivadas import COLUNAS_PRODUTOS, calcular_colunas, produtos_derivados
+
+
+class IndiceCategorico:
+    """Índice invertido (valor -> posições das linhas) para colunas de baixa cardinalidade
+
+    As colunas indexadas são armazenadas como categóricas. Um filtro vira a
+    interseção das listas de posições de cada valor escolhido, sem copiar nem
+    varrer a tabela inteira.
+    """
+
+    def __init__(self, df, colunas):
+        self.df = df.astype({c: 'category' for c in colunas})
+        self._posicoes = {}
+        for coluna in colunas:
+            categorias = self.df[coluna].cat.categories
+            codigos = self.df[coluna].cat.codes.to_numpy()
+            # Ordenação estável: as posições de cada valor ficam em ordem crescente
+            ordem = np.argsort(codigos, kind='stable')
+            limites = np.searchsorted(codigos[ordem], np.arange(len(categorias) + 1))
+            self._posicoes[coluna] = {
+                valor: ordem[limites[i]:limites[i + 1]]
+                for i, valor in enumerate(categorias)
+                if limites[i + 1] > limites[i]
+            }
+
+    def opcoes(self, coluna):
+        """Valores existentes na coluna (para os selectbox de filtro)"""
+        return list(self._posicoes[coluna])
+
+    def contagens(self, coluna):
+        """Número de linhas por valor da coluna, sem varrer a tabela"""
+        return pd.Series(
+            {valor: len(posicoes) for valor, posicoes in self._posicoes[coluna].items()},
+            name='quantidade'
+        ).rename_axis(coluna)
+
+    def posicoes(self, **filtros):
+        """Posições das linhas que atendem a todos os filtros (None = sem filtro)"""
+        listas = [
+            self._posicoes[coluna].get(valor, np.empty(0, dtype=np.intp))
+            for coluna, valor in filtros.items()
+            if valor is not None
+        ]
+        if not listas:
+            return None
+        # Começa pela lista mais curta para reduzir o custo das interseções
+        listas.sort(key=len)
+        resultado = listas[0]
+        for lista in listas[1:]:
+            resultado = np.intersect1d(resultado, lista, assume_unique=True)
+        return resultado
+
+    def filtrar(self, **filtros):
+        """Linhas que atendem aos filtros; sem filtros retorna a tabela indexada"""
+        posicoes = self.posicoes(**filtros)
+        if posicoes is None:
+            return self.df
+        return self.df.take(posicoes)
+
+
+_cache = CacheVersionado()
+
+
+def indice_produtos(repositorio, representadas=None):
+    """Índice de produtos por categoria e estoque baixo (cache por versão)
+
+    Com `representadas`, indexa só os produtos delas; a versão considerada é
+    a das partições dessas representadas, e não a da tabela inteira.
+    """
+    if representadas is None:
+        return _cache.obter(
+            'produtos', repositorio.versao('produtos'),
+            lambda: IndiceCategorico(produtos_derivados(repositorio), ['categoria', 'estoque_baixo'])
+        )
+    representadas = tuple(sorted(representadas))
+    return _cache.obter(
+        ('produtos', representadas), repositorio.versao_representadas('produtos', representadas),
+        lambda: IndiceCategorico(
+            calcular_colunas(repositorio.carregar('produtos', representadas=representadas), COLUNAS_PRODUTOS),
+            ['categoria', 'estoque_baixo']
+        )
+    )
+
+
+def indice_clientes(repositorio):
+    """Índice de clientes por status e cidade (cache por versão)"""
+    return _cache.obter(
+        'clientes', repositorio.versao('clientes'),
+        lambda: IndiceCategorico(repositorio.carregar('clientes'), ['status', 'cidade'])
+    )
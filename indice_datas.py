@@ -0,0 +1,208 @@
+# indice_datas.py
+
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from cache_versionado import CacheVersionado
+
+
+class IndiceDatas:
+    """Vendas ordenadas por data, com consulta de período por busca binária
+
+    Cada consulta custa O(log n) para achar os limites mais o tamanho do
+    período retornado, que é uma fatia da tabela ordenada (sem máscara booleana).
+    """
+
+    def __init__(self, df, coluna='data'):
+        self.df = df.sort_values(coluna, kind='stable', ignore_index=True)
+        self._datas = self.df[coluna].to_numpy(dtype='datetime64[ns]')
+
+    def __len__(self):
+        return len(self._datas)
+
+    @property
+    def minimo(self):
+        return pd.Timestamp(self._datas[0]) if len(self) else None
+
+    @property
+    def maximo(self):
+        return pd.Timestamp(self._datas[-1]) if len(self) else None
+
+    def limites(self, inicio=None, fim=None):
+        """Posições [a, b) das linhas com data entre inicio e fim (inclusive)"""
+        a = 0 if inicio is None else np.searchsorted(
+            self._datas, np.datetime64(pd.Timestamp(inicio).normalize(), 'ns'), side='left')
+        b = len(self) if fim is None else np.searchsorted(
+            self._datas, np.datetime64(pd.Timestamp(fim).normalize(), 'ns'), side='right')
+        return int(a), int(max(a, b))
+
+    def intervalo(self, inicio=None, fim=None):
+        """Linhas do período, como fatia da tabela ordenada"""
+        a, b = self.limites(inicio, fim)
+        return self.df.iloc[a:b]
+
+
+def limites_mes(mes):
+    """Datas 'AAAA-MM-01' do mês e do seguinte: `data >= ? AND data < ?` usa o índice de data"""
+    periodo = pd.Period(mes, freq='M')
+    return f'{periodo}-01', f'{periodo + 1}-01'
+
+
+def versao_tabela(conn, tabela):
+    """(revisão, último rowid) da tabela, como RepositorioDados.versao"""
+    revisao = conn.execute("SELECT revisao FROM controle WHERE tabela = ?", (tabela,)).fetchone()
+    ultimo = conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {tabela}").fetchone()[0]
+    return [revisao[0] if revisao else 0, ultimo]
+
+
+def versao_gravada(arquivo):
+    """Versão da tabela registrada pela última gravação completa das partições"""
+    try:
+        with open(arquivo) as marca:
+            return json.load(marca)
+    except (OSError, ValueError):
+        return None
+
+
+def marcar_versao(arquivo, conn, tabela):
+    """Registra que as partições refletem a versão atual da tabela"""
+    temporario = arquivo + '.tmp'
+    with open(temporario, 'w') as marca:
+        json.dump(versao_tabela(conn, tabela), marca)
+    os.replace(temporario, arquivo)
+
+
+class ParticoesMensais:
+    """Cópia das vendas em arquivos Parquet por mês (mes=AAAA-MM.parquet)
+
+    Funciona como observador do RepositorioDados: a cada escrita, só os meses
+    afetados são regravados. Consultas por período leem apenas os arquivos dos
+    meses que se sobrepõem ao intervalo.
+    """
+
+    tabela = 'vendas'
+    colunas = ['data']
+    # Arquivos fora do banco: só recebem escritas já confirmadas
+    apos_commit = True
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        # Versão das vendas refletida nas partições (difere do banco depois
+        # de uma queda entre o commit e a regravação: reconstrói ao abrir)
+        self.marca = os.path.join(diretorio, '_versao_meses.json')
+
+    def _arquivo(self, mes):
+        return os.path.join(self.diretorio, f'mes={mes}.parquet')
+
+    def meses(self):
+        """Meses com partição gravada, em ordem"""
+        arquivos = glob.glob(os.path.join(self.diretorio, 'mes=*.parquet'))
+        return sorted(os.path.basename(a)[4:11] for a in arquivos)
+
+    def arquivos(self, meses=None):
+        """Arquivos gravados dos meses informados (None = todos), em ordem"""
+        meses = self.meses() if meses is None else sorted(meses)
+        return [a for a in map(self._arquivo, meses) if os.path.exists(a)]
+
+    def criar(self, conn):
+        """Regrava todas as partições se elas não refletem a versão atual das vendas"""
+        os.makedirs(self.diretorio, exist_ok=True)
+        if versao_gravada(self.marca) != versao_tabela(conn, self.tabela):
+            for arquivo in self.arquivos():
+                os.remove(arquivo)
+            self._gravar_todas(conn)
+            marcar_versao(self.marca, conn, self.tabela)
+
+    def aplicar(self, conn, antes, depois):
+        """Regrava as partições dos meses tocados pela escrita (já confirmada)"""
+        datas = pd.concat([antes.get('data', pd.Series(dtype=object)),
+                           depois.get('data', pd.Series(dtype=object))])
+        meses = pd.to_datetime(datas.dropna()).dt.strftime('%Y-%m').unique()
+        self._regravar(conn, meses)
+        marcar_versao(self.marca, conn, self.tabela)
+
+    def _gravar_todas(self, conn, bloco=100_000):
+        # Uma única leitura em ordem de data (pelo índice), em blocos: cada mês
+        # é gravado assim que o seguinte começa
+        pendente = None
+        for df in pd.read_sql_query(
+            "SELECT * FROM vendas WHERE data IS NOT NULL ORDER BY data, id", conn, chunksize=bloco
+        ):
+            if df.empty:
+                continue
+            if pendente is not None:
+                df = pd.concat([pendente, df], ignore_index=True)
+            meses = df['data'].str[:7]
+            ultimo = meses.iloc[-1]
+            for mes, parte in df[meses != ultimo].groupby(meses[meses != ultimo], sort=False):
+                self._gravar(mes, parte)
+            pendente = df[meses == ultimo]
+        if pendente is not None:
+            self._gravar(pendente['data'].iloc[0][:7], pendente)
+
+    def _regravar(self, conn, meses):
+        for mes in meses:
+            df = pd.read_sql_query(
+                "SELECT * FROM vendas WHERE data >= ? AND data < ? ORDER BY data, id",
+                conn, params=limites_mes(mes)
+            )
+            self._gravar(mes, df)
+
+    def _gravar(self, mes, df):
+        arquivo = self._arquivo(mes)
+        if df.empty:
+            if os.path.exists(arquivo):
+                os.remove(arquivo)
+            return
+        df = df.reset_index(drop=True)
+        df['data'] = pd.to_datetime(df['data'])
+        temporario = arquivo + '.tmp'
+        df.to_parquet(temporario, index=False)
+        os.replace(temporario, arquivo)
+
+    def ler(self, inicio=None, fim=None, colunas=None):
+        """Lê o período abrindo só as partições dos meses sobrepostos"""
+        primeiro = None if inicio is None else pd.Timestamp(inicio).strftime('%Y-%m')
+        ultimo = None if fim is None else pd.Timestamp(fim).strftime('%Y-%m')
+        meses = [m for m in self.meses()
+                 if (primeiro is None or m >= primeiro) and (ultimo is None or m <= ultimo)]
+        if colunas is not None and 'data' not in colunas:
+            leitura = ['data'] + list(colunas)
+        else:
+            leitura = colunas
+        partes = [pd.read_parquet(self._arquivo(m), columns=leitura) for m in meses]
+        if not partes:
+            return pd.DataFrame(columns=colunas)
+        # Partições já estão ordenadas por data: só os extremos precisam de corte
+        df = IndiceDatas(pd.concat(partes, ignore_index=True)).intervalo(inicio, fim)
+        return df[colunas].reset_index(drop=True) if colunas is not None else df.reset_index(drop=True)
+
+
+_cache = CacheVersionado()
+# Índices de um período de todas as representadas (poucos: cada um pode ser grande)
+_periodos = CacheVersionado(max_itens=4)
+
+
+def indice_vendas(repositorio, representadas=None, inicio=None, fim=None):
+    """Índice de datas sobre as vendas em memória (reconstruído a cada nova versão)
+
+    Sem `representadas`, só as vendas do período, lidas das partições
+    mensais dos meses que ele cobre. Com `representadas`, todas as vendas
+    delas, lidas das partições de cada uma.
+    """
+    if representadas is None:
+        inicio = None if inicio is None else pd.Timestamp(inicio).normalize()
+        fim = None if fim is None else pd.Timestamp(fim).normalize()
+        return _periodos.obter(
+            ('vendas', inicio, fim), repositorio.versao('vendas'),
+            lambda: IndiceDatas(repositorio.carregar('vendas', data_inicio=inicio, data_fim=fim))
+        )
+    representadas = tuple(sorted(representadas))
+    return _cache.obter(
+        ('vendas', representadas), repositorio.versao_representadas('vendas', representadas),
+        lambda: IndiceDatas(repositorio.carregar('vendas', representadas=representadas))
+    )
@@ -0,0 +1,69 @@
+# metricas_desempenho.py
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:  # psutil é opcional (requirements_mobile.txt)
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # Windows não possui o módulo resource
+    resource = None
+
+_lock = threading.Lock()
+_metricas = {}
+
+
+def memoria_rss_mb():
+    """Retorna a memória residente do processo em MB (None se indisponível)"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 ** 2)
+    if resource is not None:
+        # ru_maxrss é o pico em KB no Linux; serve como aproximação
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return None
+
+
+def registrar(nome, **valores):
+    """Registra (sobrescrevendo) os valores de uma métrica nomeada"""
+    with _lock:
+        _metricas.setdefault(nome, {}).update(valores, atualizado_em=time.time())
+
+
+@contextmanager
+def cronometro(nome, **valores):
+    """Mede o tempo de execução do bloco e registra junto com a memória RSS"""
+    inicio = time.perf_counter()
+    try:
+        yield valores
+    finally:
+        registrar(
+            nome,
+            segundos=time.perf_counter() - inicio,
+            memoria_rss_mb=memoria_rss_mb(),
+            **valores
+        )
+
+
+def cronometrado(nome):
+    """Decorador: registra o tempo de cada chamada (ex.: de um fragmento) e quantas foram"""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            with _lock:
+                execucoes = _metricas.get(nome, {}).get("execucoes", 0) + 1
+            with cronometro(nome, execucoes=execucoes):
+                return funcao(*args, **kwargs)
+        return envoltorio
+    return decorador
+
+
+def obter_metricas():
+    """Retorna uma cópia das métricas registradas"""
+    with _lock:
+        return {nome: dict(valores) for nome, valores in _metricas.items()}
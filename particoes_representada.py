@@ -0,0 +1,193 @@
+# particoes_representada.py
+
+import glob
+import os
+import shutil
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+from cache_versionado import CacheVersionado
+from indice_datas import IndiceDatas, limites_mes, marcar_versao, versao_gravada, versao_tabela
+
+
+def _pasta(representada):
+    # Nome reversível e seguro para o sistema de arquivos ("" = sem representada)
+    return 'representada=' + quote(representada or '', safe='')
+
+
+class ParticoesRepresentada:
+    """Cópia de uma tabela em arquivos Parquet por representada
+
+    Produtos ficam em representada=<nome>.parquet; vendas, com `por_mes`,
+    em representada=<nome>/mes=AAAA-MM.parquet. Funciona como observador do
+    RepositorioDados: cada escrita regrava só as partições que ela tocou, e
+    consultas de uma ou duas representadas abrem só os arquivos delas (e,
+    nas vendas, só os meses do período).
+    """
+
+    # Arquivos fora do banco: só recebem escritas já confirmadas
+    apos_commit = True
+
+    def __init__(self, tabela, diretorio, por_mes=False):
+        self.tabela = tabela
+        self.diretorio = diretorio
+        self.por_mes = por_mes
+        # Versão da tabela refletida nas partições (ver ParticoesMensais)
+        self.marca = os.path.join(diretorio, '_versao_representadas.json')
+        self.colunas = ['representada', 'data'] if por_mes else ['representada']
+        self._cache = CacheVersionado(max_itens=32)
+
+    def _arquivo(self, representada, mes=None):
+        if self.por_mes:
+            return os.path.join(self.diretorio, _pasta(representada), f'mes={mes}.parquet')
+        return os.path.join(self.diretorio, _pasta(representada) + '.parquet')
+
+    def representadas(self):
+        """Representadas com partição gravada, em ordem ("" = sem representada)"""
+        padrao = 'representada=*' if self.por_mes else 'representada=*.parquet'
+        nomes = []
+        for caminho in glob.glob(os.path.join(self.diretorio, padrao)):
+            nome = os.path.basename(caminho)[len('representada='):]
+            if self.por_mes:
+                if not glob.glob(os.path.join(caminho, 'mes=*.parquet')):
+                    continue
+            else:
+                nome = nome[:-len('.parquet')]
+            nomes.append(unquote(nome))
+        return sorted(nomes)
+
+    def _arquivos(self, representadas, inicio=None, fim=None):
+        """Arquivos das representadas (e dos meses sobrepostos ao período) que existem"""
+        if not self.por_mes:
+            return [a for a in (self._arquivo(r) for r in representadas) if os.path.exists(a)]
+        primeiro = None if inicio is None else pd.Timestamp(inicio).strftime('%Y-%m')
+        ultimo = None if fim is None else pd.Timestamp(fim).strftime('%Y-%m')
+        arquivos = []
+        for representada in representadas:
+            for arquivo in sorted(glob.glob(os.path.join(self.diretorio, _pasta(representada), 'mes=*.parquet'))):
+                mes = os.path.basename(arquivo)[4:11]
+                if (primeiro is None or mes >= primeiro) and (ultimo is None or mes <= ultimo):
+                    arquivos.append(arquivo)
+        return arquivos
+
+    def criar(self, conn):
+        """Regrava todas as partições se elas não refletem a versão atual da tabela"""
+        os.makedirs(self.diretorio, exist_ok=True)
+        if versao_gravada(self.marca) == versao_tabela(conn, self.tabela):
+            return
+        for caminho in glob.glob(os.path.join(self.diretorio, 'representada=*')):
+            if os.path.isdir(caminho):
+                shutil.rmtree(caminho)
+            else:
+                os.remove(caminho)
+        if self.por_mes:
+            self._gravar_todas(conn)
+        else:
+            chaves = conn.execute(f"SELECT DISTINCT COALESCE(representada, ''), NULL FROM {self.tabela}")
+            self._regravar(conn, chaves.fetchall())
+        marcar_versao(self.marca, conn, self.tabela)
+
+    def _gravar_todas(self, conn, bloco=100_000):
+        # Uma única leitura em ordem de data, em blocos: as partições de um mês
+        # são gravadas assim que o seguinte começa
+        pendente = None
+        for df in pd.read_sql_query(
+            f"SELECT * FROM {self.tabela} WHERE data IS NOT NULL ORDER BY data, rowid", conn, chunksize=bloco
+        ):
+            if df.empty:
+                continue
+            if pendente is not None:
+                df = pd.concat([pendente, df], ignore_index=True)
+            meses = df['data'].str[:7]
+            completos = meses != meses.iloc[-1]
+            self._gravar_meses(df[completos], meses[completos])
+            pendente = df[~completos]
+        if pendente is not None:
+            self._gravar_meses(pendente, pendente['data'].str[:7])
+
+    def _gravar_meses(self, df, meses):
+        representadas = df['representada'].fillna('')
+        for (representada, mes), parte in df.groupby([representadas, meses], sort=False):
+            parte = parte.reset_index(drop=True)
+            parte['data'] = pd.to_datetime(parte['data'])
+            self._gravar(self._arquivo(representada, mes), parte)
+
+    def aplicar(self, conn, antes, depois):
+        """Regrava as partições tocadas pela escrita (já confirmada)"""
+        linhas = pd.concat([antes.reindex(columns=self.colunas), depois.reindex(columns=self.colunas)])
+        chaves = pd.DataFrame({'representada': linhas['representada'].fillna('').astype(str)})
+        if self.por_mes:
+            chaves['mes'] = pd.to_datetime(linhas['data']).dt.strftime('%Y-%m')
+            chaves = chaves.dropna()
+        else:
+            chaves['mes'] = None
+        self._regravar(conn, chaves.drop_duplicates().itertuples(index=False, name=None))
+        marcar_versao(self.marca, conn, self.tabela)
+
+    def _regravar(self, conn, chaves):
+        for representada, mes in chaves:
+            if self.por_mes:
+                # Só o mês tocado (índice de data), não o histórico da representada
+                df = pd.read_sql_query(
+                    f"SELECT * FROM {self.tabela} WHERE representada IS ? AND data >= ? AND data < ? "
+                    "ORDER BY data, rowid",
+                    conn, params=(representada or None, *limites_mes(mes))
+                )
+                df['data'] = pd.to_datetime(df['data'])
+            else:
+                df = pd.read_sql_query(
+                    f"SELECT * FROM {self.tabela} WHERE representada IS ? ORDER BY rowid",
+                    conn, params=(representada or None,)
+                )
+            self._gravar(self._arquivo(representada, mes), df)
+
+    @staticmethod
+    def _gravar(arquivo, df):
+        if df.empty:
+            if os.path.exists(arquivo):
+                os.remove(arquivo)
+            return
+        os.makedirs(os.path.dirname(arquivo), exist_ok=True)
+        temporario = arquivo + '.tmp'
+        df.to_parquet(temporario, index=False)
+        os.replace(temporario, arquivo)
+
+    @staticmethod
+    def _versao(arquivos):
+        versao = []
+        for arquivo in arquivos:
+            try:
+                estado = os.stat(arquivo)
+            except OSError:
+                continue
+            versao.append((arquivo, estado.st_mtime_ns, estado.st_size))
+        return tuple(versao)
+
+    def versao(self, representadas):
+        """Muda só quando alguma partição das representadas informadas é regravada"""
+        return self._versao(self._arquivos(representadas))
+
+    def ler(self, representadas, colunas=None, inicio=None, fim=None):
+        """Linhas das representadas (e do período) lendo só as partições delas
+
+        O resultado por conjunto de arquivos fica em cache até alguma das
+        partições ser regravada; sessões com a mesma seleção o compartilham.
+        O DataFrame retornado não deve ser modificado.
+        """
+        arquivos = self._arquivos(representadas, inicio, fim)
+        leitura = list(colunas) if colunas is not None else None
+        if leitura is not None and self.por_mes and 'data' not in leitura:
+            leitura = ['data'] + leitura
+
+        def carregar():
+            partes = [pd.read_parquet(arquivo, columns=leitura) for arquivo in arquivos]
+            df = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=leitura)
+            # Vendas: índice por data para cortar o período sem máscara booleana
+            return IndiceDatas(df) if self.por_mes and partes else df
+
+        dados = self._cache.obter(
+            (tuple(arquivos), tuple(leitura or ())), self._versao(arquivos), carregar
+        )
+        df = dados.intervalo(inicio, fim) if isinstance(dados, IndiceDatas) else dados
+        return df[colunas].reset_index(drop=True) if colunas is not None else df.reset_index(drop=True)
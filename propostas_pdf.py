@@ -0,0 +1,333 @@
+# propostas_pdf.py
+
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from carrinho_proposta import calcular_linhas, resumo_totais
+
+try:
+    from fpdf import FPDF
+except ImportError:  # fpdf2 é opcional (requirements.txt, requirements_mobile.txt)
+    FPDF = None
+
+DIRETORIO_PROPOSTAS = os.environ.get("VITRINE_PROPOSTAS", os.path.join("dados", "propostas"))
+
+# Espaço máximo em disco dos PDFs e dias sem uso até um PDF ser descartado
+LIMITE_CACHE_PROPOSTAS_MB = float(os.environ.get("VITRINE_LIMITE_PROPOSTAS_MB", 200))
+DIAS_CACHE_PROPOSTAS = float(os.environ.get("VITRINE_DIAS_PROPOSTAS", 30))
+
+# Modelos (<nome>.json) e logos das representadas (logos/<representada>.png)
+DIRETORIO_MODELOS = os.environ.get("VITRINE_MODELOS", "modelos")
+
+# Entra no hash do conteúdo: mudar o layout invalida os PDFs já gerados
+VERSAO_LAYOUT = 2
+
+MODELO_PADRAO = {
+    "titulo": "PROPOSTA COMERCIAL",
+    "empresa": "VitrineSCV",
+    "rodape": "Proposta gerada pelo VitrineSCV",
+    "cor_destaque": [31, 119, 180],
+    "fonte": "Helvetica",
+}
+
+COLUNAS_ITENS = [("Código", 28), ("Produto", 64), ("Qtd.", 16), ("Unitário", 28), ("Desc.", 16), ("Total", 38)]
+
+
+def disponivel():
+    """Indica se a geração de PDF está disponível (fpdf2 instalado)"""
+    return FPDF is not None
+
+
+@lru_cache(maxsize=None)
+def carregar_modelo(nome="padrao", diretorio=DIRETORIO_MODELOS):
+    """Modelo padrão sobreposto pelo JSON do diretório de modelos (lido uma vez por processo)"""
+    modelo = dict(MODELO_PADRAO)
+    try:
+        with open(os.path.join(diretorio, f"{nome}.json"), encoding="utf-8") as arquivo:
+            modelo.update(json.load(arquivo))
+    except (OSError, ValueError):
+        pass
+    return modelo
+
+
+@lru_cache(maxsize=64)
+def carregar_logo(representada, diretorio=DIRETORIO_MODELOS):
+    """Bytes do logo da representada (lido uma vez por processo), ou None"""
+    if not representada:
+        return None
+    try:
+        with open(os.path.join(diretorio, "logos", f"{representada}.png"), "rb") as arquivo:
+            return arquivo.read()
+    except OSError:
+        return None
+
+
+def chave_proposta(proposta, modelo="padrao"):
+    """Hash do conteúdo da proposta: mesma proposta, mesmo arquivo"""
+    conteudo = json.dumps([VERSAO_LAYOUT, modelo, proposta], sort_keys=True, default=str)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def totais_proposta(proposta):
+    """Valor líquido de cada item e o resumo dos totais da proposta"""
+    itens = proposta["itens"]
+    _, _, liquido = calcular_linhas(
+        [item["quantidade"] for item in itens],
+        [item["valor_unitario"] for item in itens],
+        [item.get("desconto", 0) for item in itens],
+    )
+    return liquido, resumo_totais(liquido, proposta.get("desconto", 0))
+
+
+def _texto(valor):
+    # As fontes padrão do PDF cobrem só o latin-1 (acentos do português incluídos)
+    return str(valor).encode("latin-1", "replace").decode("latin-1")
+
+
+def _moeda(valor):
+    return "R$ " + f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def renderizar_pdf(proposta, modelo="padrao"):
+    """Gera o PDF da proposta e retorna os bytes"""
+    if FPDF is None:
+        raise RuntimeError("Geração de PDF indisponível: instale o fpdf2")
+    layout = carregar_modelo(modelo)
+    fonte = layout["fonte"]
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=20)
+    pdf.add_page()
+
+    logo = carregar_logo(proposta.get("representada"))
+    if logo is not None:
+        pdf.image(io.BytesIO(logo), x=160, y=10, h=18)
+
+    pdf.set_font(fonte, "B", 16)
+    pdf.set_text_color(*layout["cor_destaque"])
+    pdf.cell(0, 10, _texto(layout["titulo"]), new_x="LMARGIN", new_y="NEXT")
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_font(fonte, "", 10)
+    pdf.cell(0, 6, _texto(layout["empresa"]), new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(6)
+
+    data_proposta = date.fromisoformat(str(proposta["data"])[:10])
+    validade = proposta.get("validade", 30)
+    cabecalho = [
+        ("Cliente", proposta["cliente"]),
+        ("Representada", proposta.get("representada") or "-"),
+        ("Data", data_proposta.strftime("%d/%m/%Y")),
+        ("Validade", f"{validade} dias (até {(data_proposta + timedelta(days=validade)):%d/%m/%Y})"),
+    ]
+    for rotulo, valor in cabecalho:
+        pdf.set_font(fonte, "B", 10)
+        pdf.cell(30, 6, _texto(f"{rotulo}:"))
+        pdf.set_font(fonte, "", 10)
+        pdf.cell(0, 6, _texto(valor), new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(4)
+
+    pdf.set_font(fonte, "B", 10)
+    pdf.set_fill_color(*layout["cor_destaque"])
+    pdf.set_text_color(255, 255, 255)
+    for titulo, largura in COLUNAS_ITENS:
+        pdf.cell(largura, 7, _texto(titulo), border=1, fill=True)
+    pdf.ln()
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_font(fonte, "", 9)
+    liquido, totais = totais_proposta(proposta)
+    for item, valor_item in zip(proposta["itens"], liquido):
+        valores = [
+            item["codigo"], str(item["nome"])[:36], f"{item['quantidade']:,}",
+            _moeda(item["valor_unitario"]), f"{item.get('desconto', 0):g}%", _moeda(valor_item),
+        ]
+        for (_, largura), valor in zip(COLUNAS_ITENS, valores):
+            pdf.cell(largura, 6, _texto(valor), border=1)
+        pdf.ln()
+
+    pdf.ln(4)
+    largura_rotulo = sum(largura for _, largura in COLUNAS_ITENS[:-1])
+    for rotulo, valor, estilo in [
+        ("Subtotal", totais["subtotal"], ""),
+        (f"Desconto ({proposta.get('desconto', 0):g}%)", -totais["desconto"], ""),
+        ("Total", totais["total"], "B"),
+    ]:
+        pdf.set_font(fonte, estilo, 10)
+        pdf.cell(largura_rotulo, 6, _texto(rotulo), align="R")
+        pdf.cell(COLUNAS_ITENS[-1][1], 6, _texto(_moeda(valor)), align="R", new_x="LMARGIN", new_y="NEXT")
+
+    pdf.set_y(-25)
+    pdf.set_font(fonte, "I", 8)
+    pdf.cell(0, 6, _texto(layout["rodape"]), align="C")
+    return bytes(pdf.output())
+
+
+def _gerar_arquivo(proposta, modelo, caminho):
+    """Executado no processo de trabalho: renderiza e grava o PDF de forma atômica"""
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "wb") as arquivo:
+        arquivo.write(renderizar_pdf(proposta, modelo))
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def _aquecer(modelo):
+    # Cada processo carrega o modelo uma única vez, antes do primeiro documento
+    carregar_modelo(modelo)
+
+
+class CachePropostas:
+    """Diretório de PDFs endereçado por conteúdo, com descarte LRU por espaço e por idade
+
+    Como nas miniaturas do catálogo, a recência de cada arquivo fica no
+    próprio mtime, então a ordem do LRU sobrevive a reinícios do processo.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_PROPOSTAS, limite_bytes=LIMITE_CACHE_PROPOSTAS_MB * 1024 * 1024,
+                 idade_maxima=DIAS_CACHE_PROPOSTAS * 24 * 60 * 60):
+        self.diretorio = diretorio
+        self.limite_bytes = limite_bytes
+        self.idade_maxima = idade_maxima
+        self.descartados = 0
+        os.makedirs(diretorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self._arquivos = OrderedDict()
+        self._acessos = {}
+        self.total_bytes = 0
+        entradas = [e for e in os.scandir(diretorio) if e.is_file() and e.name.endswith(".pdf")]
+        for entrada in sorted(entradas, key=lambda e: e.stat().st_mtime):
+            estado = entrada.stat()
+            self._arquivos[entrada.name] = estado.st_size
+            self._acessos[entrada.name] = estado.st_mtime
+            self.total_bytes += estado.st_size
+        with self._lock:
+            self._descartar()
+
+    def __contains__(self, nome):
+        return nome in self._arquivos
+
+    def acessar(self, nome):
+        """Marca o PDF como usado agora; False se não estiver no cache"""
+        with self._lock:
+            if nome not in self._arquivos:
+                return False
+            self._arquivos.move_to_end(nome)
+            self._acessos[nome] = time.time()
+            self._descartar()
+        try:
+            os.utime(os.path.join(self.diretorio, nome))
+        except OSError:
+            pass
+        return True
+
+    def registrar(self, nome, tamanho):
+        """Inclui um PDF recém-gravado e descarta o excedente"""
+        with self._lock:
+            self.total_bytes += tamanho - self._arquivos.pop(nome, 0)
+            self._arquivos[nome] = tamanho
+            self._acessos[nome] = time.time()
+            self._descartar()
+
+    def _descartar(self):
+        # Saem os vencidos e, por espaço, os menos usados; o mais recente sempre fica
+        limite_acesso = time.time() - self.idade_maxima
+        while len(self._arquivos) > 1:
+            nome = next(iter(self._arquivos))
+            if self.total_bytes <= self.limite_bytes and self._acessos[nome] >= limite_acesso:
+                break
+            self.total_bytes -= self._arquivos.pop(nome)
+            self._acessos.pop(nome)
+            self.descartados += 1
+            try:
+                os.remove(os.path.join(self.diretorio, nome))
+            except OSError:
+                pass
+
+
+class GeradorPropostas:
+    """Gera PDFs de propostas em um pool de processos, com cache em disco por conteúdo
+
+    Propostas idênticas (mesmo hash) reaproveitam o arquivo pronto ou a geração
+    em andamento; lotes são distribuídos entre os núcleos disponíveis. O
+    diretório é limitado por espaço e por idade (CachePropostas).
+    """
+
+    def __init__(self, diretorio=DIRETORIO_PROPOSTAS, max_workers=None, modelo="padrao", cache=None):
+        self.diretorio = diretorio
+        self.modelo = modelo
+        self.cache = cache or CachePropostas(diretorio)
+        # spawn: o processo do Streamlit tem várias threads, e fork com threads não é seguro
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers or os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_aquecer, initargs=(modelo,)
+        )
+        self._pendentes = {}
+        self._lock = threading.Lock()
+
+    def caminho(self, proposta):
+        """Caminho do PDF correspondente ao conteúdo da proposta"""
+        return os.path.join(self.diretorio, f"proposta_{chave_proposta(proposta, self.modelo)[:20]}.pdf")
+
+    def solicitar(self, proposta):
+        """Pede a geração do PDF e retorna um Future com o caminho do arquivo"""
+        if FPDF is None:
+            raise RuntimeError("Geração de PDF indisponível: instale o fpdf2")
+        caminho = self.caminho(proposta)
+        with self._lock:
+            if self.cache.acessar(os.path.basename(caminho)) and os.path.exists(caminho):
+                pronto = Future()
+                pronto.set_result(caminho)
+                return pronto
+            futuro = self._pendentes.get(caminho)
+            if futuro is not None:
+                return futuro
+            futuro = self._executor.submit(_gerar_arquivo, proposta, self.modelo, caminho)
+            self._pendentes[caminho] = futuro
+        # Fora do lock: se o futuro já terminou, o callback roda nesta mesma thread
+        futuro.add_done_callback(lambda f: self._concluir(caminho, f))
+        return futuro
+
+    def _concluir(self, caminho, futuro):
+        with self._lock:
+            self._pendentes.pop(caminho, None)
+            if futuro.exception() is None:
+                self.cache.registrar(os.path.basename(caminho), os.path.getsize(caminho))
+
+    def gerar_lote(self, propostas):
+        """Pede a geração de várias propostas de uma vez (ex.: campanha)"""
+        return [self.solicitar(proposta) for proposta in propostas]
+
+    def encerrar(self):
+        self._executor.shutdown(wait=True)
+
+
+def proposta_de_formulario(cliente, data_proposta, validade, desconto, itens, representada=None):
+    """Monta o dicionário da proposta a partir dos campos do formulário"""
+    if isinstance(data_proposta, (date, datetime)):
+        data_proposta = data_proposta.isoformat()[:10]
+    return {
+        "cliente": cliente,
+        "data": data_proposta,
+        "validade": int(validade),
+        "desconto": float(desconto),
+        "representada": representada,
+        "itens": [
+            {
+                "codigo": str(item["codigo"]),
+                "nome": str(item["nome"]),
+                "quantidade": int(item["quantidade"]),
+                "valor_unitario": float(item["valor_unitario"]),
+                "desconto": float(item.get("desconto", 0)),
+            }
+            for item in itens
+        ],
+    }
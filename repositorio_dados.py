@@ -0,0 +1,450 @@
+# repositorio_dados.py
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+from busca_produtos import BuscaProdutos
+from comissoes import ComissoesVendas
+from indice_datas import ParticoesMensais
+from metricas_desempenho import cronometro
+from particoes_representada import ParticoesRepresentada
+from rollups_vendas import RollupsVendas
+
+CAMINHO_BANCO = os.environ.get("VITRINE_DB", os.path.join("dados", "vitrine.db"))
+
+# Esquema das tabelas: coluna -> tipo SQLite. Colunas novas são adicionadas
+# automaticamente em bancos existentes (ALTER TABLE ... ADD COLUMN).
+ESQUEMA = {
+    "produtos": {
+        "codigo": "TEXT PRIMARY KEY",
+        "nome": "TEXT",
+        "categoria": "TEXT",
+        "preco": "REAL",
+        "custo": "REAL",
+        "estoque": "INTEGER",
+        "estoque_minimo": "INTEGER",
+        "representada": "TEXT",
+    },
+    "clientes": {
+        "id": "INTEGER PRIMARY KEY",
+        "nome": "TEXT",
+        "email": "TEXT",
+        "telefone": "TEXT",
+        "status": "TEXT",
+        "cidade": "TEXT",
+    },
+    "vendas": {
+        "id": "INTEGER PRIMARY KEY",
+        "data": "TEXT",
+        "cliente_id": "INTEGER",
+        "produto_codigo": "TEXT",
+        "quantidade": "INTEGER",
+        "valor_unitario": "REAL",
+        "status": "TEXT",
+        "valor_total": "REAL",
+        "representada": "TEXT",
+        "vendedor": "TEXT",
+    },
+    # Regras de comissão ("*" = qualquer representada/categoria), ver comissoes.py
+    "regras_comissao": {
+        "id": "INTEGER PRIMARY KEY",
+        "representada": "TEXT",
+        "categoria": "TEXT",
+        "percentual": "REAL",
+    },
+    "faixas_comissao": {
+        "id": "INTEGER PRIMARY KEY",
+        "representada": "TEXT",
+        "volume_minimo": "REAL",
+        "multiplicador": "REAL",
+    },
+}
+
+INDICES = {
+    "produtos": ["representada"],
+    "vendas": ["data", "status", "cliente_id", "produto_codigo", "representada", "vendedor"],
+}
+
+COLUNAS_DATA = {"vendas": ["data"]}
+
+
+def _chave_primaria(tabela):
+    return next(c for c, t in ESQUEMA[tabela].items() if "PRIMARY KEY" in t)
+
+
+class RepositorioDados:
+    """Armazenamento persistente (SQLite) de produtos, clientes e vendas"""
+
+    def __init__(self, caminho=CAMINHO_BANCO, observadores=None):
+        self.caminho = caminho
+        # Observadores recebem o delta (linhas antes/depois) de cada escrita
+        # na tabela que acompanham e mantêm dados derivados atualizados
+        if observadores is None:
+            observadores = [RollupsVendas(), BuscaProdutos()]
+            mensais = None
+            if caminho != ":memory:":
+                particoes = os.path.join(os.path.dirname(os.path.abspath(caminho)), "particoes")
+                mensais = ParticoesMensais(os.path.join(particoes, "vendas"))
+                observadores.append(mensais)
+                observadores.append(ParticoesRepresentada("produtos", os.path.join(particoes, "produtos")))
+                observadores.append(ParticoesRepresentada("vendas", os.path.join(particoes, "vendas"), por_mes=True))
+            # Partições são arquivos fora do banco: recebem o delta só depois do
+            # commit (apos_commit); as comissões, na transação, leem do SQLite
+            observadores.extend(ComissoesVendas(mensais).observadores())
+        self.observadores = list(observadores)
+        if caminho != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._frames = {}
+        self._pendentes = []
+        self._criar_esquema()
+
+    def _criar_esquema(self):
+        """Cria tabelas, índices e colunas que ainda não existem no banco"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS controle ("
+                "tabela TEXT PRIMARY KEY, revisao INTEGER NOT NULL DEFAULT 0)"
+            )
+            for tabela, colunas in ESQUEMA.items():
+                definicao = ", ".join(f'"{c}" {t}' for c, t in colunas.items())
+                self._conn.execute(f"CREATE TABLE IF NOT EXISTS {tabela} ({definicao})")
+
+                existentes = {linha[1] for linha in self._conn.execute(f"PRAGMA table_info({tabela})")}
+                for coluna, tipo in colunas.items():
+                    if coluna not in existentes:
+                        tipo = tipo.replace("PRIMARY KEY", "").strip()
+                        self._conn.execute(f'ALTER TABLE {tabela} ADD COLUMN "{coluna}" {tipo}')
+
+                for coluna in INDICES.get(tabela, []):
+                    self._conn.execute(
+                        f'CREATE INDEX IF NOT EXISTS idx_{tabela}_{coluna} ON {tabela} ("{coluna}")'
+                    )
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO controle (tabela, revisao) VALUES (?, 0)", (tabela,)
+                )
+            for observador in self.observadores:
+                observador.criar(self._conn)
+
+    def vazio(self):
+        """Indica se ainda não há nenhum produto, cliente ou venda armazenado"""
+        with self._lock:
+            return all(
+                self._conn.execute(f"SELECT 1 FROM {tabela} LIMIT 1").fetchone() is None
+                for tabela in ("produtos", "clientes", "vendas")
+            )
+
+    def versao(self, tabela):
+        """Versão atual da tabela: (revisão de alterações, último rowid)
+
+        Inserções aumentam o último rowid; atualizações e exclusões aumentam a
+        revisão. Serve como chave de cache para dados derivados da tabela.
+        """
+        with self._lock:
+            revisao = self._conn.execute(
+                "SELECT revisao FROM controle WHERE tabela = ?", (tabela,)
+            ).fetchone()[0]
+            ultimo = self._conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {tabela}").fetchone()[0]
+        return revisao, ultimo
+
+    @staticmethod
+    def _preparar(tabela, df):
+        """Colunas do esquema presentes no DataFrame, com datas em texto e nulos como None"""
+        colunas = [c for c in ESQUEMA[tabela] if c in df.columns]
+        dados = df[colunas].copy()
+        for coluna in COLUNAS_DATA.get(tabela, []):
+            if coluna in dados.columns:
+                dados[coluna] = pd.to_datetime(dados[coluna]).dt.strftime("%Y-%m-%d")
+        return colunas, dados.astype(object).where(dados.notna(), None)
+
+    def inserir(self, tabela, df):
+        """Insere as linhas de um DataFrame (substitui registros com a mesma chave)"""
+        if df.empty:
+            return 0
+        colunas, dados = self._preparar(tabela, df)
+
+        nomes = ", ".join(f'"{c}"' for c in colunas)
+        marcadores = ", ".join("?" for _ in colunas)
+        chave = _chave_primaria(tabela)
+        with self._escrita():
+            ultimo = self._conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {tabela}").fetchone()[0]
+            if chave in dados.columns:
+                antes = self._selecionar_por_chave(tabela, chave, list(dados[chave]))
+                # Uma substituição equivale a uma alteração, e uma chave inteira
+                # abaixo da última (lacuna) não cabe em `rowid > ultimo`: ambas
+                # invalidam as leituras incrementais
+                if not antes.empty or self._preenche_lacuna(tabela, chave, dados[chave], ultimo):
+                    self._incrementar_revisao(tabela)
+            else:
+                antes = pd.DataFrame()
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {tabela} ({nomes}) VALUES ({marcadores})",
+                dados.itertuples(index=False, name=None)
+            )
+            if self._observadores_de(tabela):
+                if chave in dados.columns:
+                    depois = self._selecionar_por_chave(tabela, chave, list(dados[chave]))
+                else:
+                    depois = self._selecionar(tabela, "WHERE rowid > ?", (ultimo,))
+                self._notificar(tabela, antes, depois)
+        return len(dados)
+
+    @staticmethod
+    def _preenche_lacuna(tabela, chave, valores, ultimo):
+        """Se alguma chave INTEGER PRIMARY KEY (= rowid) nova fica abaixo da última"""
+        if ESQUEMA[tabela][chave] != "INTEGER PRIMARY KEY":
+            return False
+        return bool((pd.to_numeric(valores, errors="coerce") <= ultimo).any())
+
+    def atualizar(self, tabela, chave, valor_chave, **valores):
+        """Atualiza campos de um registro identificado pela chave primária"""
+        atribuicoes = ", ".join(f'"{c}" = ?' for c in valores)
+        with self._escrita():
+            antes = self._selecionar_por_chave(tabela, chave, [valor_chave])
+            self._conn.execute(
+                f'UPDATE {tabela} SET {atribuicoes} WHERE "{chave}" = ?',
+                (*valores.values(), valor_chave)
+            )
+            self._incrementar_revisao(tabela)
+            self._notificar(tabela, antes, self._selecionar_por_chave(tabela, chave, [valor_chave]))
+
+    def excluir(self, tabela, chave, valores_chave):
+        """Exclui registros pela chave primária"""
+        with self._escrita():
+            antes = self._selecionar_por_chave(tabela, chave, list(valores_chave))
+            self._conn.executemany(
+                f'DELETE FROM {tabela} WHERE "{chave}" = ?', [(v,) for v in valores_chave]
+            )
+            self._incrementar_revisao(tabela)
+            self._notificar(tabela, antes, pd.DataFrame())
+
+    def podar_particao(self, tabela, representada, manter):
+        """Exclui as linhas da representada cuja chave não está em `manter`
+
+        Completa a recarga de uma partição: depois de gravar a tabela nova da
+        representada (ex.: tabela de preços), remove o que deixou de existir.
+        As demais representadas não são lidas nem regravadas.
+        """
+        chave = _chave_primaria(tabela)
+        manter = pd.Series(list(manter), dtype=object).to_json(orient="values")
+        filtro = f'WHERE representada IS ? AND "{chave}" NOT IN (SELECT value FROM json_each(?))'
+        with self._escrita():
+            antes = self._selecionar(tabela, filtro, (representada or None, manter))
+            if antes.empty:
+                return 0
+            self._conn.execute(f"DELETE FROM {tabela} {filtro}", (representada or None, manter))
+            self._incrementar_revisao(tabela)
+            self._notificar(tabela, antes, pd.DataFrame())
+        return len(antes)
+
+    def _particoes(self, tabela):
+        return next((o for o in self._observadores_de(tabela) if isinstance(o, ParticoesRepresentada)), None)
+
+    def representadas(self, tabela="produtos"):
+        """Representadas existentes na tabela ("" = linhas sem representada)"""
+        particoes = self._particoes(tabela)
+        if particoes is not None:
+            return particoes.representadas()
+        with self._lock:
+            return sorted(r or "" for (r,) in self._conn.execute(
+                f"SELECT DISTINCT representada FROM {tabela}"
+            ))
+
+    def versao_representadas(self, tabela, representadas):
+        """Versão só das partições das representadas (chave de cache de dados filtrados)"""
+        particoes = self._particoes(tabela)
+        if particoes is not None:
+            return particoes.versao(representadas)
+        return self.versao(tabela)
+
+    @contextmanager
+    def _escrita(self):
+        """Transação de escrita; observadores com `apos_commit` recebem o delta só depois do commit
+
+        São os que gravam fora do banco (partições Parquet): assim não
+        mostram linhas ainda não confirmadas nem ficam com as de uma
+        transação desfeita.
+        """
+        with self._lock:
+            self._pendentes = []
+            with self._conn:
+                yield
+            pendentes, self._pendentes = self._pendentes, []
+            for observador, antes, depois in pendentes:
+                observador.aplicar(self._conn, antes, depois)
+
+    def _observadores_de(self, tabela):
+        return [o for o in self.observadores if o.tabela == tabela]
+
+    def _notificar(self, tabela, antes, depois):
+        """Repassa o delta da escrita aos observadores da tabela"""
+        for observador in self._observadores_de(tabela):
+            delta = (
+                antes[observador.colunas] if not antes.empty else antes,
+                depois[observador.colunas] if not depois.empty else depois
+            )
+            if getattr(observador, "apos_commit", False):
+                self._pendentes.append((observador, *delta))
+            else:
+                observador.aplicar(self._conn, *delta)
+
+    def _selecionar(self, tabela, filtro="", parametros=()):
+        return pd.read_sql_query(f"SELECT * FROM {tabela} {filtro}", self._conn, params=parametros)
+
+    def _selecionar_por_chave(self, tabela, chave, valores):
+        return self._selecionar(
+            tabela, f'WHERE "{chave}" IN (SELECT value FROM json_each(?))',
+            (pd.Series(valores, dtype=object).to_json(orient="values"),)
+        )
+
+    def iterar_blocos(self, tabela, tamanho=50_000, colunas=None):
+        """Percorre a tabela inteira em blocos de `tamanho` linhas
+
+        Em bancos em arquivo usa uma conexão própria de leitura (WAL), sem
+        bloquear as demais sessões enquanto a tabela é percorrida.
+        """
+        colunas = list(colunas or ESQUEMA[tabela])
+        selecao = ", ".join(f'"{c}"' for c in colunas)
+        sql = f"SELECT {selecao} FROM {tabela} ORDER BY rowid"
+        if self.caminho == ":memory:":
+            with self._lock:
+                blocos = list(pd.read_sql_query(sql, self._conn, chunksize=tamanho))
+        else:
+            conn = sqlite3.connect(f"file:{os.path.abspath(self.caminho)}?mode=ro", uri=True)
+            blocos = pd.read_sql_query(sql, conn, chunksize=tamanho)
+        try:
+            for bloco in blocos:
+                for coluna in COLUNAS_DATA.get(tabela, []):
+                    if coluna in bloco.columns:
+                        bloco[coluna] = pd.to_datetime(bloco[coluna])
+                yield bloco
+        finally:
+            if self.caminho != ":memory:":
+                conn.close()
+
+    def consultar_sql(self, sql, parametros=()):
+        """Executa uma consulta somente leitura (ex.: nos rollups) e retorna um DataFrame"""
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=parametros)
+
+    def copia_seguranca(self, destino, paginas=1024):
+        """Grava uma cópia consistente do banco em `destino` (API de backup do SQLite)
+
+        A cópia sai de uma conexão própria, `paginas` páginas por passo, sem
+        segurar o lock do repositório: as escritas continuam durante a cópia.
+        A transação de leitura aberta antes do primeiro passo fixa o retrato
+        (WAL), então escritas concorrentes não reiniciam o backup.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+        copia = sqlite3.connect(destino)
+        try:
+            if self.caminho == ":memory:":
+                with self._lock:
+                    self._conn.backup(copia)
+                return destino
+            fonte = sqlite3.connect(self.caminho, isolation_level=None)
+            try:
+                fonte.execute("BEGIN")
+                fonte.execute("SELECT COUNT(*) FROM controle").fetchone()
+                fonte.backup(copia, pages=paginas, sleep=0)
+                fonte.execute("COMMIT")
+            finally:
+                fonte.close()
+        finally:
+            copia.close()
+        return destino
+
+    def _incrementar_revisao(self, tabela):
+        self._conn.execute("UPDATE controle SET revisao = revisao + 1 WHERE tabela = ?", (tabela,))
+
+    def _consultar(self, tabela, colunas, filtro="", parametros=()):
+        """Executa um SELECT e converte as colunas de data"""
+        selecao = ", ".join(f'"{c}"' for c in colunas)
+        with self._lock:
+            df = pd.read_sql_query(
+                f"SELECT rowid AS _rowid, {selecao} FROM {tabela} {filtro} ORDER BY rowid",
+                self._conn, params=parametros
+            )
+        for coluna in COLUNAS_DATA.get(tabela, []):
+            if coluna in df.columns:
+                df[coluna] = pd.to_datetime(df[coluna])
+        return df
+
+    def carregar(self, tabela, colunas=None, data_inicio=None, data_fim=None, representadas=None):
+        """Carrega uma tabela lendo apenas as colunas (e o período) solicitados
+
+        Com `representadas`, só as partições dessas representadas são lidas
+        (em vendas, só os meses do período), sem tocar nas demais.
+
+        Com filtro de datas, as vendas são lidas das partições mensais (ou do
+        índice por data no SQLite). Sem filtro, o resultado fica em memória e as
+        chamadas seguintes só leem as linhas novas (rowid maior que o último
+        lido). Se houve atualizações ou exclusões, a tabela é relida por
+        completo. O DataFrame retornado é compartilhado e não deve ser modificado.
+        """
+        colunas = list(colunas or ESQUEMA[tabela])
+
+        if representadas is not None:
+            particoes = self._particoes(tabela)
+            if particoes is not None:
+                # Lê só as partições das representadas (e, em vendas, dos meses do período)
+                with cronometro(f"particoes_representada_{tabela}") as info:
+                    df = particoes.ler(representadas, colunas, data_inicio, data_fim)
+                    info["linhas"] = len(df)
+                return df
+
+        if data_inicio is not None or data_fim is not None:
+            particoes = next((o for o in self._observadores_de(tabela)
+                              if isinstance(o, ParticoesMensais)), None)
+            if particoes is not None and representadas is None:
+                # Lê só os arquivos mensais que se sobrepõem ao período
+                with cronometro(f"particoes_{tabela}") as info:
+                    df = particoes.ler(data_inicio, data_fim, colunas)
+                    info["linhas"] = len(df)
+                return df
+
+        if representadas is not None or data_inicio is not None or data_fim is not None:
+            filtros, parametros = [], []
+            if representadas is not None:
+                filtros.append("COALESCE(representada, '') IN (SELECT value FROM json_each(?))")
+                parametros.append(pd.Series(list(representadas), dtype=object).to_json(orient="values"))
+            if data_inicio is not None:
+                filtros.append("data >= ?")
+                parametros.append(pd.Timestamp(data_inicio).strftime("%Y-%m-%d"))
+            if data_fim is not None:
+                filtros.append("data <= ?")
+                parametros.append(pd.Timestamp(data_fim).strftime("%Y-%m-%d"))
+            with cronometro(f"consulta_{tabela}") as info:
+                df = self._consultar(tabela, colunas, "WHERE " + " AND ".join(filtros), parametros)
+                info["linhas"] = len(df)
+            return df.drop(columns="_rowid")
+
+        chave = (tabela, tuple(colunas))
+        revisao, ultimo = self.versao(tabela)
+        with self._lock:
+            em_cache = self._frames.get(chave)
+            if em_cache is not None and em_cache["revisao"] == revisao:
+                if em_cache["ultimo"] == ultimo:
+                    return em_cache["df"]
+                lido = em_cache["ultimo"]
+                with cronometro(f"incremental_{tabela}") as info:
+                    novos = self._consultar(tabela, colunas, "WHERE rowid > ?", (lido,))
+                    df = pd.concat([em_cache["df"], novos.drop(columns="_rowid")], ignore_index=True)
+                    info["linhas"] = len(novos)
+            else:
+                lido = 0
+                with cronometro(f"carga_{tabela}") as info:
+                    novos = self._consultar(tabela, colunas)
+                    df = novos.drop(columns="_rowid")
+                    info["linhas"] = len(df)
+            if not novos.empty:
+                lido = int(novos["_rowid"].max())
+            self._frames[chave] = {"df": df, "revisao": revisao, "ultimo": lido}
+        return df
@@ -0,0 +1,175 @@
+# rollups_vendas.py
+
+import pandas as pd
+
+# Tabelas pré-agregadas de vendas: nome -> dimensões
+ROLLUPS = {
+    "rollup_vendas_dia": ["data", "status"],
+    "rollup_vendas_mes": ["mes", "status"],
+    "rollup_vendas_produto_mes": ["mes", "produto_codigo", "status"],
+    "rollup_vendas_cliente_mes": ["mes", "cliente_id", "status"],
+}
+
+# Colunas de vendas necessárias para calcular os deltas
+COLUNAS_VENDAS = ["data", "status", "produto_codigo", "cliente_id", "quantidade", "valor_total"]
+
+
+class RollupsVendas:
+    """Mantém os rollups de vendas atualizados a cada inserção, alteração ou exclusão
+
+    Em vez de reagrupar a tabela inteira, cada escrita em vendas gera um delta:
+    as linhas antigas são subtraídas e as novas somadas aos agregados.
+    """
+
+    tabela = "vendas"
+    colunas = COLUNAS_VENDAS
+
+    def criar(self, conn):
+        """Cria as tabelas de rollup e as reconstrói se ainda estiverem vazias"""
+        vazias = False
+        for nome, dimensoes in ROLLUPS.items():
+            definicao = ", ".join(f'"{d}" NOT NULL' for d in dimensoes)
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {nome} ({definicao}, "
+                f"valor_total REAL NOT NULL, quantidade INTEGER NOT NULL, vendas INTEGER NOT NULL, "
+                f"PRIMARY KEY ({', '.join(dimensoes)})) WITHOUT ROWID"
+            )
+            vazias = vazias or conn.execute(f"SELECT 1 FROM {nome} LIMIT 1").fetchone() is None
+        if vazias:
+            self.reconstruir(conn)
+
+    def reconstruir(self, conn):
+        """Recalcula todos os rollups a partir da tabela de vendas"""
+        for nome, dimensoes in ROLLUPS.items():
+            selecao = ", ".join(
+                "substr(data, 1, 7)" if d == "mes" else f"COALESCE(\"{d}\", '')" for d in dimensoes
+            )
+            conn.execute(f"DELETE FROM {nome}")
+            conn.execute(
+                f"INSERT INTO {nome} SELECT {selecao}, COALESCE(SUM(valor_total), 0), "
+                f"COALESCE(SUM(quantidade), 0), COUNT(*) FROM vendas "
+                f"GROUP BY {', '.join(str(i + 1) for i in range(len(dimensoes)))}"
+            )
+
+    def aplicar(self, conn, antes, depois):
+        """Aplica o delta (linhas removidas/alteradas e linhas novas) aos rollups"""
+        if not antes.empty:
+            self._somar(conn, antes, -1)
+        if not depois.empty:
+            self._somar(conn, depois, 1)
+
+    def _somar(self, conn, linhas, sinal):
+        linhas = linhas[COLUNAS_VENDAS].copy()
+        linhas["data"] = pd.to_datetime(linhas["data"]).dt.strftime("%Y-%m-%d")
+        linhas["mes"] = linhas["data"].str[:7]
+        for coluna in ("status", "produto_codigo", "cliente_id"):
+            linhas[coluna] = linhas[coluna].fillna("")
+        linhas["vendas"] = 1
+
+        for nome, dimensoes in ROLLUPS.items():
+            delta = linhas.groupby(dimensoes, as_index=False)[["valor_total", "quantidade", "vendas"]].sum()
+            delta[["valor_total", "quantidade", "vendas"]] *= sinal
+            conn.executemany(
+                f"INSERT INTO {nome} ({', '.join(dimensoes)}, valor_total, quantidade, vendas) "
+                f"VALUES ({', '.join('?' for _ in range(len(dimensoes) + 3))}) "
+                f"ON CONFLICT ({', '.join(dimensoes)}) DO UPDATE SET "
+                f"valor_total = valor_total + excluded.valor_total, "
+                f"quantidade = quantidade + excluded.quantidade, "
+                f"vendas = vendas + excluded.vendas",
+                delta.astype(object).itertuples(index=False, name=None)
+            )
+            if sinal < 0:
+                conn.execute(f"DELETE FROM {nome} WHERE vendas <= 0")
+
+
+def vendas_por_mes(repositorio, status="Finalizada"):
+    """Valor total por mês a partir do rollup mensal"""
+    return repositorio.consultar_sql(
+        "SELECT mes, valor_total FROM rollup_vendas_mes WHERE status = ? ORDER BY mes", (status,)
+    )
+
+
+def vendas_por_status(repositorio):
+    """Quantidade de vendas por status"""
+    return repositorio.consultar_sql(
+        "SELECT status, SUM(vendas) AS vendas, SUM(valor_total) AS valor_total "
+        "FROM rollup_vendas_mes GROUP BY status ORDER BY vendas DESC"
+    )
+
+
+def vendas_diarias(repositorio, data_inicio=None, data_fim=None, status="Finalizada", representadas=None):
+    """Valor total e número de vendas por dia no período
+
+    Os rollups não têm a dimensão representada: com `representadas`, o
+    agrupamento é feito sobre as partições delas (só os meses do período).
+    """
+    if representadas is not None:
+        vendas = repositorio.carregar("vendas", ["data", "status", "valor_total"],
+                                      data_inicio, data_fim, representadas=representadas)
+        vendas = vendas[vendas["status"] == status]
+        df = vendas.groupby("data", as_index=False).agg(
+            valor_total=("valor_total", "sum"), vendas=("valor_total", "size")
+        )
+        return df.sort_values("data", ignore_index=True)
+    inicio = pd.Timestamp(data_inicio or "1900-01-01").strftime("%Y-%m-%d")
+    fim = pd.Timestamp(data_fim or "2999-12-31").strftime("%Y-%m-%d")
+    df = repositorio.consultar_sql(
+        "SELECT data, valor_total, vendas FROM rollup_vendas_dia "
+        "WHERE status = ? AND data BETWEEN ? AND ? ORDER BY data",
+        (status, inicio, fim)
+    )
+    df["data"] = pd.to_datetime(df["data"])
+    return df
+
+
+def intervalo_datas(repositorio):
+    """Primeira e última data com vendas (sem varrer a tabela de vendas)"""
+    minimo, maximo = repositorio.consultar_sql(
+        "SELECT MIN(data), MAX(data) FROM rollup_vendas_dia"
+    ).iloc[0]
+    if minimo is None:
+        hoje = pd.Timestamp.today().normalize()
+        return hoje, hoje
+    return pd.Timestamp(minimo), pd.Timestamp(maximo)
+
+
+def kpis_periodo(repositorio, referencia=None):
+    """Indicadores do mês de `referencia` (até o dia dela) e do mês anterior
+
+    Tudo sai dos rollups, que cada escrita em vendas mantém atualizados.
+    Receita e pedidos comparam o mesmo trecho dos dois meses (rollup
+    diário); clientes e produtos distintos só existem por mês, então o mês
+    anterior entra inteiro. Sem `referencia`, usa o último dia com vendas.
+    Retorna {indicador: (atual, anterior)}.
+    """
+    fim = pd.Timestamp(referencia if referencia is not None else intervalo_datas(repositorio)[1]).normalize()
+    inicio = fim.replace(day=1)
+    inicio_anterior = inicio - pd.DateOffset(months=1)
+    fim_anterior = min(inicio_anterior + (fim - inicio), inicio - pd.Timedelta(days=1))
+
+    periodos = repositorio.consultar_sql(
+        "SELECT CASE WHEN data >= ? THEN 'atual' ELSE 'anterior' END AS periodo, "
+        "COALESCE(SUM(CASE WHEN status = 'Finalizada' THEN valor_total END), 0) AS receita, "
+        "COALESCE(SUM(CASE WHEN status != 'Cancelada' THEN vendas END), 0) AS pedidos "
+        "FROM rollup_vendas_dia WHERE data BETWEEN ? AND ? OR data BETWEEN ? AND ? GROUP BY 1",
+        tuple(d.strftime("%Y-%m-%d") for d in (inicio, inicio_anterior, fim_anterior, inicio, fim))
+    ).set_index("periodo")
+    meses = (inicio.strftime("%Y-%m"), inicio_anterior.strftime("%Y-%m"))
+    distintos = repositorio.consultar_sql(
+        "SELECT mes, COUNT(DISTINCT cliente_id) AS clientes, 0 AS produtos FROM rollup_vendas_cliente_mes "
+        "WHERE mes IN (?, ?) AND status != 'Cancelada' AND cliente_id != '' GROUP BY mes "
+        "UNION ALL "
+        "SELECT mes, 0, COUNT(DISTINCT produto_codigo) FROM rollup_vendas_produto_mes "
+        "WHERE mes IN (?, ?) AND status != 'Cancelada' AND produto_codigo != '' GROUP BY mes",
+        meses * 2
+    ).groupby("mes").sum()
+
+    def par(tabela, chaves, coluna):
+        return tuple(tabela[coluna].get(chave, 0) for chave in chaves)
+
+    return {
+        "receita": tuple(float(v) for v in par(periodos, ("atual", "anterior"), "receita")),
+        "pedidos": tuple(int(v) for v in par(periodos, ("atual", "anterior"), "pedidos")),
+        "clientes": tuple(int(v) for v in par(distintos, meses, "clientes")),
+        "produtos": tuple(int(v) for v in par(distintos, meses, "produtos")),
+    }
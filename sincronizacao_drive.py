@@ -0,0 +1,257 @@
+# sincronizacao_drive.py
+
+import io
+import json
+import os
+import random
+import threading
+import time
+import zipfile
+from datetime import datetime
+
+from drive_integration import BACKOFF_BASE, MAX_TENTATIVAS, erro_transitorio
+from importacao_dados import importar_arquivo
+from metricas_desempenho import cronometro, registrar
+
+PASTA_TABELAS_PRECOS = '04_Tabelas_de_Precos'
+
+# Page token do change feed e checksums dos arquivos já importados
+CAMINHO_ESTADO_SYNC = os.environ.get(
+    'VITRINE_ESTADO_SYNC_DRIVE', os.path.join('dados', 'drive_sincronizacao.json')
+)
+
+# Segundos entre duas consultas ao change feed
+INTERVALO_SYNC = float(os.environ.get('VITRINE_INTERVALO_SYNC_DRIVE', 60))
+
+MIME_PLANILHA_GOOGLE = 'application/vnd.google-apps.spreadsheet'
+MIME_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+EXTENSOES_ACEITAS = ('.csv', '.xlsx', '.xlsm')
+
+CAMPOS_ARQUIVO = 'id, name, mimeType, parents, md5Checksum, modifiedTime, trashed, size'
+CAMPOS_MUDANCAS = f'nextPageToken, newStartPageToken, changes(fileId, removed, file({CAMPOS_ARQUIVO}))'
+
+# Falhas de leitura da planilha: repetir não adianta até o arquivo mudar
+ERROS_PERMANENTES = (ValueError, KeyError, zipfile.BadZipFile)
+
+
+def _segundos_desde(modified_time):
+    """Segundos entre um modifiedTime RFC 3339 do Drive e agora"""
+    try:
+        momento = datetime.fromisoformat(modified_time.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    return max(time.time() - momento.timestamp(), 0.0)
+
+
+class SincronizadorPrecos:
+    """Importa para `produtos` as planilhas novas ou alteradas da pasta de preços
+
+    Acompanha o change feed do Drive a partir de um page token persistido:
+    cada ciclo só lista o que mudou desde o anterior, e arquivos cujo
+    md5Checksum já foi importado não são baixados de novo. O token só avança
+    depois que todas as mudanças do ciclo foram processadas; um arquivo que
+    falhou por erro transitório segura o token e volta no ciclo seguinte.
+    """
+
+    def __init__(self, drive, repositorio, caminho_estado=CAMINHO_ESTADO_SYNC,
+                 intervalo=INTERVALO_SYNC, pasta=PASTA_TABELAS_PRECOS, backoff_base=BACKOFF_BASE):
+        self.drive = drive
+        self.repositorio = repositorio
+        self.caminho_estado = caminho_estado
+        self.intervalo = intervalo
+        self.backoff_base = backoff_base
+        self.pasta_id = drive.folders[pasta]
+        self.estado = self._ler_estado()
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        # Pedido de um ciclo imediato (botão "Sincronizar agora"), atendido pela thread
+        self._solicitado = threading.Event()
+        self._thread = None
+
+    # --- Estado persistido ------------------------------------------------
+
+    def _ler_estado(self):
+        try:
+            with open(self.caminho_estado, encoding='utf-8') as arquivo:
+                estado = json.load(arquivo)
+        except (OSError, ValueError):
+            estado = {}
+        estado.setdefault('page_token', None)
+        estado.setdefault('checksums', {})
+        return estado
+
+    def _gravar_estado(self):
+        diretorio = os.path.dirname(os.path.abspath(self.caminho_estado))
+        os.makedirs(diretorio, exist_ok=True)
+        temporario = self.caminho_estado + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(self.estado, arquivo)
+        os.replace(temporario, self.caminho_estado)
+
+    # --- Leitura do Drive -------------------------------------------------
+
+    def _listar_pasta(self):
+        """Todos os arquivos da pasta (primeira sincronização)"""
+        query = f"'{self.pasta_id}' in parents and trashed=false"
+        arquivos, page_token = [], None
+        while True:
+            results = self._com_retentativas(self.drive.service.files().list(
+                q=query, fields=f'nextPageToken, files({CAMPOS_ARQUIVO})',
+                pageSize=1000, pageToken=page_token
+            ).execute)
+            arquivos.extend(results.get('files', []))
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                return arquivos
+
+    def _listar_mudancas(self, page_token):
+        """Arquivos alterados desde o token e o token do próximo ciclo"""
+        alterados, removidos = {}, set()
+        while True:
+            results = self._com_retentativas(self.drive.service.changes().list(
+                pageToken=page_token, fields=CAMPOS_MUDANCAS, pageSize=1000, spaces='drive'
+            ).execute)
+            for mudanca in results.get('changes', []):
+                file_id = mudanca['fileId']
+                arquivo = mudanca.get('file')
+                if mudanca.get('removed') or arquivo is None or arquivo.get('trashed'):
+                    alterados.pop(file_id, None)
+                    removidos.add(file_id)
+                elif self.pasta_id in arquivo.get('parents', []):
+                    # Vale a última versão do arquivo dentro do lote de mudanças
+                    alterados[file_id] = arquivo
+                    removidos.discard(file_id)
+            if 'newStartPageToken' in results:
+                return list(alterados.values()), removidos, results['newStartPageToken']
+            page_token = results['nextPageToken']
+
+    def _baixar(self, arquivo):
+        """Conteúdo do arquivo e o nome usado para escolher o leitor"""
+        files = self.drive.service.files()
+        if arquivo['mimeType'] == MIME_PLANILHA_GOOGLE:
+            conteudo = files.export_media(fileId=arquivo['id'], mimeType=MIME_XLSX).execute()
+            return conteudo, arquivo['name'] + '.xlsx'
+        return files.get_media(fileId=arquivo['id']).execute(), arquivo['name']
+
+    @staticmethod
+    def _assinatura(arquivo):
+        # Planilhas nativas do Google não têm md5Checksum
+        return arquivo.get('md5Checksum') or arquivo.get('modifiedTime')
+
+    @staticmethod
+    def _aceito(arquivo):
+        return (arquivo['mimeType'] == MIME_PLANILHA_GOOGLE
+                or arquivo['name'].lower().endswith(EXTENSOES_ACEITAS))
+
+    # --- Sincronização ----------------------------------------------------
+
+    def sincronizar(self):
+        """Executa um ciclo de sincronização e retorna o resumo registrado nas métricas"""
+        with self._lock, cronometro('sincronizacao_drive') as info:
+            info.update(verificados=0, importados=0, inalterados=0, erros=0, linhas=0, bytes=0)
+            checksums = self.estado['checksums']
+
+            if self.estado['page_token'] is None:
+                # O token é obtido antes da listagem para não perder mudanças no meio
+                novo_token = self._com_retentativas(
+                    self.drive.service.changes().getStartPageToken().execute
+                )['startPageToken']
+                alterados, removidos = self._listar_pasta(), set()
+            else:
+                alterados, removidos, novo_token = self._listar_mudancas(self.estado['page_token'])
+
+            for file_id in removidos:
+                checksums.pop(file_id, None)
+
+            inicio = time.perf_counter()
+            atrasos = []
+            pendentes = 0
+            for arquivo in alterados:
+                if not self._aceito(arquivo):
+                    continue
+                info['verificados'] += 1
+                assinatura = self._assinatura(arquivo)
+                if checksums.get(arquivo['id'], {}).get('assinatura') == assinatura:
+                    info['inalterados'] += 1
+                    continue
+
+                registro = {'nome': arquivo['name'], 'assinatura': assinatura}
+                try:
+                    conteudo, nome = self._com_retentativas(lambda: self._baixar(arquivo))
+                    # Planilha com a coluna representada recarrega só a partição dela
+                    _, linhas = importar_arquivo(
+                        io.BytesIO(conteudo), nome, self.repositorio, tabelas=('produtos',),
+                        substituir_representada=True
+                    )
+                except ERROS_PERMANENTES as e:
+                    # Arquivo inválido fica marcado para não ser baixado de novo até mudar
+                    registro['erro'] = str(e)
+                    info['erros'] += 1
+                except Exception as e:
+                    # Sem assinatura o arquivo é tentado de novo no próximo ciclo
+                    del registro['assinatura']
+                    registro['erro'] = str(e)
+                    info['erros'] += 1
+                    pendentes += 1
+                else:
+                    registro['linhas'] = linhas
+                    info['importados'] += 1
+                    info['linhas'] += linhas
+                    info['bytes'] += len(conteudo)
+                    atraso = _segundos_desde(arquivo.get('modifiedTime'))
+                    if atraso is not None:
+                        atrasos.append(atraso)
+                checksums[arquivo['id']] = registro
+                self._gravar_estado()
+
+            duracao = time.perf_counter() - inicio
+            info['linhas_por_segundo'] = info['linhas'] / duracao if duracao > 0 else 0.0
+            info['atraso_max_segundos'] = max(atrasos) if atrasos else 0.0
+
+            info['pendentes'] = pendentes
+            if not pendentes:
+                self.estado['page_token'] = novo_token
+            self._gravar_estado()
+        return info
+
+    def _com_retentativas(self, chamada):
+        """Executa a chamada repetindo falhas transitórias com backoff exponencial"""
+        for tentativa in range(MAX_TENTATIVAS):
+            try:
+                return chamada()
+            except Exception as e:
+                if not erro_transitorio(e) or tentativa == MAX_TENTATIVAS - 1:
+                    raise
+                time.sleep(self.backoff_base * (2 ** tentativa + random.random()))
+
+    def _executar(self):
+        while not self._parar.is_set():
+            # Pedidos feitos durante o ciclo disparam outro logo em seguida
+            self._solicitado.clear()
+            try:
+                self.sincronizar()
+            except Exception as e:
+                registrar('sincronizacao_drive', falha=str(e))
+            self._solicitado.wait(self.intervalo)
+
+    def solicitar(self):
+        """Antecipa o próximo ciclo da thread de segundo plano sem esperar o intervalo"""
+        self._solicitado.set()
+
+    def em_andamento(self):
+        """Indica se há um ciclo pedido ou em execução"""
+        return self._solicitado.is_set() or self._lock.locked()
+
+    def iniciar(self):
+        """Sincroniza periodicamente em uma thread de segundo plano"""
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name='sincronizacao_drive', daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self, timeout=None):
+        self._parar.set()
+        self._solicitado.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
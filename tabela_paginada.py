@@ -0,0 +1,76 @@
+# tabela_paginada.py
+
+import math
+
+import pandas as pd
+import streamlit as st
+
+from cache_versionado import CacheVersionado
+from metricas_desempenho import cronometro
+
+TAMANHOS_PAGINA = [25, 50, 100, 200]
+
+_cache_ordens = CacheVersionado(max_itens=16)
+_cache_paginas = CacheVersionado(max_itens=256)
+
+
+def ordem_linhas(df, chave, versao, coluna=None, ascendente=True):
+    """Permutação que ordena o DataFrame pela coluna (cache por versão)"""
+    if coluna is None:
+        return None
+
+    def calcular():
+        # Posições (não rótulos): o índice do DataFrame pode ter repetições.
+        # Vazios ficam no fim e empates mantêm a ordem original nos dois sentidos
+        valores = pd.Series(df[coluna].to_numpy())
+        return valores.sort_values(ascending=ascendente, kind='stable', na_position='last').index.to_numpy()
+
+    return _cache_ordens.obter((chave, coluna, ascendente), versao, calcular)
+
+
+def obter_pagina(df, chave, versao, pagina, tamanho, coluna=None, ascendente=True):
+    """Linhas de uma página, ordenadas no servidor (cache por versão dos dados)"""
+    def calcular():
+        inicio = pagina * tamanho
+        ordem = ordem_linhas(df, chave, versao, coluna, ascendente)
+        if ordem is None:
+            return df.iloc[inicio:inicio + tamanho]
+        return df.iloc[ordem[inicio:inicio + tamanho]]
+
+    return _cache_paginas.obter((chave, pagina, tamanho, coluna, ascendente), versao, calcular)
+
+
+@st.fragment
+def tabela_paginada(df, chave, versao, tamanho_pagina=50):
+    """Exibe o DataFrame paginado: só a página visível é enviada ao navegador
+
+    `versao` identifica o conteúdo de `df` (ex.: versão da tabela + filtros);
+    enquanto ela não muda, ordenações e páginas já montadas são reaproveitadas.
+    Roda como fragmento: trocar de página ou de ordenação reroda só a tabela.
+    """
+    with cronometro(f"fragmento_{chave}", linhas=len(df)):
+        total = len(df)
+        col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+        with col1:
+            coluna = st.selectbox("Ordenar por:", ['—'] + list(df.columns), key=f"{chave}_ordem")
+        with col2:
+            ascendente = st.toggle("Crescente", value=True, key=f"{chave}_crescente")
+        with col3:
+            tamanho = st.selectbox("Linhas:", TAMANHOS_PAGINA,
+                                   index=TAMANHOS_PAGINA.index(tamanho_pagina)
+                                   if tamanho_pagina in TAMANHOS_PAGINA else 1,
+                                   key=f"{chave}_tamanho")
+        paginas = max(1, math.ceil(total / tamanho))
+        # Filtros podem reduzir o número de páginas: volta para a última válida
+        if st.session_state.get(f"{chave}_pagina", 1) > paginas:
+            st.session_state[f"{chave}_pagina"] = paginas
+        with col4:
+            pagina = st.number_input("Página:", min_value=1, max_value=paginas,
+                                     key=f"{chave}_pagina") - 1
+
+        linhas = obter_pagina(df, chave, versao, pagina, tamanho,
+                              None if coluna == '—' else coluna, ascendente)
+        st.dataframe(linhas, use_container_width=True, hide_index=True)
+        inicio = pagina * tamanho
+        st.caption(f"Linhas {min(inicio + 1, total):,}–{min(inicio + tamanho, total):,} de {total:,} "
+                   f"· página {pagina + 1} de {paginas}")
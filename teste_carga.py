@@ -0,0 +1,421 @@
+# Teste de Carga do VitrineSCV
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+try:
+    import websockets
+except ImportError:  # websockets vem com o Streamlit de servidor starlette; nos antigos, instale à parte
+    websockets = None
+
+try:
+    import psutil
+except ImportError:  # psutil é opcional (requirements_mobile.txt): sem ele não há CPU/RSS do servidor
+    psutil = None
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+PORTA_PADRAO = 8599
+SESSOES_PADRAO = [1, 2, 4, 8, 16, 32]
+
+# p95 (segundos) a partir do qual a quantidade de sessões é considerada o limite
+LIMITE_P95_PADRAO = 2.0
+
+# Pausa (segundos) entre duas interações de uma sessão, como a de quem lê a tela
+PAUSA_PADRAO = (0.5, 2.0)
+
+# Tempo máximo de espera por uma execução do script
+TEMPO_LIMITE = 120
+
+# Intervalo entre as amostras de CPU e memória do servidor
+INTERVALO_AMOSTRAS = 0.5
+
+# Roteiros por app: (interação, ação, rótulo do widget, valor); valor None = opção sorteada.
+# Os rótulos são os dos widgets dos apps; uma interação cujo widget não está
+# na tela (ex.: banco sem produtos) é pulada e contada em "puladas".
+NAVEGACAO = "Selecione uma função:"
+ROTEIROS = {
+    "app_controle_vendas.py": [
+        ("estoque", "selecionar", NAVEGACAO, "📦 Controle de Estoque"),
+        ("filtro_estoque", "selecionar", "Filtrar por categoria:", None),
+        ("filtro_estoque_baixo", "selecionar", "Filtrar por estoque:", "Estoque Baixo"),
+        ("relatorio", "selecionar", NAVEGACAO, "💰 Relatório de Vendas"),
+        ("leads", "selecionar", NAVEGACAO, "🎯 Gestão de Leads"),
+        ("filtro_clientes", "selecionar", "Filtrar por status:", None),
+        ("propostas", "selecionar", NAVEGACAO, "📋 Propostas Comerciais"),
+        ("busca_produto", "digitar", "🔍 Buscar produto:", "PROD"),
+        ("adicionar_item", "clicar", "➕ Adicionar Item", None),
+        ("gerar_proposta", "clicar", "📄 Gerar Proposta", None),
+        ("dashboard", "selecionar", NAVEGACAO, "📊 Dashboard Principal"),
+    ],
+    "app.py": [
+        ("produtos", "selecionar", "Selecione uma seção:", "📦 Produtos"),
+        ("filtro_categoria", "selecionar", "Categoria:", None),
+        ("clientes", "selecionar", "Selecione uma seção:", "👥 Clientes"),
+        ("pedidos", "selecionar", "Selecione uma seção:", "🛒 Pedidos"),
+        ("configuracoes", "selecionar", "Selecione uma seção:", "⚙️ Configurações"),
+        ("dashboard", "selecionar", "Selecione uma seção:", "📊 Dashboard"),
+    ],
+}
+
+
+class SessaoSimulada:
+    """Uma aba do navegador: conversa com o servidor pelo websocket do Streamlit
+
+    Envia as mesmas mensagens do frontend (BackMsg.rerun_script com o estado
+    dos widgets; fragment_id quando o widget está num fragmento) e lê as
+    ForwardMsg até o fim da execução. Os widgets na tela são localizados pelo
+    rótulo. Fragmentos com run_every não são disparados: quem os agenda é o
+    navegador, e o roteiro mede só as interações do usuário.
+    """
+
+    def __init__(self, url, rng):
+        self.url = url
+        self.rng = rng
+        self._conexao = None
+        self._elementos = {}
+        self._estados = {}
+        self.latencias = {}
+        self.erros = []
+        self.puladas = 0
+
+    async def abrir(self):
+        self._conexao = await websockets.connect(
+            self.url, subprotocols=["streamlit"], max_size=None, open_timeout=TEMPO_LIMITE
+        )
+        await self._medir("abrir", self._executar())
+
+    async def fechar(self):
+        if self._conexao is not None:
+            await self._conexao.close()
+
+    async def _executar(self, fragmento="", gatilho=None):
+        mensagem = BackMsg()
+        estado = mensagem.rerun_script
+        estado.widget_states.widgets.extend(self._estados.values())
+        if gatilho is not None:
+            estado.widget_states.widgets.append(gatilho)
+        estado.fragment_id = fragmento
+        await self._conexao.send(mensagem.SerializeToString())
+
+        while True:
+            recebida = ForwardMsg()
+            recebida.ParseFromString(await self._conexao.recv())
+            tipo = recebida.WhichOneof("type")
+            if tipo == "new_session" and not recebida.new_session.fragment_ids_this_run:
+                # Execução completa: a tela é refeita do zero
+                self._elementos.clear()
+            elif tipo == "delta" and recebida.delta.WhichOneof("type") == "new_element":
+                elemento = recebida.delta.new_element
+                tipo_elemento = elemento.WhichOneof("type")
+                if tipo_elemento == "exception":
+                    self.erros.append(elemento.exception.message)
+                self._elementos[tuple(recebida.metadata.delta_path)] = (
+                    tipo_elemento, getattr(elemento, tipo_elemento), recebida.delta.fragment_id
+                )
+            elif tipo == "script_finished" and recebida.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                # (uma execução interrompida por st.rerun é seguida de outra)
+                return
+
+    async def _medir(self, interacao, execucao):
+        inicio = time.perf_counter()
+        try:
+            await asyncio.wait_for(execucao, TEMPO_LIMITE)
+        except (asyncio.TimeoutError, websockets.ConnectionClosed) as erro:
+            # A conversa com o servidor ficou fora de sincronia: a sessão para aqui
+            self.erros.append(f"{interacao}: {type(erro).__name__}")
+            raise
+        self.latencias.setdefault(interacao, []).append(time.perf_counter() - inicio)
+
+    def _widget(self, tipos, rotulo):
+        """(tipo, proto, fragment_id) do último widget na tela com esse rótulo"""
+        encontrado = None
+        for caminho in sorted(self._elementos):
+            tipo, proto, fragmento = self._elementos[caminho]
+            if tipo not in tipos:
+                continue
+            if tipo == "component_instance":
+                # Componentes (ex.: streamlit-keyup) recebem o rótulo nos argumentos
+                if json.loads(proto.json_args or "{}").get("label") != rotulo:
+                    continue
+            elif proto.label != rotulo:
+                continue
+            encontrado = (tipo, proto, fragmento)
+        return encontrado
+
+    async def interagir(self, interacao, acao, rotulo, valor):
+        tipos = {
+            "selecionar": ("selectbox",),
+            "digitar": ("text_input", "component_instance"),
+            "clicar": ("button",),
+        }[acao]
+        widget = self._widget(tipos, rotulo)
+        if widget is None:
+            self.puladas += 1
+            return
+        tipo, proto, fragmento = widget
+
+        estado = WidgetState(id=proto.id)
+        if acao == "selecionar":
+            estado.string_value = valor if valor is not None else self.rng.choice(list(proto.options))
+        elif tipo == "component_instance":
+            estado.json_value = json.dumps(valor)
+        elif acao == "digitar":
+            estado.string_value = valor
+        else:
+            # Botão: vale só para esta execução, como no frontend
+            estado.trigger_value = True
+            await self._medir(interacao, self._executar(fragmento, gatilho=estado))
+            return
+        self._estados[proto.id] = estado
+        await self._medir(interacao, self._executar(fragmento))
+
+
+async def _sessao(url, roteiro, ciclos, pausa, atraso, semente):
+    rng = random.Random(semente)
+    sessao = SessaoSimulada(url, rng)
+    await asyncio.sleep(atraso)
+    try:
+        await sessao.abrir()
+        for _ in range(ciclos):
+            for passo in roteiro:
+                await asyncio.sleep(rng.uniform(*pausa))
+                await sessao.interagir(*passo)
+    except (asyncio.TimeoutError, websockets.ConnectionClosed):
+        pass  # já registrado na interação em que ocorreu
+    except (OSError, websockets.InvalidHandshake, websockets.ConnectionClosed) as erro:
+        sessao.erros.append(f"conexão: {type(erro).__name__}: {erro}")
+    finally:
+        await sessao.fechar()
+    return sessao
+
+
+def _percentis(valores):
+    ordenados = sorted(valores)
+
+    def percentil(p):
+        return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+    return {
+        "n": len(ordenados),
+        "p50_s": percentil(50),
+        "p90_s": percentil(90),
+        "p95_s": percentil(95),
+        "p99_s": percentil(99),
+        "max_s": ordenados[-1],
+        "media_s": statistics.fmean(ordenados),
+    }
+
+
+async def _amostrar_servidor(processo, amostras, parar):
+    """CPU (% de um núcleo) e RSS do servidor, somando os processos filhos"""
+    processos = [processo] + processo.children(recursive=True)
+    for p in processos:
+        p.cpu_percent(None)
+    while not parar.is_set():
+        await asyncio.sleep(INTERVALO_AMOSTRAS)
+        cpu = rss = 0.0
+        for p in processos:
+            try:
+                cpu += p.cpu_percent(None)
+                rss += p.memory_info().rss
+            except psutil.Error:
+                continue
+        amostras.append((cpu, rss / 1024 ** 2))
+
+
+def _rss_mb(processo):
+    if processo is None:
+        return None
+    return sum(p.memory_info().rss for p in [processo] + processo.children(recursive=True)) / 1024 ** 2
+
+
+async def executar_etapa(url, roteiro, sessoes, ciclos, pausa, rampa, processo, semente, rss_base=None):
+    """N sessões simultâneas; chegam espalhadas pelos `rampa` segundos iniciais
+
+    O RSS por sessão é o pico da etapa menos `rss_base` (o servidor já
+    aquecido e sem sessões), dividido pelo número de sessões.
+    """
+    amostras, parar = [], asyncio.Event()
+    amostragem = asyncio.create_task(_amostrar_servidor(processo, amostras, parar)) if processo else None
+
+    inicio = time.perf_counter()
+    resultado = await asyncio.gather(*(
+        _sessao(url, roteiro, ciclos, pausa, rampa * i / sessoes, semente + i) for i in range(sessoes)
+    ))
+    duracao = time.perf_counter() - inicio
+    if amostragem is not None:
+        parar.set()
+        await amostragem
+
+    por_interacao = {}
+    for sessao in resultado:
+        for interacao, valores in sessao.latencias.items():
+            por_interacao.setdefault(interacao, []).extend(valores)
+    todas = [v for valores in por_interacao.values() for v in valores]
+    etapa = {
+        "sessoes": sessoes,
+        "duracao_s": duracao,
+        "interacoes": {nome: _percentis(valores) for nome, valores in por_interacao.items()},
+        "geral": _percentis(todas) if todas else None,
+        "erros": [erro for sessao in resultado for erro in sessao.erros],
+        "puladas": sum(sessao.puladas for sessao in resultado),
+    }
+    if amostras:
+        rss_pico = max(rss for _, rss in amostras)
+        etapa["servidor"] = {
+            "cpu_media_pct": statistics.fmean(cpu for cpu, _ in amostras),
+            "cpu_max_pct": max(cpu for cpu, _ in amostras),
+            "rss_base_mb": rss_base,
+            "rss_pico_mb": rss_pico,
+            "rss_por_sessao_mb": (rss_pico - rss_base) / sessoes if rss_base is not None else None,
+        }
+    return etapa
+
+
+def iniciar_servidor(app, porta, banco=None):
+    """`streamlit run` local, headless, esperando o /_stcore/health responder"""
+    ambiente = dict(os.environ)
+    if banco:
+        ambiente["VITRINE_DB"] = banco
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", os.path.join(DIRETORIO, app),
+         "--server.port", str(porta), "--server.headless", "true",
+         "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false"],
+        cwd=DIRETORIO, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    limite = time.monotonic() + TEMPO_LIMITE
+    while time.monotonic() < limite:
+        if servidor.poll() is not None:
+            raise RuntimeError(f"o servidor terminou com código {servidor.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://localhost:{porta}/_stcore/health", timeout=1):
+                return servidor
+        except OSError:
+            time.sleep(0.5)
+    servidor.terminate()
+    raise RuntimeError("o servidor não respondeu ao health check")
+
+
+async def executar(args, url, processo):
+    roteiro = ROTEIROS[args.app]
+    pausa = (args.pausa_min, args.pausa_max)
+
+    # Aquecimento: uma sessão completa antes de medir (caches, índices e partições carregados)
+    if not args.sem_aquecimento:
+        await executar_etapa(url, roteiro, 1, 1, (0, 0), 0, None, args.semente)
+    rss_base = _rss_mb(processo)
+
+    etapas, limite = [], None
+    for sessoes in args.sessoes:
+        etapa = await executar_etapa(url, roteiro, sessoes, args.ciclos, pausa, args.rampa,
+                                     processo, args.semente, rss_base)
+        etapas.append(etapa)
+        geral = etapa["geral"]
+        servidor = etapa.get("servidor")
+        if geral is None:
+            print(f"👥 {sessoes:4d} sessões  ❌ nenhuma interação concluída")
+        else:
+            linha = (f"👥 {sessoes:4d} sessões  p50 {geral['p50_s'] * 1000:7.0f} ms"
+                     f"  p95 {geral['p95_s'] * 1000:7.0f} ms  max {geral['max_s'] * 1000:7.0f} ms")
+            if servidor:
+                linha += (f"  CPU {servidor['cpu_media_pct']:4.0f}%  RSS {servidor['rss_pico_mb']:6.0f} MB"
+                          f" ({servidor['rss_por_sessao_mb']:+.1f} MB/sessão)")
+            if etapa["erros"]:
+                linha += f"  ❌ {len(etapa['erros'])} erros"
+            print(linha)
+        if geral is None or geral["p95_s"] > args.limite_p95:
+            limite = sessoes
+            break
+    return etapas, limite
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Teste de carga: N sessões simultâneas pelo websocket do Streamlit"
+    )
+    parser.add_argument("--app", choices=list(ROTEIROS), default="app_controle_vendas.py")
+    parser.add_argument("--sessoes", type=int, nargs="+", default=SESSOES_PADRAO,
+                        help="Quantidades de sessões simultâneas, em ordem crescente")
+    parser.add_argument("--ciclos", type=int, default=1, help="Vezes que cada sessão repete o roteiro")
+    parser.add_argument("--pausa-min", type=float, default=PAUSA_PADRAO[0])
+    parser.add_argument("--pausa-max", type=float, default=PAUSA_PADRAO[1])
+    parser.add_argument("--rampa", type=float, default=2.0,
+                        help="Segundos ao longo dos quais as sessões de uma etapa se conectam")
+    parser.add_argument("--limite-p95", type=float, default=LIMITE_P95_PADRAO,
+                        help="p95 (s) que encerra a escalada e define o limite de sessões")
+    parser.add_argument("--vendas", type=int,
+                        help="Banco sintético com essa quantidade de vendas (padrão: VITRINE_DB)")
+    parser.add_argument("--diretorio", default=os.path.join("dados", "carga"),
+                        help="Onde criar o banco do --vendas (reaproveitado entre execuções)")
+    parser.add_argument("--url", help="Servidor já em execução (ws://host:porta/_stcore/stream); "
+                                      "sem ele, um servidor local é iniciado")
+    parser.add_argument("--pid", type=int, help="PID do servidor do --url, para medir CPU e RSS")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--sem-aquecimento", action="store_true")
+    parser.add_argument("--saida", default="teste_carga.json", help="Arquivo JSON de resultados")
+    args = parser.parse_args()
+    if websockets is None:
+        parser.error("o pacote websockets é necessário (pip install websockets)")
+
+    banco = None
+    if args.vendas:
+        from benchmark_paginas import preparar_banco
+        banco, carga = preparar_banco(args.vendas, args.diretorio, seed=args.semente)
+        print(f"🗄️ {args.vendas:,} vendas: banco pronto em {carga:.1f} s")
+
+    servidor = None
+    if args.url:
+        url, pid = args.url, args.pid
+    else:
+        servidor = iniciar_servidor(args.app, args.porta, banco)
+        url, pid = f"ws://localhost:{args.porta}/_stcore/stream", servidor.pid
+    processo = psutil.Process(pid) if psutil is not None and pid else None
+    if processo is None:
+        print("⚠️ CPU e RSS do servidor não serão medidos (requer psutil e o PID do servidor)")
+
+    print("=" * 50)
+    print(f"🚦 TESTE DE CARGA - {args.app}")
+    print("=" * 50)
+    try:
+        etapas, limite = asyncio.run(executar(args, url, processo))
+    finally:
+        if servidor is not None:
+            servidor.terminate()
+            servidor.wait()
+
+    if limite is None:
+        print(f"✅ p95 abaixo de {args.limite_p95:g} s até {args.sessoes[-1]} sessões")
+    else:
+        print(f"📉 p95 passou de {args.limite_p95:g} s com {limite} sessões")
+
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "app": args.app,
+        "vendas": args.vendas,
+        "processadores": os.cpu_count(),
+        "limite_p95_s": args.limite_p95,
+        "pausa_s": [args.pausa_min, args.pausa_max],
+        "ciclos": args.ciclos,
+        "sessoes_no_limite": limite,
+        "etapas": etapas,
+    }
+    with open(args.saida, "w", encoding="utf-8") as arquivo:
+        json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+    print(f"💾 Resultados em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
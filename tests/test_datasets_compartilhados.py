@@ -0,0 +1,79 @@
+# tests/test_datasets_compartilhados.py
+
+import threading
+
+import pandas as pd
+
+from datasets_compartilhados import RegistroDatasets
+
+
+def _em_paralelo(funcao, vezes=8):
+    resultados, erros = [], []
+
+    def executar():
+        try:
+            resultados.append(funcao())
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=executar) for _ in range(vezes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return resultados, erros
+
+
+def test_sessoes_simultaneas_geram_o_dataset_uma_vez():
+    registro = RegistroDatasets()
+    liberar = threading.Event()
+    geracoes = []
+
+    def gerar():
+        geracoes.append(None)
+        liberar.wait(5)
+        return pd.DataFrame({'valor': range(10)})
+
+    threading.Timer(0.2, liberar.set).start()
+    resultados, erros = _em_paralelo(lambda: registro.obter('vendas', ('2026-10',), gerar))
+
+    assert not erros
+    assert len(geracoes) == 1
+    assert [len(df) for df in resultados] == [10] * 8
+    estatisticas = registro.estatisticas().iloc[0]
+    assert (estatisticas['falhas'], estatisticas['acertos']) == (1, 7)
+
+
+def test_chaves_diferentes_geram_em_paralelo():
+    registro = RegistroDatasets()
+    barreira = threading.Barrier(2, timeout=5)
+
+    def gerar(chave):
+        barreira.wait()  # só passa se as duas gerações estiverem rodando juntas
+        return pd.DataFrame({'chave': [chave]})
+
+    resultados = []
+    threads = [threading.Thread(target=lambda c=c: resultados.append(registro.obter('vendas', c, lambda: gerar(c))))
+               for c in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(df['chave'][0] for df in resultados) == ['a', 'b']
+
+
+def test_erro_na_geracao_chega_a_quem_espera_e_nao_fica_em_cache():
+    registro = RegistroDatasets()
+    liberar = threading.Event()
+
+    def falhar():
+        liberar.wait(5)
+        raise ValueError("falha ao gerar")
+
+    threading.Timer(0.2, liberar.set).start()
+    _, erros = _em_paralelo(lambda: registro.obter('vendas', 1, falhar), vezes=4)
+
+    assert [str(e) for e in erros] == ["falha ao gerar"] * 4
+    # A próxima chamada gera de novo
+    assert len(registro.obter('vendas', 1, lambda: pd.DataFrame({'x': [1]}))) == 1
@@ -0,0 +1,122 @@
+# tests/test_drive_integration.py
+
+import threading
+
+import pytest
+from google.auth.credentials import AnonymousCredentials
+
+import drive_integration
+from drive_fake import FakeDriveService
+from drive_integration import MIME_PASTA, PASTAS, GoogleDriveManager
+
+
+@pytest.fixture
+def caminho_cache(tmp_path):
+    return str(tmp_path / 'drive_pastas.json')
+
+
+def _gerenciador(service, caminho_cache, **kwargs):
+    return GoogleDriveManager(service=service, caminho_cache=caminho_cache, backoff_base=0, **kwargs)
+
+
+# --- Pastas -----------------------------------------------------------------
+
+def test_pastas_criadas_com_uma_consulta_e_um_lote(caminho_cache):
+    servico = FakeDriveService()
+    existente = servico.adicionar(PASTAS[0], MIME_PASTA)
+    servico.chamadas = 0
+
+    drive = _gerenciador(servico, caminho_cache)
+
+    # Uma listagem com todos os nomes em OR + um batch com as criações
+    assert servico.chamadas == 2
+    assert set(drive.folders) == set(PASTAS)
+    assert drive.folders[PASTAS[0]] == existente['id']
+    pastas = [a for a in servico.arquivos.values() if a['mimeType'] == MIME_PASTA]
+    assert len(pastas) == len(PASTAS)
+
+
+def test_pastas_existentes_nao_sao_recriadas(caminho_cache):
+    servico = FakeDriveService()
+    ids = {nome: servico.adicionar(nome, MIME_PASTA)['id'] for nome in PASTAS}
+    servico.adicionar('Outra pasta', MIME_PASTA)
+    servico.chamadas = 0
+
+    drive = _gerenciador(servico, caminho_cache)
+
+    assert servico.chamadas == 1
+    assert drive.folders == ids
+
+
+# --- Cache das pastas -------------------------------------------------------
+
+def test_cache_dentro_do_ttl_evita_chamadas(caminho_cache):
+    servico = FakeDriveService()
+    primeiro = _gerenciador(servico, caminho_cache)
+    servico.chamadas = 0
+
+    segundo = _gerenciador(servico, caminho_cache)
+
+    assert servico.chamadas == 0
+    assert segundo.folders == primeiro.folders
+
+
+def test_cache_expirado_consulta_o_drive(caminho_cache, monkeypatch):
+    servico = FakeDriveService()
+    primeiro = _gerenciador(servico, caminho_cache, ttl_cache=60)
+    servico.chamadas = 0
+
+    agora = drive_integration.time.time()
+    monkeypatch.setattr(drive_integration.time, 'time', lambda: agora + 61)
+    segundo = _gerenciador(servico, caminho_cache, ttl_cache=60)
+
+    # Só a listagem: as pastas já existem
+    assert servico.chamadas == 1
+    assert segundo.folders == primeiro.folders
+
+
+def test_invalidar_cache_resolve_de_novo(caminho_cache):
+    servico = FakeDriveService()
+    drive = _gerenciador(servico, caminho_cache)
+    servico.chamadas = 0
+
+    drive.invalidar_cache()
+
+    assert servico.chamadas == 1
+
+
+# --- Conexões HTTP por thread -----------------------------------------------
+
+@pytest.fixture
+def servico_real(monkeypatch):
+    """Cliente de verdade (sem rede) montado por obter_servico com credenciais anônimas"""
+    monkeypatch.setattr(drive_integration, '_servico', None)
+    monkeypatch.setattr(drive_integration, '_http_por_thread', threading.local())
+    monkeypatch.setattr(
+        drive_integration.service_account.Credentials, 'from_service_account_file',
+        lambda *args, **kwargs: AnonymousCredentials()
+    )
+    return drive_integration.obter_servico()
+
+
+def _em_outra_thread(funcao):
+    resultado = []
+    thread = threading.Thread(target=lambda: resultado.append(funcao()))
+    thread.start()
+    thread.join()
+    return resultado[0]
+
+
+def test_servico_unico_por_processo(servico_real):
+    assert _em_outra_thread(drive_integration.obter_servico) is servico_real
+
+
+def test_requisicoes_usam_a_conexao_da_thread(servico_real):
+    def conexao():
+        return servico_real.files().list(q="trashed=false").http
+
+    principal = conexao()
+    outra = _em_outra_thread(conexao)
+
+    assert principal is conexao()
+    assert outra is not principal
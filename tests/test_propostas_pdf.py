@@ -0,0 +1,58 @@
+# tests/test_propostas_pdf.py
+
+import os
+import time
+
+import pandas as pd
+
+from carrinho_proposta import CarrinhoProposta, CatalogoProdutos, representada_dos_itens
+from propostas_pdf import CachePropostas
+
+
+def _gravar(diretorio, nome, tamanho, idade=0):
+    caminho = os.path.join(diretorio, nome)
+    with open(caminho, 'wb') as arquivo:
+        arquivo.write(b'%' * tamanho)
+    momento = time.time() - idade
+    os.utime(caminho, (momento, momento))
+    return nome
+
+
+def test_descarta_os_menos_usados_acima_do_limite(tmp_path):
+    cache = CachePropostas(str(tmp_path), limite_bytes=250, idade_maxima=3600)
+    for nome in ('a.pdf', 'b.pdf', 'c.pdf'):
+        cache.registrar(_gravar(str(tmp_path), nome, 100), 100)
+
+    assert sorted(os.listdir(tmp_path)) == ['b.pdf', 'c.pdf']
+
+    assert cache.acessar('b.pdf')
+    cache.registrar(_gravar(str(tmp_path), 'd.pdf', 100), 100)
+    assert sorted(os.listdir(tmp_path)) == ['b.pdf', 'd.pdf']
+    assert cache.descartados == 2
+
+
+def test_descarta_os_vencidos_ao_abrir(tmp_path):
+    _gravar(str(tmp_path), 'antigo.pdf', 10, idade=7200)
+    _gravar(str(tmp_path), 'recente.pdf', 10)
+
+    cache = CachePropostas(str(tmp_path), limite_bytes=1000, idade_maxima=3600)
+
+    assert os.listdir(tmp_path) == ['recente.pdf']
+    assert 'antigo.pdf' not in cache and not cache.acessar('antigo.pdf')
+
+
+def test_representada_da_proposta_vem_do_catalogo():
+    catalogo = CatalogoProdutos(pd.DataFrame({
+        'codigo': ['A1', 'B2', 'C3'], 'nome': ['A', 'B', 'C'],
+        'preco': [1.0, 2.0, 3.0], 'representada': ['Rep1', 'Rep1', 'Rep2'],
+    }))
+    carrinho = CarrinhoProposta()
+    carrinho.adicionar('A1')
+    carrinho.adicionar('B2')
+
+    itens, _ = carrinho.calcular(catalogo)
+    assert representada_dos_itens(itens) == 'Rep1'
+
+    carrinho.adicionar('C3')
+    itens, _ = carrinho.calcular(catalogo)
+    assert representada_dos_itens(itens) is None
@@ -0,0 +1,151 @@
+# tests/test_sincronizacao_drive.py
+
+import time
+
+import pytest
+
+from drive_fake import FakeDriveService
+from drive_integration import MAX_TENTATIVAS, GoogleDriveManager
+from repositorio_dados import RepositorioDados
+from sincronizacao_drive import SincronizadorPrecos
+
+CABECALHO = b'codigo,nome,categoria,preco,estoque,estoque_minimo\n'
+
+
+def _planilha(*codigos):
+    return CABECALHO + b''.join(f'{c},Produto {c},Geral,10.0,5,1\n'.encode() for c in codigos)
+
+
+@pytest.fixture
+def servico():
+    return FakeDriveService()
+
+
+@pytest.fixture
+def repositorio(tmp_path):
+    return RepositorioDados(str(tmp_path / 'vitrine.db'))
+
+
+@pytest.fixture
+def sincronizador(servico, repositorio, tmp_path):
+    drive = GoogleDriveManager(service=servico, caminho_cache=str(tmp_path / 'pastas.json'), backoff_base=0)
+    return SincronizadorPrecos(drive, repositorio, caminho_estado=str(tmp_path / 'estado.json'), backoff_base=0)
+
+
+def _adicionar(servico, sincronizador, nome, conteudo):
+    return servico.adicionar(nome, 'text/csv', [sincronizador.pasta_id], conteudo)
+
+
+def _codigos(repositorio):
+    return sorted(repositorio.carregar('produtos')['codigo'])
+
+
+def test_primeira_sincronizacao_importa_a_pasta(servico, repositorio, sincronizador):
+    _adicionar(servico, sincronizador, 'tabela.csv', _planilha('A1', 'B2'))
+    servico.adicionar('notas.txt', 'text/plain', [sincronizador.pasta_id], b'ignorado')
+
+    info = sincronizador.sincronizar()
+
+    assert (info['importados'], info['verificados']) == (1, 1)
+    assert _codigos(repositorio) == ['A1', 'B2']
+    assert sincronizador.estado['page_token'] == str(len(servico.mudancas))
+
+
+def test_change_feed_percorre_todas_as_paginas(servico, repositorio, sincronizador):
+    sincronizador.sincronizar()
+    # Mais mudanças que uma página do change feed, a planilha por último
+    for i in range(1100):
+        servico.adicionar(f'outro_{i}.txt', 'text/plain', ['outra_pasta'], b'x')
+    _adicionar(servico, sincronizador, 'tabela.csv', _planilha('C3'))
+    servico.chamadas = 0
+
+    info = sincronizador.sincronizar()
+
+    # Duas páginas de mudanças + o download
+    assert servico.chamadas == 3
+    assert info['importados'] == 1
+    assert _codigos(repositorio) == ['C3']
+    assert sincronizador.estado['page_token'] == str(len(servico.mudancas))
+
+
+def test_checksum_inalterado_nao_baixa_de_novo(servico, sincronizador):
+    arquivo = _adicionar(servico, sincronizador, 'tabela.csv', _planilha('A1'))
+    sincronizador.sincronizar()
+
+    # Só os metadados mudam: mesmo md5Checksum
+    servico.alterar(arquivo['id'], name='tabela.csv')
+    servico.chamadas = 0
+    info = sincronizador.sincronizar()
+
+    assert (info['inalterados'], info['importados']) == (1, 0)
+    assert servico.chamadas == 1  # só a página de mudanças
+
+    servico.alterar(arquivo['id'], conteudo=_planilha('A1', 'B2'))
+    assert sincronizador.sincronizar()['importados'] == 1
+
+
+def test_falha_transitoria_e_repetida(servico, repositorio, sincronizador):
+    _adicionar(servico, sincronizador, 'tabela.csv', _planilha('A1'))
+    servico.falhas = 2
+
+    info = sincronizador.sincronizar()
+
+    assert (info['importados'], info['erros']) == (1, 0)
+    assert _codigos(repositorio) == ['A1']
+
+
+def test_falha_transitoria_persistente_volta_no_proximo_ciclo(servico, repositorio, sincronizador, monkeypatch):
+    sincronizador.sincronizar()
+    token = sincronizador.estado['page_token']
+    arquivo = _adicionar(servico, sincronizador, 'tabela.csv', _planilha('A1'))
+    tentativas = []
+
+    def sem_rede(arquivo):
+        tentativas.append(arquivo['id'])
+        raise ConnectionError("Falha simulada de rede")
+
+    monkeypatch.setattr(sincronizador, '_baixar', sem_rede)
+    info = sincronizador.sincronizar()
+
+    assert len(tentativas) == MAX_TENTATIVAS
+    assert (info['erros'], info['pendentes']) == (1, 1)
+    # Sem assinatura gravada e com o token parado, o arquivo não é esquecido
+    assert 'assinatura' not in sincronizador.estado['checksums'][arquivo['id']]
+    assert sincronizador.estado['page_token'] == token
+
+    monkeypatch.undo()
+    info = sincronizador.sincronizar()
+
+    assert info['importados'] == 1
+    assert _codigos(repositorio) == ['A1']
+    assert sincronizador.estado['page_token'] == str(len(servico.mudancas))
+
+
+def test_arquivo_invalido_so_volta_quando_muda(servico, sincronizador):
+    arquivo = _adicionar(servico, sincronizador, 'tabela.csv', b'coluna_qualquer\n1\n')
+
+    assert sincronizador.sincronizar()['erros'] == 1
+    registro = sincronizador.estado['checksums'][arquivo['id']]
+    assert 'erro' in registro and registro['assinatura'] == arquivo['md5Checksum']
+
+    servico.alterar(arquivo['id'], name='tabela.csv')
+    assert sincronizador.sincronizar()['inalterados'] == 1
+
+    servico.alterar(arquivo['id'], conteudo=_planilha('A1'))
+    assert sincronizador.sincronizar()['importados'] == 1
+
+
+def test_solicitar_antecipa_o_ciclo_da_thread(servico, repositorio, sincronizador):
+    sincronizador.intervalo = 3600
+    sincronizador.iniciar()
+    try:
+        _adicionar(servico, sincronizador, 'tabela.csv', _planilha('A1'))
+        sincronizador.solicitar()
+        assert sincronizador.em_andamento()
+        for _ in range(100):
+            if not sincronizador.em_andamento() and _codigos(repositorio) == ['A1']:
+                break
+            time.sleep(0.05)
+        assert _codigos(repositorio) == ['A1']
+    finally:
+        sincronizador.parar(timeout=5)
@@ -0,0 +1,138 @@
+# tests/test_uploads_drive.py
+
+import threading
+
+import pytest
+
+import drive_integration
+from drive_fake import FakeDriveService
+from drive_integration import MAX_TENTATIVAS, GoogleDriveManager
+
+PASTA = '01_Propostas'
+
+
+@pytest.fixture
+def servico():
+    return FakeDriveService()
+
+
+@pytest.fixture
+def drive(servico, tmp_path):
+    gerenciador = GoogleDriveManager(service=servico, caminho_cache=str(tmp_path / 'pastas.json'), backoff_base=0)
+    yield gerenciador
+    gerenciador._executor.shutdown(wait=True)
+
+
+def _arquivos_na_pasta(servico, drive, pasta=PASTA):
+    return [a for a in servico.arquivos.values() if drive.folders[pasta] in a['parents']]
+
+
+def test_envio_simples(servico, drive):
+    file_id = drive.enviar(b'conteudo', PASTA, nome='proposta.pdf').result(timeout=5)
+
+    assert servico.conteudos[file_id] == b'conteudo'
+    [registro] = drive.status_uploads()
+    assert registro['estado'] == 'concluído'
+    assert registro['enviados'] == registro['tamanho'] == len(b'conteudo')
+
+
+def test_falha_transitoria_e_repetida_com_backoff(servico, drive, monkeypatch):
+    esperas = []
+    monkeypatch.setattr(drive_integration.time, 'sleep', esperas.append)
+    drive.backoff_base = 0.5
+    servico.falhas = 2
+
+    file_id = drive.enviar(b'conteudo', PASTA, nome='proposta.pdf').result(timeout=5)
+
+    assert servico.conteudos[file_id] == b'conteudo'
+    assert drive.status_uploads()[0]['tentativas'] == 2
+    # base * 2^n + jitter em [0, base)
+    assert 0.5 <= esperas[0] < 1.0 and 1.0 <= esperas[1] < 1.5
+
+
+def test_falha_persistente_marca_erro(servico, drive):
+    servico.falhas = MAX_TENTATIVAS
+
+    with pytest.raises(ConnectionError):
+        drive.enviar(b'conteudo', PASTA, nome='proposta.pdf').result(timeout=5)
+
+    [registro] = drive.status_uploads()
+    assert registro['estado'] == 'erro'
+    assert registro['tentativas'] == MAX_TENTATIVAS - 1
+    assert not _arquivos_na_pasta(servico, drive)
+
+
+def test_upload_resumable_retoma_apos_falha(servico, drive, tmp_path, monkeypatch):
+    chunk = 256 * 1024
+    monkeypatch.setattr(drive_integration, 'LIMITE_UPLOAD_SIMPLES', chunk)
+    monkeypatch.setattr(drive_integration, 'TAMANHO_CHUNK', chunk)
+    caminho = tmp_path / 'backup.db'
+    caminho.write_bytes(bytes(range(256)) * 4 * 1024 * 3)  # 3 chunks
+
+    # A listagem de duplicados passa; o segundo chunk falha uma vez
+    contar_chamada = servico.contar_chamada
+    chamadas = []
+
+    def falhar_segundo_chunk():
+        chamadas.append(None)
+        contar_chamada()
+        if len(chamadas) == 3:
+            raise ConnectionError("Falha simulada de rede")
+
+    monkeypatch.setattr(servico, 'contar_chamada', falhar_segundo_chunk)
+    file_id = drive.enviar(str(caminho), '06_Backup_Sistema').result(timeout=5)
+
+    assert servico.conteudos[file_id] == caminho.read_bytes()
+    [registro] = drive.status_uploads()
+    assert (registro['estado'], registro['tentativas']) == ('concluído', 1)
+    assert registro['enviados'] == caminho.stat().st_size
+
+
+def test_mesmo_conteudo_na_mesma_pasta_sobe_uma_vez(servico, drive):
+    futuros = [drive.enviar(b'conteudo', PASTA, nome='proposta.pdf') for _ in range(5)]
+    ids = {futuro.result(timeout=5) for futuro in futuros}
+
+    assert len(ids) == 1
+    assert len(_arquivos_na_pasta(servico, drive)) == 1
+    estados = sorted(r['estado'] for r in drive.status_uploads())
+    assert estados == ['concluído'] + ['duplicado'] * 4
+
+    # Outra pasta é outro arquivo
+    drive.enviar(b'conteudo', '05_Relatorios', nome='proposta.pdf').result(timeout=5)
+    assert len(_arquivos_na_pasta(servico, drive, '05_Relatorios')) == 1
+
+
+def test_conteudo_ja_no_drive_nao_e_reenviado(servico, drive):
+    existente = servico.adicionar('proposta.pdf', parents=[drive.folders[PASTA]], conteudo=b'conteudo')
+
+    assert drive.enviar(b'conteudo', PASTA, nome='proposta.pdf').result(timeout=5) == existente['id']
+    assert len(_arquivos_na_pasta(servico, drive)) == 1
+
+
+def test_md5_calculado_no_worker(drive, tmp_path, monkeypatch):
+    threads = []
+    md5_arquivo = drive_integration._md5_arquivo
+
+    def registrar_thread(caminho):
+        threads.append(threading.current_thread().name)
+        return md5_arquivo(caminho)
+
+    monkeypatch.setattr(drive_integration, '_md5_arquivo', registrar_thread)
+    caminho = tmp_path / 'relatorio.csv'
+    caminho.write_bytes(b'a,b\n1,2\n')
+
+    drive.enviar(str(caminho), PASTA).result(timeout=5)
+
+    assert threads and all(nome.startswith('upload_drive') for nome in threads)
+
+
+def test_registros_terminados_sao_podados(drive, monkeypatch):
+    monkeypatch.setattr(drive_integration, 'MAX_REGISTROS_UPLOADS', 3)
+    for i in range(10):
+        drive.enviar(f'conteudo {i}'.encode(), PASTA, nome=f'arquivo_{i}.txt').result(timeout=5)
+
+    assert [r['nome'] for r in drive.status_uploads()] == ['arquivo_9.txt', 'arquivo_8.txt', 'arquivo_7.txt']
+
+    monkeypatch.setattr(drive_integration, 'RETENCAO_UPLOADS', -1)
+    assert drive.status_uploads() == []
+    assert drive._por_conteudo == {}
@@ -3,6 +3,138 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from streamlit_js_eval import streamlit_js_eval
+import json
+
+from cartoes_kpis import cartoes_kpis
+from estilos import aplicar_estilo
+from imagens_catalogo import PipelineImagens, disponivel as imagens_disponiveis, grade_catalogo, produtos_catalogo
+from repositorio_dados import RepositorioDados
+
+# Coleta todas as propriedades em uma só avaliação e reenvia (com debounce)
+# quando a janela é redimensionada ou o aparelho muda de orientação
+JS_DISPOSITIVO = """
+(function () {
+    var janela = window;
+    try { janela = window.parent.document ? window.parent : window; } catch (e) {}
+    function coletar() {
+        return JSON.stringify({
+            width: janela.innerWidth,
+            height: janela.innerHeight,
+            user_agent: navigator.userAgent,
+            is_touch: 'ontouchstart' in janela,
+            orientation: screen.orientation ? screen.orientation.angle : 0,
+            pixel_ratio: janela.devicePixelRatio || 1
+        });
+    }
+    var espera = null;
+    function reenviar() {
+        clearTimeout(espera);
+        espera = setTimeout(function () {
+            sendDataToPython({value: coletar(), dataType: 'json'});
+        }, 300);
+    }
+    janela.addEventListener('resize', reenviar);
+    janela.addEventListener('orientationchange', reenviar);
+    return coletar();
+})()
+"""
+
+CHAVE_DISPOSITIVO = "vitrine_dispositivo"
+
+# Catálogo e miniaturas compartilhados entre as sessões do processo
+@st.cache_resource
+def obter_repositorio():
+    return RepositorioDados()
+
+@st.cache_resource
+def obter_pipeline_imagens():
+    return PipelineImagens()
+
+# Cartões do dashboard (indicador, rótulo), atualizados periodicamente em fragmento
+CARTOES_DASHBOARD = (
+    ("receita", "Vendas do Mês"),
+    ("clientes", "Clientes Ativos"),
+    ("pedidos", "Pedidos"),
+    ("comissoes", "Comissões"),
+)
+
+# Resumo da barra lateral no tablet
+CARTOES_RESUMO = (
+    ("receita", "Vendas"),
+    ("clientes", "Clientes"),
+)
+
+DISPOSITIVO_PADRAO = {
+    "width": 1200,
+    "height": 800,
+    "user_agent": "",
+    "is_touch": False,
+    "orientation": 0,
+    "pixel_ratio": 1,
+    "device_type": "desktop"
+}
+
+def detectar_dispositivo():
+    """Detecta o tipo de dispositivo e suas características (usada também pelo app.py)
+
+    Todas as propriedades são lidas em uma única avaliação JS. O resultado
+    fica em st.session_state e só muda quando o navegador reenvia os dados
+    (eventos resize/orientationchange); só então o dispositivo é reclassificado.
+    """
+    try:
+        bruto = streamlit_js_eval(js_expressions=JS_DISPOSITIVO, key="device_info", want_output=True)
+    except Exception:
+        bruto = None
+
+    em_cache = st.session_state.get(CHAVE_DISPOSITIVO)
+    if bruto is None:
+        # Primeira renderização (ou navegador sem JS): usa o último valor conhecido
+        return em_cache["device_info"] if em_cache else dict(DISPOSITIVO_PADRAO)
+    if em_cache and em_cache["bruto"] == bruto:
+        return em_cache["device_info"]
+
+    try:
+        propriedades = json.loads(bruto)
+    except (TypeError, ValueError):
+        return dict(DISPOSITIVO_PADRAO)
+
+    width = propriedades.get("width")
+    height = propriedades.get("height")
+    user_agent = propriedades.get("user_agent")
+    device_info = {
+        "width": width or 1200,
+        "height": height or 800,
+        "user_agent": user_agent or "",
+        "is_touch": propriedades.get("is_touch") or False,
+        "orientation": propriedades.get("orientation") or 0,
+        "pixel_ratio": propriedades.get("pixel_ratio") or 1,
+        "device_type": classificar_dispositivo(width, height, user_agent)
+    }
+    st.session_state[CHAVE_DISPOSITIVO] = {"bruto": bruto, "device_info": device_info}
+    return device_info
+
+def classificar_dispositivo(width, height, user_agent):
+    """Classifica o tipo de dispositivo baseado nas características"""
+    if width is None:
+        return "desktop"
+
+    # Detectar por user agent primeiro
+    user_agent = (user_agent or "").lower()
+    if any(device in user_agent for device in ["iphone", "android", "mobile"]):
+        return "smartphone"
+    elif any(device in user_agent for device in ["ipad", "tablet"]):
+        return "tablet"
+
+    # Detectar por largura da tela
+    if width <= 480:
+        return "smartphone"
+    elif width <= 768:
+        return "small_tablet"
+    elif width <= 1024:
+        return "tablet"
+    else:
+        return "desktop"
+
 
 class VitrineSCVResponsive:
     """Classe principal para o sistema VitrineSCV com interface responsiva"""
@@ -14,62 +146,11 @@ class VitrineSCVResponsive:
 
     def detect_device(self):
         """Detecta o tipo de dispositivo e suas características"""
-        try:
-            # Detectar largura da tela
-            width = streamlit_js_eval(js_expressions="window.innerWidth", key="width", want_output=True)
-            height = streamlit_js_eval(js_expressions="window.innerHeight", key="height", want_output=True)
-
-            # Detectar user agent para identificar dispositivo
-            user_agent = streamlit_js_eval(js_expressions="navigator.userAgent", key="ua", want_output=True)
-
-            # Detectar se é touch device
-            is_touch = streamlit_js_eval(js_expressions="'ontouchstart' in window", key="touch", want_output=True)
-
-            # Detectar orientação
-            orientation = streamlit_js_eval(js_expressions="screen.orientation ? screen.orientation.angle : 0", key="orient", want_output=True)
-
-            device_type = self.classify_device(width, height, user_agent)
-
-            return {
-                "width": width or 1200,
-                "height": height or 800,
-                "user_agent": user_agent or "",
-                "is_touch": is_touch or False,
-                "orientation": orientation or 0,
-                "device_type": device_type
-            }
-        except Exception as e:
-            # Fallback para dispositivos que não suportam JS
-            return {
-                "width": 1200,
-                "height": 800,
-                "user_agent": "",
-                "is_touch": False,
-                "orientation": 0,
-                "device_type": "desktop"
-            }
+        return detectar_dispositivo()
 
     def classify_device(self, width, height, user_agent):
         """Classifica o tipo de dispositivo baseado nas características"""
-        if width is None:
-            return "desktop"
-
-        # Detectar por user agent primeiro
-        user_agent = (user_agent or "").lower()
-        if any(device in user_agent for device in ["iphone", "android", "mobile"]):
-            return "smartphone"
-        elif any(device in user_agent for device in ["ipad", "tablet"]):
-            return "tablet"
-
-        # Detectar por largura da tela
-        if width <= 480:
-            return "smartphone"
-        elif width <= 768:
-            return "small_tablet"
-        elif width <= 1024:
-            return "tablet"
-        else:
-            return "desktop"
+        return classificar_dispositivo(width, height, user_agent)
 
     def setup_page_config(self):
         """Configura a página baseada no dispositivo"""
@@ -103,101 +184,12 @@ class VitrineSCVResponsive:
             )
 
     def apply_mobile_css(self):
-        """Aplica CSS responsivo baseado no dispositivo"""
-        device_type = self.device_info["device_type"]
-        width = self.device_info["width"]
-
-        # CSS base responsivo
-        css = """
-        <style>
-        /* Reset e base */
-        .main .block-container {
-            padding-top: 1rem;
-            padding-bottom: 1rem;
-        }
-
-        /* Botões touch-friendly */
-        .stButton > button {
-            min-height: 44px;
-            font-size: 16px !important;
-            border-radius: 8px;
-            font-weight: 500;
-        }
-
-        /* Inputs otimizados para mobile */
-        .stTextInput > div > div > input,
-        .stSelectbox select,
-        .stNumberInput > div > div > input {
-            font-size: 16px !important;
-            padding: 12px !important;
-            border-radius: 8px;
-        }
-
-        /* Métricas responsivas */
-        .metric-container {
-            background: #f0f2f6;
-            padding: 1rem;
-            border-radius: 10px;
-            margin: 0.5rem 0;
-        }
-        """
-
-        # CSS específico por dispositivo
-        if device_type == "smartphone":
-            css += """
-            /* Mobile específico */
-            .main .block-container {
-                padding-left: 1rem;
-                padding-right: 1rem;
-                max-width: 100%;
-            }
-
-            .stButton > button {
-                width: 100%;
-                margin-bottom: 0.5rem;
-            }
-
-            .stDataFrame {
-                font-size: 12px;
-                overflow-x: auto;
-            }
-
-            /* Ocultar elementos não essenciais no mobile */
-            .st-emotion-cache-1y4p8pa {
-                padding: 0.5rem;
-            }
-
-            /* Sidebar compacta no mobile */
-            .css-1d391kg {
-                width: 280px;
-            }
-            """
-
-        elif device_type in ["tablet", "small_tablet"]:
-            css += """
-            /* Tablet específico */
-            .main .block-container {
-                padding-left: 2rem;
-                padding-right: 2rem;
-                max-width: 1000px;
-            }
-
-            .stColumns > div {
-                padding: 0.5rem;
-            }
-            """
-
-        else:  # desktop
-            css += """
-            /* Desktop específico */
-            .main .block-container {
-                max-width: 1200px;
-                padding: 3rem 1rem;
-            }
-            """
+        """Aplica CSS responsivo baseado no dispositivo
 
-        css += "</style>"
-        st.markdown(css, unsafe_allow_html=True)
+        As variantes por dispositivo são compiladas e minificadas uma vez por
+        processo (estilos.py); a cada rerun só a referência à folha é enviada.
+        """
+        aplicar_estilo(self.device_info["device_type"])
 
     def create_responsive_layout(self):
         """Cria layout responsivo baseado no dispositivo"""
@@ -247,14 +239,10 @@ class VitrineSCVResponsive:
                 key="tablet_menu"
             )
 
-            # Métricas rápidas na sidebar
+            # Métricas rápidas na sidebar (mesmos indicadores do dashboard)
             st.markdown("---")
             st.markdown("### 📊 Resumo Rápido")
-            col1, col2 = st.columns(2)
-            with col1:
-                st.metric("Vendas", "125", "12%")
-            with col2:
-                st.metric("Clientes", "1.2K", "5%")
+            cartoes_kpis(obter_repositorio(), CARTOES_RESUMO, colunas=2)
 
         return menu_option
 
@@ -281,16 +269,7 @@ class VitrineSCVResponsive:
             st.markdown("---")
             st.markdown("### 📊 Métricas Principais")
 
-            # Grid de métricas
-            metrics_data = [
-                ("Vendas Hoje", "R$ 12.5K", "8.2%"),
-                ("Clientes Ativos", "1.247", "3.1%"),
-                ("Pedidos Pendentes", "23", "-5%"),
-                ("Comissões", "R$ 2.1K", "12%")
-            ]
-
-            for label, value, delta in metrics_data:
-                st.metric(label, value, delta)
+            cartoes_kpis(obter_repositorio(), CARTOES_DASHBOARD)
 
         return menu_option
 
@@ -319,9 +298,7 @@ class VitrineSCVResponsive:
 
         if device_type == "smartphone":
             # Layout vertical para mobile
-            st.metric("Vendas do Mês", "R$ 125.000", "12%")
-            st.metric("Clientes Ativos", "1.247", "5%")
-            st.metric("Pedidos", "89", "8%")
+            cartoes_kpis(obter_repositorio(), CARTOES_DASHBOARD[:3])
 
             # Gráfico otimizado para mobile
             chart_data = pd.DataFrame({
@@ -340,13 +317,7 @@ class VitrineSCVResponsive:
 
         elif device_type in ["tablet", "small_tablet"]:
             # Layout em grid para tablet
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Vendas do Mês", "R$ 125.000", "12%")
-            with col2:
-                st.metric("Clientes Ativos", "1.247", "5%")
-            with col3:
-                st.metric("Pedidos", "89", "8%")
+            cartoes_kpis(obter_repositorio(), CARTOES_DASHBOARD[:3], colunas=3)
 
             # Gráficos lado a lado
             col1, col2 = st.columns(2)
@@ -370,17 +341,7 @@ class VitrineSCVResponsive:
 
         else:  # desktop
             # Layout completo para desktop
-            col1, col2, col3, col4 = st.columns(4)
-            metrics = [
-                ("Vendas do Mês", "R$ 125.000", "12%"),
-                ("Clientes Ativos", "1.247", "5%"),
-                ("Pedidos", "89", "8%"),
-                ("Comissões", "R$ 8.500", "15%")
-            ]
-
-            for col, (label, value, delta) in zip([col1, col2, col3, col4], metrics):
-                with col:
-                    st.metric(label, value, delta)
+            cartoes_kpis(obter_repositorio(), CARTOES_DASHBOARD, colunas=4)
 
             # Gráficos em layout avançado
             col1, col2 = st.columns([2, 1])
@@ -429,9 +390,27 @@ class VitrineSCVResponsive:
                     submit = st.form_submit_button("💾 Salvar Cliente")
 
     def render_produtos(self):
-        """Renderiza a tela de produtos"""
+        """Renderiza a tela de produtos
+
+        As miniaturas saem no tamanho que cobre uma célula da grade nesta tela
+        (largura e densidade de pixels do aparelho), e não a foto original.
+        """
         st.markdown("## 🏷️ Catálogo de Produtos")
-        st.info("📱 Interface otimizada para " + self.device_info["device_type"])
+        produtos = produtos_catalogo(obter_repositorio())
+        if produtos.empty:
+            st.info("📦 Nenhum produto cadastrado.")
+            return
+        if not imagens_disponiveis():
+            st.caption("Miniaturas indisponíveis: instale o pillow.")
+
+        categorias = ["Todas"] + sorted(produtos["categoria"].dropna().unique())
+        categoria = st.selectbox("Categoria:", categorias)
+        if categoria != "Todas":
+            produtos = produtos[produtos["categoria"] == categoria]
+        grade_catalogo(
+            produtos, obter_pipeline_imagens(), self.device_info["width"],
+            self.device_info.get("pixel_ratio", 1), chave=f"catalogo_{categoria}"
+        )
 
     def render_pedidos(self):
         """Renderiza a tela de pedidos"""